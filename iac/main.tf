@@ -99,6 +99,14 @@ resource "aws_lambda_function" "link_station_lambda" {
 
   role          = aws_iam_role.link_station_role.arn
 
+  // An empty source disables the registry, so every request has to contain its link stations
+  environment {
+    variables = {
+      LINK_STATION_REGISTRY_SOURCE  = var.link_station_registry_source
+      LINK_STATION_REGISTRY_VERSION = var.link_station_registry_version
+    }
+  }
+
   depends_on = [aws_s3_bucket_object.artifact]
 }
 
@@ -10,4 +10,14 @@ variable "artifacts_s3_bucket_name" {
 
 variable "artifacts_s3_bucket_key" {
   description = "The S3 Object Key of the application's artifact"
-}
\ No newline at end of file
+}
+
+/* Lambda variables */
+variable "link_station_registry_source" {
+  description = "The location of the link station registry, e.g. /var/task/snapshots when the snapshots are shipped in the deployment package, or an empty string to disable the registry"
+}
+
+variable "link_station_registry_version" {
+  description = "The version of the link station snapshot (stations/<version>.json) that is used by default"
+  default     = "latest"
+}
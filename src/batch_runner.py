@@ -0,0 +1,128 @@
+import argparse
+import collections
+import concurrent.futures
+import json
+import sys
+
+from lambda_function import evaluate_body
+from validators import (
+    validate_workers,
+    validate_chunk_size,
+    validate_max_in_flight)
+
+# Evaluates a JSONL file of request bodies offline. The lines are streamed through a process pool in chunks,
+# with a bounded number of chunks in flight, and the results are written as JSONL in the order of the input.
+
+def read_request_lines(input_file):
+    # Yield every non-empty line together with its line number, so errors can be traced back to the input
+    for line_number, line in enumerate(input_file, 1):
+        line = line.strip()
+
+        if line:
+            yield line_number, line
+
+def chunk_request_lines(request_lines, chunk_size):
+    chunk = []
+
+    for request_line in request_lines:
+        chunk.append(request_line)
+
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+def evaluate_request_line(line_number, line):
+    result = {"line": line_number}
+
+    # A request that can't be parsed or validated is reported, without aborting the run
+    try:
+        result.update(evaluate_body(json.loads(line)))
+    except ValueError as error:
+        result["error"] = str(error)
+    except Exception as error:
+        # Any other failure of a single request is reported as well, so the remaining lines are still evaluated
+        result["error"] = "{}: {}".format(type(error).__name__, error)
+
+    return result
+
+def evaluate_request_lines(chunk):
+    results = []
+
+    # Runs in a worker process; the results are serialized here, so the parent only has to write them
+    for line_number, line in chunk:
+        result = evaluate_request_line(line_number, line)
+        results.append(("error" in result, json.dumps(result)))
+
+    return results
+
+def run_batch(input_file, output_file, workers=1, chunk_size=256, max_in_flight=None):
+    # Validate the pool settings
+    validate_workers(workers)
+    validate_chunk_size(chunk_size)
+
+    if max_in_flight is None:
+        max_in_flight = workers * 4
+
+    validate_max_in_flight(max_in_flight)
+
+    chunks = chunk_request_lines(read_request_lines(input_file), chunk_size)
+    summary = {"requests": 0, "errors": 0}
+
+    def write_results(results):
+        for failed, result in results:
+            output_file.write(result)
+            output_file.write("\n")
+
+            summary["requests"] += 1
+            summary["errors"] += failed
+
+    # A single worker evaluates the requests in this process
+    if workers == 1:
+        for chunk in chunks:
+            write_results(evaluate_request_lines(chunk))
+
+        return summary
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = collections.deque()
+
+        for chunk in chunks:
+            in_flight.append(executor.submit(evaluate_request_lines, chunk))
+
+            # Only read further once the oldest chunk is written, which keeps the memory usage bounded
+            if len(in_flight) >= max_in_flight:
+                write_results(in_flight.popleft().result())
+
+        while in_flight:
+            write_results(in_flight.popleft().result())
+
+    return summary
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Evaluate a JSONL file of link station requests")
+    parser.add_argument("input", help="the JSONL file with one request body per line, or - for stdin")
+    parser.add_argument("output", help="the JSONL file to write the results to, or - for stdout")
+    parser.add_argument("--workers", type=int, default=1, help="the number of worker processes")
+    parser.add_argument("--chunk-size", type=int, default=256, help="the number of requests sent to a worker at once")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="the maximum number of chunks being evaluated at once")
+    arguments = parser.parse_args(arguments)
+
+    input_file = sys.stdin if arguments.input == "-" else open(arguments.input)
+    output_file = sys.stdout if arguments.output == "-" else open(arguments.output, "w")
+
+    try:
+        summary = run_batch(input_file, output_file, arguments.workers, arguments.chunk_size, arguments.max_in_flight)
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+
+        if output_file is not sys.stdout:
+            output_file.close()
+
+    print("Evaluated {} requests, {} errors".format(summary["requests"], summary["errors"]), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
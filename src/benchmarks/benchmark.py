@@ -0,0 +1,163 @@
+from os.path import dirname, join
+import argparse
+import json
+import os
+import sys
+import timeit
+
+# Ensure that we can import the application modules
+sys.path.insert(0, dirname(dirname(__file__)))
+
+import result_cache
+from generators import (
+    LINK_STATION_GENERATORS,
+    generate_devices_coordinates,
+    build_body)
+from body_parser import compile_body
+from lambda_function import (
+    lambda_handler,
+    evaluate_body,
+    parse_body,
+    get_most_suitable_link_station_from_arrays,
+    get_most_suitable_link_stations_from_arrays,
+    get_most_suitable_link_station_indexed,
+    numpy)
+from spatial_index import LinkStationGrid
+from validators import validate_body
+
+# Measures the time of every stage of a request, per station layout and station count, and compares the
+# timings with a stored baseline. Only the standard library is required; NumPy is used when available.
+
+DEFAULT_BASELINE = join(dirname(__file__), "baseline.json")
+DEFAULT_SIZES = [10, 100, 1000, 10000, 100000, 1000000]
+
+# Without NumPy, the batch selection is skipped when it would take more than this number of calculations
+MAX_PURE_PYTHON_BATCH_SIZE = 10 ** 7
+
+def measure(function, repeat=3):
+    # The best time per call of a few rounds, where every round takes at least 0.2 seconds
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+def measure_stages(link_stations, devices_coordinates, repeat=3):
+    body = build_body(devices_coordinates[0], link_stations)
+    body_text = json.dumps(body)
+    event = {"body": body_text}
+
+    device_coordinates, link_station_arrays = compile_body(body)
+    link_station_grid = LinkStationGrid.from_link_station_arrays(link_station_arrays)
+    response_body = evaluate_body(body)
+
+    timings = {
+        "json.loads": measure(lambda: json.loads(body_text), repeat),
+        "validate_body": measure(lambda: validate_body(body), repeat),
+        "parse_body": measure(lambda: parse_body(body), repeat),
+        "compile_body": measure(lambda: compile_body(body), repeat),
+        "selection": measure(lambda: get_most_suitable_link_station_from_arrays(device_coordinates, link_station_arrays), repeat),
+        "grid_build": measure(lambda: LinkStationGrid.from_link_station_arrays(link_station_arrays), repeat),
+        "grid_query": measure(lambda: [get_most_suitable_link_station_indexed(coordinates, link_station_grid) for coordinates in devices_coordinates], repeat) / len(devices_coordinates),
+        "json.dumps": measure(lambda: json.dumps(response_body), repeat),
+        "lambda_handler": measure(lambda: lambda_handler(event, None), repeat)
+    }
+
+    # The batch selection is timed per device
+    if numpy is not None or len(link_stations) * len(devices_coordinates) <= MAX_PURE_PYTHON_BATCH_SIZE:
+        timings["batch_selection"] = measure(lambda: get_most_suitable_link_stations_from_arrays(devices_coordinates, link_station_arrays), repeat) / len(devices_coordinates)
+
+    return timings
+
+def run_benchmarks(layouts, sizes, devices=100, seed=0, repeat=3, report=None):
+    # Every repeated request must be calculated, so the result cache is disabled while measuring, and the
+    # configuration of this process is restored afterwards
+    cache_size = os.environ.get(result_cache.CACHE_SIZE_VARIABLE)
+    cache = result_cache.result_cache
+    os.environ[result_cache.CACHE_SIZE_VARIABLE] = "0"
+    result_cache.result_cache = None
+
+    try:
+        return measure_layouts(layouts, sizes, devices, seed, repeat, report)
+    finally:
+        if cache_size is None:
+            del os.environ[result_cache.CACHE_SIZE_VARIABLE]
+        else:
+            os.environ[result_cache.CACHE_SIZE_VARIABLE] = cache_size
+
+        result_cache.result_cache = cache
+
+def measure_layouts(layouts, sizes, devices=100, seed=0, repeat=3, report=None):
+    results = {}
+
+    for layout in layouts:
+        for size in sizes:
+            link_stations = LINK_STATION_GENERATORS[layout](size, seed)
+            devices_coordinates = generate_devices_coordinates(devices, link_stations, seed)
+
+            for stage, timing in measure_stages(link_stations, devices_coordinates, repeat).items():
+                key = "{}/{}/{}".format(layout, size, stage)
+                results[key] = timing
+
+                if report is not None:
+                    report("{:<45} {:>14.3f} us".format(key, timing * 1000000))
+
+    return results
+
+def compare_with_baseline(results, baseline, tolerance):
+    regressions = []
+
+    # Only the stages that are in both the results and the baseline are compared
+    for key, timing in results.items():
+        if key in baseline and timing > baseline[key] * (1 + tolerance):
+            regressions.append((key, baseline[key], timing))
+
+    return regressions
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Benchmark every stage of a link station request")
+    parser.add_argument("--layouts", nargs="+", default=sorted(LINK_STATION_GENERATORS), choices=sorted(LINK_STATION_GENERATORS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES, help="the link station counts")
+    parser.add_argument("--devices", type=int, default=100, help="the number of devices per batch")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="the JSON file with the baseline timings")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="the allowed slowdown compared to the baseline, 0.5 is 50%%")
+    parser.add_argument("--update-baseline", action="store_true", help="store the timings as the new baseline")
+    parser.add_argument("--output", help="write the timings as JSON to this file")
+    arguments = parser.parse_args(arguments)
+
+    results = run_benchmarks(arguments.layouts, arguments.sizes, arguments.devices, arguments.seed, arguments.repeat, print)
+
+    if arguments.output:
+        with open(arguments.output, "w") as output_file:
+            json.dump(results, output_file, indent=2, sort_keys=True)
+
+    if arguments.update_baseline:
+        baseline = {}
+
+        # Keep the baseline of the stages that weren't measured in this run
+        if os.path.exists(arguments.baseline):
+            with open(arguments.baseline) as baseline_file:
+                baseline = json.load(baseline_file)
+
+        baseline.update(results)
+
+        with open(arguments.baseline, "w") as baseline_file:
+            json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+
+        return 0
+
+    if not os.path.exists(arguments.baseline):
+        print("No baseline found at {}, nothing to compare".format(arguments.baseline))
+        return 0
+
+    with open(arguments.baseline) as baseline_file:
+        regressions = compare_with_baseline(results, json.load(baseline_file), arguments.tolerance)
+
+    for key, baseline_timing, timing in regressions:
+        print("Regression in {}: {:.3f} us, baseline {:.3f} us".format(key, timing * 1000000, baseline_timing * 1000000))
+
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
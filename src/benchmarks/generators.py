@@ -0,0 +1,76 @@
+import random
+
+# Seeded generators of synthetic link station networks and device batches. The same seed always results in
+# the same network, so the timings of different runs are comparable.
+
+def generate_uniform_link_stations(count, seed=0, extent=100000, max_reach=1000):
+    # Link stations spread evenly over a square area
+    generator = random.Random(seed)
+
+    return [
+        [generator.randint(-extent, extent), generator.randint(-extent, extent), generator.randint(1, max_reach)]
+        for _ in range(count)
+    ]
+
+def generate_clustered_link_stations(count, seed=0, extent=100000, max_reach=1000, clusters=20, spread=2000):
+    # Link stations grouped around a number of towns
+    generator = random.Random(seed)
+    centers = [(generator.randint(-extent, extent), generator.randint(-extent, extent)) for _ in range(clusters)]
+    link_stations = []
+
+    for _ in range(count):
+        center_x, center_y = generator.choice(centers)
+        link_stations.append([
+            int(generator.gauss(center_x, spread)),
+            int(generator.gauss(center_y, spread)),
+            generator.randint(1, max_reach)
+        ])
+
+    return link_stations
+
+def generate_dense_urban_link_stations(count, seed=0, extent=100000, max_reach=1000, core=5000, core_share=0.8):
+    # Most link stations, with a small reach, packed in a city core; the others cover the surroundings
+    generator = random.Random(seed)
+    link_stations = []
+
+    for _ in range(count):
+        if generator.random() < core_share:
+            link_stations.append([generator.randint(-core, core), generator.randint(-core, core), generator.randint(1, max(max_reach // 10, 1))])
+        else:
+            link_stations.append([generator.randint(-extent, extent), generator.randint(-extent, extent), generator.randint(1, max_reach)])
+
+    return link_stations
+
+LINK_STATION_GENERATORS = {
+    "uniform": generate_uniform_link_stations,
+    "clustered": generate_clustered_link_stations,
+    "dense_urban": generate_dense_urban_link_stations
+}
+
+def generate_devices_coordinates(count, link_stations, seed=0, near_share=0.8, spread=500):
+    # Most devices are near a link station, the others are anywhere around the network
+    generator = random.Random(seed)
+    min_x = min(link_station[0] for link_station in link_stations)
+    max_x = max(link_station[0] for link_station in link_stations)
+    min_y = min(link_station[1] for link_station in link_stations)
+    max_y = max(link_station[1] for link_station in link_stations)
+    devices_coordinates = []
+
+    for _ in range(count):
+        if generator.random() < near_share:
+            link_station = generator.choice(link_stations)
+            devices_coordinates.append((link_station[0] + generator.randint(-spread, spread), link_station[1] + generator.randint(-spread, spread)))
+        else:
+            devices_coordinates.append((generator.randint(min_x, max_x), generator.randint(min_y, max_y)))
+
+    return devices_coordinates
+
+def build_body(device_coordinates, link_stations):
+    # Build a request body in the format of event.json
+    return {
+        "device": {"coordinates": {"x": device_coordinates[0], "y": device_coordinates[1]}},
+        "linkStations": [
+            {"coordinates": {"x": link_station[0], "y": link_station[1]}, "reach": link_station[2]}
+            for link_station in link_stations
+        ]
+    }
@@ -0,0 +1,256 @@
+from os.path import dirname
+import argparse
+import concurrent.futures
+import http.client
+import json
+import math
+import os
+import sys
+import threading
+import time
+import urllib.parse
+
+# Ensure that we can import the application modules
+sys.path.insert(0, dirname(dirname(__file__)))
+
+from generators import (
+    LINK_STATION_GENERATORS,
+    generate_devices_coordinates,
+    build_body)
+
+# Replays request bodies against lambda_handler, in this process or against a (local) HTTP endpoint, and reports
+# the latency percentiles and throughput. The requests are either sent at a fixed rate, where the latency is
+# measured from the moment a request was due (so a slow server can't hide its queueing), or as fast as a number
+# of concurrent clients can send them. The first request of every client (thread) is reported apart from the
+# others as a cold call. In this process, only the very first call loads the application code (its import time is
+# reported as the startup) and the others merely warm up their thread; against an endpoint, it includes opening
+# the connection and whatever warm-up the endpoint does. A real Lambda cold start isn't measured by the replay.
+
+PERCENTILES = [50, 95, 99]
+
+def load_request_bodies(input_file):
+    text = input_file.read()
+
+    # A single body, like event.json
+    try:
+        return [json.dumps(get_request_body(json.loads(text)))]
+    except ValueError:
+        pass
+
+    # A capture with one body (or API Gateway event) per line
+    return [json.dumps(get_request_body(json.loads(line))) for line in text.splitlines() if line.strip()]
+
+def generate_request_bodies(count, layout="uniform", devices=100, seed=0):
+    # Bodies with a generated link station set, for a device each
+    link_stations = LINK_STATION_GENERATORS[layout](count, seed)
+
+    return [json.dumps(build_body(device_coordinates, link_stations)) for device_coordinates in generate_devices_coordinates(devices, link_stations, seed)]
+
+def get_request_body(request):
+    # An API Gateway event carries the body as text
+    if type(request) is dict and type(request.get("body")) is str:
+        return json.loads(request["body"])
+
+    return request
+
+class InProcessTarget:
+    # Calls lambda_handler directly, like a warm Lambda container would. The result cache is disabled, unless a
+    # size is given, so repeated bodies are calculated every time.
+    def __init__(self, cache_size=0):
+        started = time.perf_counter()
+
+        import result_cache
+        from lambda_function import lambda_handler
+
+        self.lambda_handler = lambda_handler
+        self.startup_seconds = time.perf_counter() - started
+
+        # Start with a fresh cache of this size, in the same way a container is configured. It is created before
+        # the client threads start, which then share it (the cache itself is thread-safe).
+        os.environ[result_cache.CACHE_SIZE_VARIABLE] = str(cache_size)
+        result_cache.result_cache = None
+        self.get_result_cache = result_cache.get_result_cache
+        self.get_result_cache()
+
+    def invoke(self, body):
+        try:
+            return self.lambda_handler({"body": body}, None)["statusCode"]
+        except Exception:
+            # The status API Gateway responds with when the function fails, for whatever reason
+            return 502
+
+    def get_cache_statistics(self):
+        cache = self.get_result_cache()
+
+        if cache is None:
+            return None
+
+        statistics = cache.get_statistics()
+        lookups = statistics["hits"] + statistics["misses"]
+        statistics["hit_ratio"] = statistics["hits"] / lookups if lookups else 0.0
+
+        return statistics
+
+class HttpTarget:
+    # Posts the bodies to an endpoint, with a keep-alive connection per client thread
+    def __init__(self, url):
+        parsed_url = urllib.parse.urlsplit(url)
+
+        self.connection_class = http.client.HTTPSConnection if parsed_url.scheme == "https" else http.client.HTTPConnection
+        self.netloc = parsed_url.netloc
+        self.path = parsed_url.path or "/"
+        self.connections = threading.local()
+        self.startup_seconds = 0.0
+
+    def invoke(self, body):
+        connection = getattr(self.connections, "connection", None)
+
+        if connection is None:
+            connection = self.connections.connection = self.connection_class(self.netloc)
+
+        try:
+            connection.request("POST", self.path, body, {"Content-Type": "application/json"})
+            response = connection.getresponse()
+            response.read()
+
+            return response.status
+        except (OSError, http.client.HTTPException):
+            # The connection is opened again for the next request
+            connection.close()
+            self.connections.connection = None
+
+            return 0
+
+    def get_cache_statistics(self):
+        # The cache of the endpoint isn't visible to the replay
+        return None
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clients = set()
+        self.cold = []
+        self.warm = []
+        self.errors = 0
+
+    def record(self, client, latency, status):
+        with self.lock:
+            # The first request of every client is a cold call
+            if client in self.clients:
+                self.warm.append(latency)
+            else:
+                self.clients.add(client)
+                self.cold.append(latency)
+
+            if status != 200:
+                self.errors += 1
+
+def get_percentile(sorted_latencies, percentile):
+    # The nearest-rank percentile
+    return sorted_latencies[max(int(math.ceil(percentile / 100.0 * len(sorted_latencies))) - 1, 0)]
+
+def summarize_latencies(latencies):
+    if not latencies:
+        return {"count": 0}
+
+    sorted_latencies = sorted(latencies)
+    summary = {"count": len(latencies), "mean_ms": sum(latencies) / len(latencies) * 1000, "max_ms": sorted_latencies[-1] * 1000}
+
+    for percentile in PERCENTILES:
+        summary["p{}_ms".format(percentile)] = get_percentile(sorted_latencies, percentile) * 1000
+
+    return summary
+
+def run_replay(bodies, target, requests, concurrency=1, rate=None):
+    recorder = Recorder()
+
+    def invoke(body, due, client=None):
+        status = target.invoke(body)
+
+        # Without a client, every thread of the pool is a client with its own connection
+        recorder.record(threading.get_ident() if client is None else client, time.perf_counter() - due, status)
+
+    started = time.perf_counter()
+
+    if rate is None:
+        # Every client has its own thread, and sends its next request as soon as the previous one is answered
+        def run_client(client):
+            for index in range(client, requests, concurrency):
+                invoke(bodies[index % len(bodies)], time.perf_counter(), client)
+
+        clients = [threading.Thread(target=run_client, args=(client,)) for client in range(concurrency)]
+
+        for client in clients:
+            client.start()
+
+        for client in clients:
+            client.join()
+    else:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = []
+
+            # The requests are due at a fixed rate, whether or not the previous ones are answered
+            for index in range(requests):
+                due = started + index / rate
+                time.sleep(max(due - time.perf_counter(), 0))
+                futures.append(executor.submit(invoke, bodies[index % len(bodies)], due))
+
+            for future in futures:
+                future.result()
+
+    duration = time.perf_counter() - started
+
+    return {
+        "requests": requests,
+        "errors": recorder.errors,
+        "concurrency": concurrency,
+        "rate": rate,
+        "duration_seconds": duration,
+        "throughput": requests / duration,
+        "startup_seconds": target.startup_seconds,
+        "cache": target.get_cache_statistics(),
+        "latency": summarize_latencies(recorder.cold + recorder.warm),
+        "cold": summarize_latencies(recorder.cold),
+        "warm": summarize_latencies(recorder.warm)
+    }
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Replay request bodies against lambda_handler and report the latency")
+    parser.add_argument("input", nargs="?", help="a request body like event.json, or a JSONL capture with one body per line")
+    parser.add_argument("--link-stations", type=int, help="generate the bodies with this number of link stations, instead of reading them")
+    parser.add_argument("--layout", default="uniform", choices=sorted(LINK_STATION_GENERATORS), help="the layout of the generated link stations")
+    parser.add_argument("--url", help="the endpoint to send the requests to, such as the local server; by default lambda_handler is called in this process")
+    parser.add_argument("--requests", type=int, default=1000, help="the number of requests; the bodies are repeated when needed")
+    parser.add_argument("--concurrency", type=int, default=1, help="the number of concurrent clients")
+    parser.add_argument("--rate", type=float, default=None, help="the number of requests per second, by default as fast as possible")
+    parser.add_argument("--cache-size", type=int, default=0, help="the size of the result cache in this process, by default it is disabled")
+    parser.add_argument("--output", help="write the report as JSON to this file")
+    arguments = parser.parse_args(arguments)
+
+    if arguments.link_stations:
+        bodies = generate_request_bodies(arguments.link_stations, arguments.layout)
+    elif arguments.input:
+        with open(arguments.input) as input_file:
+            bodies = load_request_bodies(input_file)
+    else:
+        parser.error("either an input file or --link-stations is required")
+
+    target = HttpTarget(arguments.url) if arguments.url else InProcessTarget(arguments.cache_size)
+    report = run_replay(bodies, target, arguments.requests, arguments.concurrency, arguments.rate)
+    report["target"] = arguments.url or "in-process"
+
+    print("{} requests, {} errors, {:.1f} requests/s, p50 {:.3f} ms, p95 {:.3f} ms, p99 {:.3f} ms".format(
+        report["requests"], report["errors"], report["throughput"],
+        report["latency"]["p50_ms"], report["latency"]["p95_ms"], report["latency"]["p99_ms"]), file=sys.stderr)
+
+    if report["cache"] is not None:
+        print("cache hit ratio {:.3f}".format(report["cache"]["hit_ratio"]), file=sys.stderr)
+
+    if arguments.output:
+        with open(arguments.output, "w") as output_file:
+            json.dump(report, output_file, indent=2, sort_keys=True)
+    else:
+        print(json.dumps(report, indent=2, sort_keys=True))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+from os.path import dirname
+import argparse
+import json
+import os
+import sys
+import time
+
+# Ensure that we can import the application modules
+sys.path.insert(0, dirname(dirname(__file__)))
+
+from generators import (
+    LINK_STATION_GENERATORS,
+    generate_devices_coordinates)
+from body_parser import compile_link_stations
+from sharded_engine import ShardedEngine
+
+# Measures how a batch evaluated by the sharded engine scales from 1 to N worker processes. The setup (the
+# partitioning, the copy into shared memory and starting the pool) is measured apart from the batches, which
+# reuse the same engine, like a long running service would. Every worker count must give the same answers.
+
+def get_default_workers():
+    workers = [1]
+
+    while workers[-1] * 2 <= (os.cpu_count() or 1):
+        workers.append(workers[-1] * 2)
+
+    return workers
+
+def run_scaling(count, devices, workers, layout="uniform", seed=0, repeat=3):
+    link_stations = LINK_STATION_GENERATORS[layout](count, seed)
+    link_station_arrays = compile_link_stations(link_stations)
+    devices_coordinates = generate_devices_coordinates(devices, link_stations, seed)
+    results = {}
+    expected_most_suitable_link_stations = None
+
+    for worker_count in workers:
+        started = time.perf_counter()
+
+        with ShardedEngine(link_station_arrays, worker_count) as engine:
+            setup_seconds = time.perf_counter() - started
+            batch_seconds = []
+
+            for _ in range(repeat):
+                started = time.perf_counter()
+                most_suitable_link_stations = engine.get_most_suitable_link_stations(devices_coordinates)
+                batch_seconds.append(time.perf_counter() - started)
+
+        if expected_most_suitable_link_stations is None:
+            expected_most_suitable_link_stations = most_suitable_link_stations
+        elif most_suitable_link_stations != expected_most_suitable_link_stations:
+            raise RuntimeError("The results with {} workers differ from the results with {} workers".format(worker_count, workers[0]))
+
+        results[worker_count] = {"setup_seconds": setup_seconds, "batch_seconds": min(batch_seconds)}
+
+    # The speedup of every worker count compared to the first one
+    for result in results.values():
+        result["speedup"] = results[workers[0]]["batch_seconds"] / result["batch_seconds"]
+
+    return results
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Measure the scaling of the sharded engine over worker processes")
+    parser.add_argument("--count", type=int, default=1000000, help="the number of link stations")
+    parser.add_argument("--devices", type=int, default=10000, help="the number of devices per batch")
+    parser.add_argument("--workers", nargs="+", type=int, default=get_default_workers(), help="the worker counts to measure")
+    parser.add_argument("--layout", default="uniform", choices=sorted(LINK_STATION_GENERATORS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    arguments = parser.parse_args(arguments)
+
+    results = run_scaling(arguments.count, arguments.devices, arguments.workers, arguments.layout, arguments.seed, arguments.repeat)
+
+    for worker_count, result in results.items():
+        print("{:>3} workers: setup {:8.3f} s, batch {:8.3f} s, speedup {:5.2f}x".format(worker_count, result["setup_seconds"], result["batch_seconds"], result["speedup"]), file=sys.stderr)
+
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+from os.path import dirname, join
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+
+# Ensure that we can import the application modules
+sys.path.insert(0, dirname(dirname(__file__)))
+
+from generators import (
+    LINK_STATION_GENERATORS,
+    build_body)
+
+# Compares the cold start of a registry version loaded from its JSON document with one memory-mapped from its
+# binary snapshot. Every path is measured in a fresh process, so the startup time and resident memory include
+# everything a new Lambda container would pay for before its first answer.
+
+def get_memory_usage():
+    # The resident memory, and the part of it that isn't backed by a file (such as Python objects), in kB
+    memory_usage = {}
+
+    with open("/proc/self/status") as status_file:
+        for line in status_file:
+            name, _, value = line.partition(":")
+
+            if name in ("VmRSS", "RssAnon", "RssFile"):
+                memory_usage[name] = int(value.split()[0])
+
+    return memory_usage
+
+def measure_startup(source, version):
+    started = time.perf_counter()
+
+    from station_registry import LinkStationRegistry
+    from lambda_function import get_most_suitable_link_station_indexed
+
+    link_station_registry = LinkStationRegistry(source, version)
+    link_station_grid = link_station_registry.get()
+    loaded = time.perf_counter()
+
+    get_most_suitable_link_station_indexed((0, 0), link_station_grid)
+    answered = time.perf_counter()
+
+    result = {"startup_seconds": loaded - started, "first_query_seconds": answered - loaded}
+    result.update(get_memory_usage())
+
+    return result
+
+def run_startup_comparison(count, layout="uniform", seed=0):
+    link_stations = LINK_STATION_GENERATORS[layout](count, seed)
+    results = {}
+
+    with tempfile.TemporaryDirectory() as json_source, tempfile.TemporaryDirectory() as snapshot_source:
+        document_path = join(json_source, "benchmark.json")
+
+        with open(document_path, "w") as document_file:
+            json.dump({"linkStations": build_body((0, 0), link_stations)["linkStations"]}, document_file)
+
+        # The snapshot is built from the same document, as it would be at packaging time
+        subprocess.run([sys.executable, join(dirname(dirname(__file__)), "station_snapshot.py"), document_path, join(snapshot_source, "benchmark.snapshot")], check=True)
+
+        for name, source in [("json", json_source), ("snapshot", snapshot_source)]:
+            output = subprocess.run([sys.executable, __file__, "--measure", source], check=True, stdout=subprocess.PIPE)
+            results[name] = json.loads(output.stdout)
+
+    return results
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Compare the cold start of the JSON and snapshot registry paths")
+    parser.add_argument("--count", type=int, default=1000000, help="the number of link stations")
+    parser.add_argument("--layout", default="uniform", choices=sorted(LINK_STATION_GENERATORS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    arguments = parser.parse_args(arguments)
+
+    # Runs in the fresh process of a single path
+    if arguments.measure:
+        print(json.dumps(measure_startup(arguments.measure, "benchmark")))
+        return
+
+    print(json.dumps(run_startup_comparison(arguments.count, arguments.layout, arguments.seed), indent=2))
+
+if __name__ == "__main__":
+    main()
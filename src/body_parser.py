@@ -0,0 +1,110 @@
+from array import array
+
+from validators import (
+    validate_body_device,
+    validate_device_coordinates_range,
+    validate_body_link_station,
+    validate_body_ranking)
+
+# Parses a request body in a single walk. Every element is validated at the moment it is read, with the same
+# messages as validate_body, and the link stations are stored in compact typed arrays of x, y and reach. Link
+# stations with values that don't fit in 64 bit integers are stored in lists instead, which are scored in the
+# same way.
+
+def compile_body(json_object):
+    if json_object is None or type(json_object) is not dict:
+        raise ValueError("Invalid body specified")
+
+    # Parse the device
+    if 'device' not in json_object:
+        raise ValueError("Invalid device specified in the request")
+
+    device_coordinates = parse_body_device(json_object['device'])
+
+    # Parse the link stations
+    if 'linkStations' not in json_object:
+        raise ValueError("No valid link stations list specified in the request")
+
+    return device_coordinates, compile_body_link_stations(json_object['linkStations'])
+
+def compile_batch_body(json_object):
+    if json_object is None or type(json_object) is not dict:
+        raise ValueError("Invalid body specified")
+
+    # Parse the devices
+    if 'devices' not in json_object or type(json_object['devices']) is not list or len(json_object['devices']) < 1:
+        raise ValueError("No valid devices list specified in the request")
+
+    devices_coordinates = [parse_body_device(device) for device in json_object['devices']]
+
+    # Validate that the devices fit in 64 bit integers, like the link stations
+    for device_coordinates in devices_coordinates:
+        validate_device_coordinates_range(device_coordinates)
+
+    # Parse the link stations
+    if 'linkStations' not in json_object:
+        raise ValueError("No valid link stations list specified in the request")
+
+    return devices_coordinates, compile_body_link_stations(json_object['linkStations'])
+
+def parse_body_device(device):
+    # Validate the device
+    validate_body_device(device)
+
+    # Get the device coordinates as a tuple
+    return (device['coordinates']['x'], device['coordinates']['y'])
+
+def compile_body_link_stations(link_stations):
+    if type(link_stations) is not list:
+        raise ValueError("No valid link stations list specified in the request")
+
+    try:
+        link_station_arrays = collect_body_link_stations(link_stations, lambda: array('q'))
+    except OverflowError:
+        link_station_arrays = collect_body_link_stations(link_stations, list)
+
+    # At least one link station is required to find the most suitable one
+    if len(link_station_arrays[0]) < 1:
+        raise ValueError("Invalid link stations specified")
+
+    return link_station_arrays
+
+def collect_body_link_stations(link_stations, create_values):
+    link_stations_x = create_values()
+    link_stations_y = create_values()
+    link_stations_reach = create_values()
+
+    for link_station in link_stations:
+        # Validate the link station
+        validate_body_link_station(link_station)
+
+        link_stations_x.append(link_station['coordinates']['x'])
+        link_stations_y.append(link_station['coordinates']['y'])
+        link_stations_reach.append(link_station['reach'])
+
+    return link_stations_x, link_stations_y, link_stations_reach
+
+def parse_body_ranking(json_object):
+    # Without top or minPower, only the most suitable link station is requested
+    if 'top' not in json_object and 'minPower' not in json_object:
+        return None
+
+    # Validate the ranking
+    validate_body_ranking(json_object)
+
+    return json_object.get('top'), float(json_object.get('minPower', 0.0))
+
+def compile_link_stations(link_stations):
+    # Convert already validated link stations from the nested list format to the compact typed arrays
+    try:
+        return (
+            array('q', [link_station[0] for link_station in link_stations]),
+            array('q', [link_station[1] for link_station in link_stations]),
+            array('q', [link_station[2] for link_station in link_stations])
+        )
+    except OverflowError:
+        return (
+            [link_station[0] for link_station in link_stations],
+            [link_station[1] for link_station in link_stations],
+            [link_station[2] for link_station in link_stations]
+        )
@@ -0,0 +1,145 @@
+import collections
+from array import array
+
+from scoring import (
+    get_most_suitable_link_station_index_scored,
+    get_most_suitable_link_station_positions,
+    numpy)
+from validators import (
+    validate_device_coordinates,
+    validate_link_station_grid,
+    validate_tile_size,
+    validate_max_tiles)
+
+DEFAULT_TILE_SIZE = 64
+DEFAULT_MAX_TILES = 256
+
+# A tile without any link station in reach, which is shared by all of those tiles
+EMPTY_TILE = None
+
+class CoverageMap:
+    # A raster of the most suitable link station for every integer point, for a fixed link station set.
+    # The plane is split in square tiles, which are only calculated when a device in the tile is queried
+    # for the first time. The most recently used tiles are kept, so repeat lookups only read two arrays.
+    def __init__(self, link_station_grid, tile_size=DEFAULT_TILE_SIZE, max_tiles=DEFAULT_MAX_TILES):
+        # Validate the link station grid, tile size and maximum number of tiles
+        validate_link_station_grid(link_station_grid)
+        validate_tile_size(tile_size)
+        validate_max_tiles(max_tiles)
+
+        self.link_station_grid = link_station_grid
+        self.link_station_arrays = link_station_grid.link_station_arrays
+        self.tile_size = tile_size
+        self.max_tiles = max_tiles
+        self.tiles = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # The link station arrays are converted once, every tile only gathers its own link stations from them
+        if numpy is not None:
+            self.link_station_numpy_arrays = [numpy.asarray(values, dtype=numpy.int64) for values in self.link_station_arrays]
+
+    def get_tile_key(self, device_coordinates):
+        return (device_coordinates[0] // self.tile_size, device_coordinates[1] // self.tile_size)
+
+    def get_most_suitable_link_station(self, device_coordinates):
+        # Validate device coordinates
+        validate_device_coordinates(device_coordinates)
+
+        tile_key = self.get_tile_key(device_coordinates)
+
+        if tile_key in self.tiles:
+            self.tiles.move_to_end(tile_key)
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.tiles[tile_key] = self.build_tile(tile_key)
+
+            # Evict the least recently used tiles
+            while len(self.tiles) > self.max_tiles:
+                self.tiles.popitem(last=False)
+                self.evictions += 1
+
+        tile = self.tiles[tile_key]
+
+        if tile is EMPTY_TILE:
+            return (0, 0, 0.0)
+
+        # The points of a tile are stored row by row
+        tile_indices, tile_powers = tile
+        offset = (device_coordinates[1] - tile_key[1] * self.tile_size) * self.tile_size + device_coordinates[0] - tile_key[0] * self.tile_size
+        index = tile_indices[offset]
+
+        if index < 0:
+            return (0, 0, 0.0)
+
+        return (self.link_station_arrays[0][index], self.link_station_arrays[1][index], tile_powers[offset])
+
+    def get_tile_link_station_indices(self, tile_key):
+        min_x = tile_key[0] * self.tile_size
+        min_y = tile_key[1] * self.tile_size
+        max_x = min_x + self.tile_size - 1
+        max_y = min_y + self.tile_size - 1
+        cell_size = self.link_station_grid.cell_size
+        link_stations_x, link_stations_y, link_stations_reach = self.link_station_arrays
+        indices = set()
+
+        # Collect the link stations of every grid cell that overlaps with the tile
+        for cell_x in range(min_x // cell_size, max_x // cell_size + 1):
+            for cell_y in range(min_y // cell_size, max_y // cell_size + 1):
+                indices.update(self.link_station_grid.query((max(cell_x * cell_size, min_x), max(cell_y * cell_size, min_y))))
+
+        # Only the link stations whose reach box overlaps with the tile can provide power in the tile;
+        # they are kept in their original order, so ties are resolved like the regular scan
+        return [
+            index for index in sorted(indices)
+            if link_stations_x[index] - link_stations_reach[index] <= max_x and link_stations_x[index] + link_stations_reach[index] >= min_x
+            and link_stations_y[index] - link_stations_reach[index] <= max_y and link_stations_y[index] + link_stations_reach[index] >= min_y
+        ]
+
+    def build_tile(self, tile_key):
+        indices = self.get_tile_link_station_indices(tile_key)
+
+        if not indices:
+            return EMPTY_TILE
+
+        if numpy is None:
+            return self.build_tile_without_numpy(tile_key, indices)
+
+        return self.build_tile_with_numpy(tile_key, indices)
+
+    def build_tile_with_numpy(self, tile_key, indices):
+        # The points of the tile, row by row
+        points_x, points_y = numpy.meshgrid(
+            numpy.arange(tile_key[0] * self.tile_size, (tile_key[0] + 1) * self.tile_size, dtype=numpy.int64),
+            numpy.arange(tile_key[1] * self.tile_size, (tile_key[1] + 1) * self.tile_size, dtype=numpy.int64))
+        points_array = numpy.stack([points_x.ravel(), points_y.ravel()], axis=1)
+
+        link_stations_x, link_stations_y, link_stations_reach = [values[indices] for values in self.link_station_numpy_arrays]
+
+        # The positions of the most suitable link stations are translated to their indices
+        positions, powers = get_most_suitable_link_station_positions(points_array, link_stations_x, link_stations_y, link_stations_reach)
+        tile_indices = array('q', [indices[position] if position >= 0 else -1 for position in positions])
+
+        return tile_indices, array('d', powers)
+
+    def build_tile_without_numpy(self, tile_key, indices):
+        tile_indices = array('q')
+        tile_powers = array('d')
+
+        for point_y in range(tile_key[1] * self.tile_size, (tile_key[1] + 1) * self.tile_size):
+            for point_x in range(tile_key[0] * self.tile_size, (tile_key[0] + 1) * self.tile_size):
+                best_index, best_power = get_most_suitable_link_station_index_scored((point_x, point_y), self.link_station_arrays, False, indices)
+                tile_indices.append(best_index)
+                tile_powers.append(best_power)
+
+        return tile_indices, tile_powers
+
+    def get_statistics(self):
+        return {
+            "tiles": len(self.tiles),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
@@ -0,0 +1,256 @@
+import argparse
+import itertools
+import json
+import sys
+from array import array
+
+from body_parser import (
+    parse_body_device,
+    compile_body_link_stations)
+from scoring import (
+    MAX_MATRIX_SIZE,
+    are_devices_within_numpy_range,
+    is_within_numpy_range,
+    get_most_suitable_link_station_index_scored,
+    get_within_reach_differences,
+    get_near_highest,
+    numpy)
+from spatial_index import LinkStationGrid
+from station_snapshot import load_snapshot
+from validators import (
+    validate_devices_coordinates,
+    validate_link_station_grid,
+    validate_chunk_size,
+    validate_max_matrix_size,
+    validate_registry_document)
+
+# Assigns a (possibly very large) set of devices to their most suitable link station, and reports per link
+# station how many devices it would serve, with their total and mean power, together with the devices that no
+# link station reaches. The devices are streamed in chunks, so only the per link station totals are kept.
+
+DEFAULT_CHUNK_SIZE = 65536
+
+class FleetReport:
+    def __init__(self, link_station_grid):
+        count = len(link_station_grid.link_station_arrays[0])
+
+        self.link_station_grid = link_station_grid
+        self.device_counts = array('q', [0]) * count
+        self.total_powers = array('d', [0.0]) * count
+        self.devices = 0
+        self.unreached = 0
+
+    def add(self, devices_coordinates, assignments, report_unreached=None):
+        for device_coordinates, (index, power) in zip(devices_coordinates, assignments):
+            self.devices += 1
+
+            if index < 0:
+                self.unreached += 1
+
+                if report_unreached is not None:
+                    report_unreached(device_coordinates)
+            else:
+                self.device_counts[index] += 1
+                self.total_powers[index] += power
+
+    def iterate_link_stations(self):
+        # Every link station in its original order, including the ones that serve no device at all
+        for index, (x, y, reach) in enumerate(zip(*self.link_station_grid.link_station_arrays)):
+            device_count = self.device_counts[index]
+
+            yield {
+                "coordinates": {"x": x, "y": y},
+                "reach": reach,
+                "devices": device_count,
+                "totalPower": self.total_powers[index],
+                "meanPower": self.total_powers[index] / device_count if device_count else 0.0
+            }
+
+    def get_summary(self):
+        return {
+            "devices": self.devices,
+            "reached": self.devices - self.unreached,
+            "unreached": self.unreached,
+            "linkStations": len(self.device_counts),
+            "servingLinkStations": sum(1 for device_count in self.device_counts if device_count)
+        }
+
+def assign_devices(devices_coordinates, link_station_grid, link_station_numpy_arrays=None, max_matrix_size=MAX_MATRIX_SIZE):
+    # Validate devices coordinates
+    validate_devices_coordinates(devices_coordinates)
+
+    # Validate the link station grid and the maximum matrix size
+    validate_link_station_grid(link_station_grid)
+    validate_max_matrix_size(max_matrix_size)
+
+    # The link station arrays can be converted once for all chunks of devices
+    if link_station_numpy_arrays is None:
+        link_station_numpy_arrays = get_link_station_numpy_arrays(link_station_grid)
+
+    # The index of the most suitable link station (or -1) and its power, for every device; devices and link
+    # stations outside of the range of NumPy are scored by the scalar kernel
+    if link_station_numpy_arrays is None or not are_devices_within_numpy_range(devices_coordinates):
+        return [get_assignment(device_coordinates, link_station_grid, link_station_grid.query(device_coordinates)) for device_coordinates in devices_coordinates]
+
+    return assign_devices_with_numpy(devices_coordinates, link_station_grid, link_station_numpy_arrays, max_matrix_size)
+
+def get_link_station_numpy_arrays(link_station_grid):
+    if numpy is None:
+        return None
+
+    link_station_numpy_arrays = tuple(numpy.asarray(values, dtype=numpy.int64) for values in link_station_grid.link_station_arrays)
+
+    # Link stations that could overflow the int64 squares are scored by the scalar kernel
+    if not is_within_numpy_range(*link_station_numpy_arrays):
+        return None
+
+    return link_station_numpy_arrays
+
+def get_assignment(device_coordinates, link_station_grid, indices):
+    return get_most_suitable_link_station_index_scored(device_coordinates, link_station_grid.link_station_arrays, False, indices)
+
+def assign_devices_with_numpy(devices_coordinates, link_station_grid, link_station_numpy_arrays, max_matrix_size):
+    devices_cells = {}
+
+    # Group the devices by the grid cell they are in, as they share their candidate link stations
+    for position, device_coordinates in enumerate(devices_coordinates):
+        devices_cells.setdefault(link_station_grid.get_cell(device_coordinates), []).append(position)
+
+    assignments = [(-1, 0.0)] * len(devices_coordinates)
+    devices_array = numpy.array(devices_coordinates, dtype=numpy.int64)
+
+    # Pair every device with every link station of its cell, so the pairs are calculated at once, in chunks of
+    # at most the maximum matrix size. The pairs of a device are consecutive, and in the original order of the
+    # link stations, and they are never split over two chunks.
+    pair_positions = array('q')
+    pair_indices = array('q')
+
+    for positions in devices_cells.values():
+        indices = link_station_grid.query(devices_coordinates[positions[0]])
+
+        if not len(indices):
+            continue
+
+        # A device with more candidates than fit in a chunk is scored by the scalar kernel
+        if len(indices) > max_matrix_size:
+            for position in positions:
+                assignments[position] = get_assignment(devices_coordinates[position], link_station_grid, indices)
+
+            continue
+
+        for position in positions:
+            if len(pair_indices) + len(indices) > max_matrix_size:
+                assign_pairs(devices_coordinates, devices_array, link_station_grid, link_station_numpy_arrays, pair_positions, pair_indices, assignments)
+                pair_positions = array('q')
+                pair_indices = array('q')
+
+            pair_positions.extend(itertools.repeat(position, len(indices)))
+            pair_indices.extend(indices)
+
+    if pair_indices:
+        assign_pairs(devices_coordinates, devices_array, link_station_grid, link_station_numpy_arrays, pair_positions, pair_indices, assignments)
+
+    return assignments
+
+def assign_pairs(devices_coordinates, devices_array, link_station_grid, link_station_numpy_arrays, pair_positions, pair_indices, assignments):
+    link_stations_x, link_stations_y, link_stations_reach = link_station_numpy_arrays
+    pair_positions = numpy.frombuffer(pair_positions, dtype=numpy.int64)
+    pair_indices = numpy.frombuffer(pair_indices, dtype=numpy.int64)
+
+    # Calculate the squared distance of every pair, and the difference between reach and distance of the pairs
+    # within reach
+    distances_x = devices_array[pair_positions, 0] - link_stations_x[pair_indices]
+    distances_y = devices_array[pair_positions, 1] - link_stations_y[pair_indices]
+    (pairs,), differences, reaches = get_within_reach_differences(distances_x * distances_x + distances_y * distances_y, link_stations_reach[pair_indices])
+
+    # Every link station that could have the highest power of its device is a candidate, and the candidates are
+    # compared with the scalar kernel, so the results are exactly those of the regular scan
+    near = pairs[get_near_highest(pair_positions[pairs], differences, reaches, len(devices_coordinates))]
+    candidates = {}
+
+    for position, index in zip(pair_positions[near].tolist(), pair_indices[near].tolist()):
+        candidates.setdefault(position, []).append(index)
+
+    for position, indices in candidates.items():
+        assignments[position] = get_assignment(devices_coordinates[position], link_station_grid, indices)
+
+def build_fleet_report(devices_coordinates, link_station_grid, chunk_size=DEFAULT_CHUNK_SIZE, report_unreached=None, max_matrix_size=MAX_MATRIX_SIZE):
+    # Validate the chunk size
+    validate_chunk_size(chunk_size)
+
+    fleet_report = FleetReport(link_station_grid)
+    link_station_numpy_arrays = get_link_station_numpy_arrays(link_station_grid)
+    chunk = []
+
+    # Only a chunk of devices is kept in memory at once
+    for device_coordinates in devices_coordinates:
+        chunk.append(device_coordinates)
+
+        if len(chunk) == chunk_size:
+            fleet_report.add(chunk, assign_devices(chunk, link_station_grid, link_station_numpy_arrays, max_matrix_size), report_unreached)
+            chunk = []
+
+    if chunk:
+        fleet_report.add(chunk, assign_devices(chunk, link_station_grid, link_station_numpy_arrays, max_matrix_size), report_unreached)
+
+    return fleet_report
+
+def read_devices(devices_file):
+    # One device per line, in the same shape as the device of a request body
+    for line in devices_file:
+        if line.strip():
+            yield parse_body_device(json.loads(line))
+
+def load_link_station_grid(link_stations_path, cell_size=None):
+    # Either a binary snapshot, or a JSON document in the shape of a registry document
+    if link_stations_path.endswith(".snapshot"):
+        return load_snapshot(link_stations_path)
+
+    with open(link_stations_path) as document_file:
+        document = json.load(document_file)
+
+    validate_registry_document(document)
+
+    return LinkStationGrid.from_link_station_arrays(compile_body_link_stations(document['linkStations']), cell_size)
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Report how many devices every link station would serve")
+    parser.add_argument("devices", help="the JSONL file with one device per line, in the shape {\"coordinates\": {\"x\": 0, \"y\": 0}}, or - for stdin")
+    parser.add_argument("link_stations", help="the JSON document with the link stations, in the shape {\"linkStations\": [...]}, or a binary snapshot")
+    parser.add_argument("output", help="the JSONL file to write a line per link station to, or - for stdout")
+    parser.add_argument("--unreached", help="the JSONL file to write the devices that no link station reaches to")
+    parser.add_argument("--cell-size", type=int, default=None, help="the size of the grid cells of a JSON document, by default the largest reach")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="the number of devices assigned at once")
+    arguments = parser.parse_args(arguments)
+
+    link_station_grid = load_link_station_grid(arguments.link_stations, arguments.cell_size)
+    devices_file = sys.stdin if arguments.devices == "-" else open(arguments.devices)
+    unreached_file = open(arguments.unreached, "w") if arguments.unreached else None
+
+    def report_unreached(device_coordinates):
+        unreached_file.write(json.dumps({"coordinates": {"x": device_coordinates[0], "y": device_coordinates[1]}}))
+        unreached_file.write("\n")
+
+    try:
+        fleet_report = build_fleet_report(read_devices(devices_file), link_station_grid, arguments.chunk_size, report_unreached if unreached_file else None)
+    finally:
+        if devices_file is not sys.stdin:
+            devices_file.close()
+
+        if unreached_file is not None:
+            unreached_file.close()
+
+    output_file = sys.stdout if arguments.output == "-" else open(arguments.output, "w")
+
+    try:
+        for link_station in fleet_report.iterate_link_stations():
+            output_file.write(json.dumps(link_station))
+            output_file.write("\n")
+    finally:
+        if output_file is not sys.stdout:
+            output_file.close()
+
+    print(json.dumps(fleet_report.get_summary()), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import collections
+
+from scoring import (
+    score_link_station,
+    get_most_suitable_link_station_index_scored)
+from validators import (
+    validate_device_id,
+    validate_device_coordinates,
+    validate_link_station_grid,
+    validate_safe_radius,
+    validate_hysteresis,
+    validate_max_sessions)
+
+# Tracks the most suitable link station of moving devices. A full search around the position of a device
+# (the anchor) finds every link station that could reach any point within the safe radius of the anchor.
+# Every other link station is at least its reach away from such a point, so while the device stays within
+# the safe radius only these candidates have to be evaluated, and the result is still exactly the same as
+# that of a full scan. Only when the device leaves the safe region, a new full search is done around it.
+
+DEFAULT_MAX_SESSIONS = 100000
+
+class HandoverSession:
+    def __init__(self, anchor, indices):
+        self.anchor = anchor
+        self.indices = indices
+        self.serving_index = -1
+
+class HandoverTracker:
+    def __init__(self, link_station_grid, safe_radius=None, hysteresis=0.0, max_sessions=DEFAULT_MAX_SESSIONS):
+        # Validate the link station grid
+        validate_link_station_grid(link_station_grid)
+
+        # By default the safe region is a quarter of a grid cell, so a full search only looks at a few cells
+        if safe_radius is None:
+            safe_radius = max(link_station_grid.cell_size // 4, 1)
+
+        # Validate the safe radius, hysteresis and maximum number of sessions
+        validate_safe_radius(safe_radius)
+        validate_hysteresis(hysteresis)
+        validate_max_sessions(max_sessions)
+
+        self.link_station_grid = link_station_grid
+        self.safe_radius = safe_radius
+        self.hysteresis = hysteresis
+        self.max_sessions = max_sessions
+        self.sessions = collections.OrderedDict()
+        self.updates = 0
+        self.full_searches = 0
+        self.handovers = 0
+        self.suppressed_handovers = 0
+        self.evictions = 0
+
+    def update(self, device_id, device_coordinates):
+        # Validate the device id and coordinates
+        validate_device_id(device_id)
+        validate_device_coordinates(device_coordinates)
+
+        self.updates += 1
+        session = self.sessions.get(device_id)
+
+        if session is None or not self.is_in_safe_region(session, device_coordinates):
+            session = self.start_session(device_id, device_coordinates, session)
+        else:
+            self.sessions.move_to_end(device_id)
+
+        best_index, best_power = get_most_suitable_link_station_index_scored(device_coordinates, self.link_station_grid.link_station_arrays, False, session.indices)
+
+        # With hysteresis, the serving link station is kept while the best one isn't clearly better
+        if self.hysteresis and session.serving_index >= 0 and best_index != session.serving_index:
+            serving_power = self.get_power(device_coordinates, session.serving_index)
+
+            if serving_power > 0.0 and best_power <= serving_power * (1.0 + self.hysteresis):
+                self.suppressed_handovers += 1
+                best_index, best_power = session.serving_index, serving_power
+
+        if best_index != session.serving_index and session.serving_index >= 0:
+            self.handovers += 1
+
+        session.serving_index = best_index
+
+        if best_index < 0:
+            return (0, 0, 0.0)
+
+        link_stations_x, link_stations_y, _ = self.link_station_grid.link_station_arrays
+
+        return (link_stations_x[best_index], link_stations_y[best_index], best_power)
+
+    def end_session(self, device_id):
+        self.sessions.pop(device_id, None)
+
+    def is_in_safe_region(self, session, device_coordinates):
+        distance_x = device_coordinates[0] - session.anchor[0]
+        distance_y = device_coordinates[1] - session.anchor[1]
+
+        # An exact integer test, without a square root
+        return distance_x * distance_x + distance_y * distance_y <= self.safe_radius * self.safe_radius
+
+    def start_session(self, device_id, device_coordinates, previous_session):
+        self.full_searches += 1
+
+        session = HandoverSession(device_coordinates, self.get_candidate_indices(device_coordinates))
+
+        # The serving link station is kept when the device leaves its safe region
+        if previous_session is not None:
+            session.serving_index = previous_session.serving_index
+
+        self.sessions[device_id] = session
+        self.sessions.move_to_end(device_id)
+
+        # Evict the least recently updated sessions
+        while len(self.sessions) > self.max_sessions:
+            self.sessions.popitem(last=False)
+            self.evictions += 1
+
+        return session
+
+    def get_candidate_indices(self, anchor):
+        anchor_x, anchor_y = anchor
+        cell_size = self.link_station_grid.cell_size
+        link_stations_x, link_stations_y, link_stations_reach = self.link_station_grid.link_station_arrays
+        indices = set()
+
+        # Collect the link stations of every grid cell that overlaps with the bounding box of the safe region
+        for cell_x in range((anchor_x - self.safe_radius) // cell_size, (anchor_x + self.safe_radius) // cell_size + 1):
+            for cell_y in range((anchor_y - self.safe_radius) // cell_size, (anchor_y + self.safe_radius) // cell_size + 1):
+                indices.update(self.link_station_grid.query((cell_x * cell_size, cell_y * cell_size)))
+
+        candidate_indices = []
+
+        # Only the link stations closer to the anchor than their reach plus the safe radius can reach the safe
+        # region; they are kept in their original order, so ties are resolved like the regular scan
+        for index in sorted(indices):
+            distance_x = anchor_x - link_stations_x[index]
+            distance_y = anchor_y - link_stations_y[index]
+            limit = link_stations_reach[index] + self.safe_radius
+
+            if distance_x * distance_x + distance_y * distance_y < limit * limit:
+                candidate_indices.append(index)
+
+        return candidate_indices
+
+    def get_power(self, device_coordinates, index):
+        link_stations_x, link_stations_y, link_stations_reach = self.link_station_grid.link_station_arrays
+
+        # calculate power per link station
+        return score_link_station(device_coordinates[0] - link_stations_x[index], device_coordinates[1] - link_stations_y[index], link_stations_reach[index])
+
+    def get_statistics(self):
+        return {
+            "sessions": len(self.sessions),
+            "updates": self.updates,
+            "full_searches": self.full_searches,
+            "avoided_full_searches": self.updates - self.full_searches,
+            "handovers": self.handovers,
+            "suppressed_handovers": self.suppressed_handovers,
+            "evictions": self.evictions
+        }
@@ -1,6 +1,28 @@
+import heapq
 import json
 import math
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from body_parser import (
+    compile_body,
+    compile_batch_body,
+    compile_link_stations,
+    parse_body_device,
+    parse_body_ranking)
+from metrics import start_request_metrics
+from result_cache import (
+    get_result_cache,
+    get_link_station_fingerprint)
+from scoring import (
+    score_link_station,
+    get_most_suitable_link_station_scored_from_arrays,
+    get_most_suitable_link_stations_scored_from_arrays,
+    MAX_MATRIX_SIZE)
+from station_registry import get_link_station_registry
 from validators import (
     validate_most_suitable_link_station,
     validate_distance,
@@ -8,33 +30,248 @@ from validators import (
     validate_device_coordinates,
     validate_link_station_coordinates,
     validate_event,
-    validate_body,
-    validate_link_stations)
+    validate_body_link_station,
+    validate_link_stations,
+    validate_link_station_grid,
+    validate_devices_coordinates,
+    validate_max_matrix_size,
+    validate_top,
+    validate_min_power,
+    validate_registry_body)
 
 def lambda_handler(event, context):
+    # Only a sample of the requests is measured, the others have no metrics at all
+    request_metrics = start_request_metrics()
+
+    if request_metrics is not None:
+        request_metrics.start_counters(get_cache_counters())
+
     # Validate the incoming event
     validate_event(event)
 
-    # Parse and validate the body
-    parsed_body = parse_body(json.loads(event['body']))
+    body = json.loads(event['body'])
+
+    if request_metrics is not None:
+        request_metrics.mark("json_loads")
 
-    # Get the device coordinates and link stations
-    device_coordinates = parsed_body[0]
-    link_stations = parsed_body[1]
+    response_body = json.dumps(evaluate_body(body, request_metrics))
 
-    # Find the most suitable link station
-    most_suitable_link_station = get_most_suitable_link_station(device_coordinates, link_stations)
+    if request_metrics is not None:
+        request_metrics.mark("json_dumps")
+        record_cache_statistics(request_metrics)
+        request_metrics.emit()
 
     return {
         "statusCode": 200,
         "headers": {
             "Content-Type": "application/json"
         },
-        "body": json.dumps({
-            "finding": pretty_print_most_suitable_link_station(device_coordinates, most_suitable_link_station)
-        })
+        "body": response_body
+    }
+
+def evaluate_body(body, request_metrics=None):
+    # Without link stations in the request, the link stations of the registry are used (when it is configured).
+    # The registry is only set up for the requests that need it, so its configuration never affects inline requests.
+    if type(body) is dict and 'linkStations' not in body:
+        link_station_registry = get_link_station_registry()
+
+        if link_station_registry is not None:
+            return evaluate_registry_body(body, link_station_registry, request_metrics)
+
+    # A batch request locates many devices against the same link stations; any other body is a single request
+    if is_batch_body(body):
+        return evaluate_batch_body(body, request_metrics)
+
+    # Parse and validate the body in a single walk, including the optional ranking, before anything is scored
+    device_coordinates, link_station_arrays = compile_body(body)
+    ranking = parse_body_ranking(body)
+
+    if request_metrics is not None:
+        request_metrics.mark("parse_body")
+        request_metrics.set("mode", "single")
+        request_metrics.set("link_stations", len(link_station_arrays[0]))
+
+    # Find the most suitable link station, unless it is cached for this link station set
+    most_suitable_link_station = get_cached_most_suitable_link_stations(
+        [device_coordinates],
+        get_link_station_fingerprint(link_station_arrays),
+        "single",
+        lambda missing_devices_coordinates: [get_most_suitable_link_station_from_arrays(device_coordinates, link_station_arrays)])[0]
+
+    response_body = {
+        "finding": pretty_print_most_suitable_link_station(device_coordinates, most_suitable_link_station)
+    }
+
+    if request_metrics is not None:
+        request_metrics.mark("selection")
+
+    # Add the top link stations and/or the link stations above the minimum power, when requested
+    if ranking is not None:
+        response_body["linkStations"] = format_ranked_link_stations(
+            get_ranked_link_stations_from_arrays(device_coordinates, link_station_arrays, ranking[0], ranking[1]))
+
+        if request_metrics is not None:
+            request_metrics.mark("ranking")
+
+    return response_body
+
+def evaluate_batch_body(body, request_metrics=None):
+    # Parse and validate the batch body in a single walk, including the optional ranking, before anything is scored
+    devices_coordinates, link_station_arrays = compile_batch_body(body)
+    ranking = parse_body_ranking(body)
+
+    if request_metrics is not None:
+        request_metrics.mark("parse_body")
+        request_metrics.set("mode", "batch")
+        request_metrics.set("devices", len(devices_coordinates))
+        request_metrics.set("link_stations", len(link_station_arrays[0]))
+
+    # Find the most suitable link station for every device that isn't cached for this link station set
+    most_suitable_link_stations = get_cached_most_suitable_link_stations(
+        devices_coordinates,
+        get_link_station_fingerprint(link_station_arrays),
+        "batch",
+        lambda missing_devices_coordinates: get_most_suitable_link_stations_from_arrays(missing_devices_coordinates, link_station_arrays))
+
+    response_body = {
+        "findings": [
+            pretty_print_most_suitable_link_station(device_coordinates, most_suitable_link_station)
+            for device_coordinates, most_suitable_link_station in zip(devices_coordinates, most_suitable_link_stations)
+        ]
     }
 
+    if request_metrics is not None:
+        request_metrics.mark("selection")
+
+    # Add the top link stations and/or the link stations above the minimum power of every device, when requested
+    if ranking is not None:
+        response_body["linkStations"] = [
+            format_ranked_link_stations(get_ranked_link_stations_from_arrays(device_coordinates, link_station_arrays, ranking[0], ranking[1]))
+            for device_coordinates in devices_coordinates
+        ]
+
+        if request_metrics is not None:
+            request_metrics.mark("ranking")
+
+    return response_body
+
+def evaluate_registry_body(body, link_station_registry, request_metrics=None):
+    # Parse and validate the body, including the optional ranking, before the registry is used
+    devices_coordinates, registry_version = parse_registry_body(body)
+    ranking = parse_body_ranking(body)
+
+    if request_metrics is not None:
+        request_metrics.mark("parse_body")
+        request_metrics.set("mode", "registry")
+        request_metrics.set("devices", len(devices_coordinates))
+
+    # Get the prebuilt grid of the requested version, which is only loaded when the version changes. The grid is
+    # released again once the request is evaluated, so a newer version can't close it while it is used.
+    registry_loads = link_station_registry.loads
+    link_station_grid, fingerprint = link_station_registry.acquire(registry_version)
+
+    if request_metrics is not None:
+        request_metrics.set("registry_loads", link_station_registry.loads - registry_loads)
+
+    try:
+        findings, ranked_link_stations = evaluate_registry_grid(devices_coordinates, ranking, link_station_grid, fingerprint, link_station_registry, request_metrics)
+    finally:
+        link_station_registry.release(link_station_grid)
+
+    # Respond in the same shape as a single or batch request
+    if is_batch_body(body):
+        response_body = {"findings": findings}
+    else:
+        response_body = {"finding": findings[0]}
+
+        if ranked_link_stations is not None:
+            ranked_link_stations = ranked_link_stations[0]
+
+    if ranked_link_stations is not None:
+        response_body["linkStations"] = ranked_link_stations
+
+    return response_body
+
+def evaluate_registry_grid(devices_coordinates, ranking, link_station_grid, fingerprint, link_station_registry, request_metrics=None):
+    if request_metrics is not None:
+        request_metrics.mark("registry")
+        request_metrics.set("registry_version", link_station_registry.version)
+        request_metrics.set("link_stations", len(link_station_grid.link_station_arrays[0]))
+        request_metrics.set("grid_cells", len(link_station_grid.cells))
+
+    # Find the most suitable link station for every device that isn't cached for this version
+    most_suitable_link_stations = get_cached_most_suitable_link_stations(
+        devices_coordinates,
+        fingerprint,
+        "registry",
+        lambda missing_devices_coordinates: [get_most_suitable_link_station_indexed(device_coordinates, link_station_grid) for device_coordinates in missing_devices_coordinates])
+
+    findings = [
+        pretty_print_most_suitable_link_station(device_coordinates, most_suitable_link_station)
+        for device_coordinates, most_suitable_link_station in zip(devices_coordinates, most_suitable_link_stations)
+    ]
+
+    if request_metrics is not None:
+        request_metrics.mark("selection")
+
+    ranked_link_stations = None
+
+    # Rank the link stations that can reach the device, when requested
+    if ranking is not None:
+        ranked_link_stations = [
+            format_ranked_link_stations(get_ranked_link_stations_indexed(device_coordinates, link_station_grid, ranking[0], ranking[1]))
+            for device_coordinates in devices_coordinates
+        ]
+
+        if request_metrics is not None:
+            request_metrics.mark("ranking")
+
+    return findings, ranked_link_stations
+
+def is_batch_body(body):
+    # Only a list of devices makes a batch request, so a single request with an unrelated devices field
+    # is answered as before
+    return type(body) is dict and type(body.get('devices')) is list
+
+def record_cache_statistics(request_metrics):
+    result_cache = get_result_cache()
+
+    # The cache counters of this request, and the size of the cache of this container
+    if result_cache is not None:
+        request_metrics.set_counters(get_cache_counters())
+        request_metrics.set("cache_size", result_cache.get_statistics()["size"])
+
+def get_cache_counters():
+    result_cache = get_result_cache()
+
+    # The counters of the cache of this container, since it was started
+    if result_cache is None:
+        return {}
+
+    return {"cache_" + name: value for name, value in result_cache.get_statistics().items() if name != "size"}
+
+def get_cached_most_suitable_link_stations(devices_coordinates, fingerprint, mode, get_most_suitable_link_stations):
+    result_cache = get_result_cache()
+
+    # Without a cache, every device is calculated
+    if result_cache is None:
+        return get_most_suitable_link_stations(devices_coordinates)
+
+    # The results are keyed by the mode as well, so a result is only served to requests that calculate it the
+    # same way (the single, batch and registry modes each have their own path)
+    most_suitable_link_stations = [result_cache.get(fingerprint, (mode, device_coordinates)) for device_coordinates in devices_coordinates]
+    missing_indices = [index for index, most_suitable_link_station in enumerate(most_suitable_link_stations) if most_suitable_link_station is None]
+
+    # Only the devices that aren't cached yet are calculated, and their results are cached
+    if missing_indices:
+        missing_devices_coordinates = [devices_coordinates[index] for index in missing_indices]
+
+        for index, most_suitable_link_station in zip(missing_indices, get_most_suitable_link_stations(missing_devices_coordinates)):
+            most_suitable_link_stations[index] = most_suitable_link_station
+            result_cache.put(fingerprint, (mode, devices_coordinates[index]), most_suitable_link_station)
+
+    return most_suitable_link_stations
+
 def get_most_suitable_link_station(device_coordinates, link_stations):
     # Validate device coordinates
     validate_device_coordinates(device_coordinates)
@@ -42,21 +279,106 @@ def get_most_suitable_link_station(device_coordinates, link_stations):
     # Validate link stations
     validate_link_stations(link_stations)
 
-    # Set the default value for the most suitable link station
-    most_suitable_link_station = (0, 0, 0.0)
+    return get_most_suitable_link_station_from_arrays(device_coordinates, compile_link_stations(link_stations))
+
+def get_most_suitable_link_station_from_arrays(device_coordinates, link_station_arrays):
+    # The device coordinates and link station arrays are validated while parsing, so they are trusted here.
+    # The scoring kernel rejects the link stations out of reach before taking a square root, with the same results.
+    return get_most_suitable_link_station_scored_from_arrays(device_coordinates, link_station_arrays)
+
+def get_most_suitable_link_station_indexed(device_coordinates, link_station_grid):
+    # Validate device coordinates
+    validate_device_coordinates(device_coordinates)
+
+    # Validate the link station grid
+    validate_link_station_grid(link_station_grid)
+
+    # Only the link stations whose reach covers the device's cell are considered, in their original order
+    return get_most_suitable_link_station_scored_from_arrays(device_coordinates, link_station_grid.link_station_arrays, False, link_station_grid.query(device_coordinates))
+
+def get_ranked_link_stations(device_coordinates, link_stations, top=None, min_power=0.0):
+    # Validate device coordinates
+    validate_device_coordinates(device_coordinates)
+
+    # Validate link stations
+    validate_link_stations(link_stations)
+
+    # Validate the ranking
+    validate_top(top)
+    validate_min_power(min_power)
 
-    for link_station in link_stations:
-        # calculate device's distance
-        distance = get_distance_between_device_and_link_station(device_coordinates, (link_station[0], link_station[1]))
+    return get_ranked_link_stations_from_arrays(device_coordinates, compile_link_stations(link_stations), top, min_power)
+
+def get_ranked_link_stations_indexed(device_coordinates, link_station_grid, top=None, min_power=0.0):
+    # Validate device coordinates
+    validate_device_coordinates(device_coordinates)
 
-        # calculate power per link station
-        power = get_link_station_power(float(distance), float(link_station[2]))
+    # Validate the link station grid
+    validate_link_station_grid(link_station_grid)
 
-        # compare link stations based on power
-        if power > most_suitable_link_station[2]:
-            most_suitable_link_station = (link_station[0], link_station[1], power)
+    # Validate the ranking
+    validate_top(top)
+    validate_min_power(min_power)
 
-    return most_suitable_link_station
+    # Only the link stations whose reach covers the device's cell are ranked
+    return get_ranked_link_stations_from_arrays(
+        device_coordinates,
+        link_station_grid.link_station_arrays,
+        top,
+        min_power,
+        link_station_grid.query(device_coordinates))
+
+def get_ranked_link_stations_from_arrays(device_coordinates, link_station_arrays, top=None, min_power=0.0, indices=None):
+    link_stations_x, link_stations_y, link_stations_reach = link_station_arrays
+    device_x, device_y = device_coordinates
+
+    if indices is None:
+        indices = range(len(link_stations_x))
+
+    def iterate_link_station_powers():
+        for index in indices:
+            # calculate power per link station, without a square root for the link stations out of reach
+            power = score_link_station(device_x - link_stations_x[index], device_y - link_stations_y[index], link_stations_reach[index])
+
+            # Only the link stations above the minimum power are ranked (and never the ones without power)
+            if power > min_power:
+                yield power, index
+
+    # The highest power first; link stations with equal power keep their input order, like the regular scan
+    def ranking_key(link_station_power):
+        return -link_station_power[0], link_station_power[1]
+
+    if top is None:
+        # Only the link stations above the minimum power are sorted
+        ranked = sorted(iterate_link_station_powers(), key=ranking_key)
+    else:
+        # A heap bounded to the top link stations, instead of sorting all of them
+        ranked = heapq.nsmallest(top, iterate_link_station_powers(), key=ranking_key)
+
+    return [(link_stations_x[index], link_stations_y[index], power) for power, index in ranked]
+
+def format_ranked_link_stations(ranked_link_stations):
+    # Use the same format as the link stations in the request, with the power of each link station
+    return [
+        {"coordinates": {"x": link_station[0], "y": link_station[1]}, "power": link_station[2]}
+        for link_station in ranked_link_stations
+    ]
+
+def get_most_suitable_link_stations(devices_coordinates, link_stations, max_matrix_size=MAX_MATRIX_SIZE):
+    # Validate devices coordinates
+    validate_devices_coordinates(devices_coordinates)
+
+    # Validate link stations
+    validate_link_stations(link_stations)
+
+    # Validate the maximum matrix size
+    validate_max_matrix_size(max_matrix_size)
+
+    return get_most_suitable_link_stations_from_arrays(devices_coordinates, compile_link_stations(link_stations), max_matrix_size)
+
+def get_most_suitable_link_stations_from_arrays(devices_coordinates, link_station_arrays, max_matrix_size=MAX_MATRIX_SIZE):
+    # Scored in chunks with NumPy (when available), with exactly the same results as the regular scan
+    return get_most_suitable_link_stations_scored_from_arrays(devices_coordinates, link_station_arrays, False, max_matrix_size)
 
 def get_distance_between_device_and_link_station(device_coordinates, link_station_coordinates):
     # Validate device coordinates
@@ -65,10 +387,9 @@ def get_distance_between_device_and_link_station(device_coordinates, link_statio
     # Validate link station coordinates
     validate_link_station_coordinates(link_station_coordinates)
 
-    # Calculate the distance on the x and y axis
-    distance_x = abs(device_coordinates[0] - link_station_coordinates[0])
-    distance_y = abs(device_coordinates[1] - link_station_coordinates[1])
+    return calculate_distance(device_coordinates[0] - link_station_coordinates[0], device_coordinates[1] - link_station_coordinates[1])
 
+def calculate_distance(distance_x, distance_y):
     # Calculate the distance based on the Pythagoras theorem (assuming that the distance is a straight line)
     return math.sqrt(pow(distance_x, 2) + pow(distance_y, 2))
 
@@ -77,6 +398,9 @@ def get_link_station_power(distance, reach):
     validate_distance(distance)
     validate_reach(reach)
 
+    return calculate_link_station_power(distance, reach)
+
+def calculate_link_station_power(distance, reach):
     power = 0.0
 
     # Only calculate power when the reach is greater than the distance
@@ -108,20 +432,62 @@ def pretty_print_most_suitable_link_station(device_coordinates, most_suitable_li
     return pretty_response
 
 def parse_body(json_object):
-    # Validate that the request is complete and specified properly
-    validate_body(json_object)
+    if json_object is None or type(json_object) is not dict:
+        raise ValueError("Invalid body specified")
 
     # Get the device coordinates as a tuple (since the problem statement showed the device points as tuples)
-    device_coordinates = (json_object['device']['coordinates']['x'], json_object['device']['coordinates']['y'])
+    if 'device' not in json_object:
+        raise ValueError("Invalid device specified in the request")
+
+    device_coordinates = parse_body_device(json_object['device'])
+
+    if 'linkStations' not in json_object:
+        raise ValueError("No valid link stations list specified in the request")
+
+    return device_coordinates, parse_body_link_stations(json_object['linkStations'])
+
+def parse_batch_body(json_object):
+    if json_object is None or type(json_object) is not dict:
+        raise ValueError("Invalid body specified")
+
+    # Get the coordinates of every device as a tuple, in the order of the request
+    if 'devices' not in json_object or type(json_object['devices']) is not list or len(json_object['devices']) < 1:
+        raise ValueError("No valid devices list specified in the request")
+
+    devices_coordinates = [parse_body_device(device) for device in json_object['devices']]
+
+    if 'linkStations' not in json_object:
+        raise ValueError("No valid link stations list specified in the request")
+
+    return devices_coordinates, parse_body_link_stations(json_object['linkStations'])
+
+def parse_body_link_stations(json_link_stations):
+    if type(json_link_stations) is not list:
+        raise ValueError("No valid link stations list specified in the request")
 
     link_stations = []
 
-    # Get the link stations as a list (since the problem statement showed the link stations as lists)
-    for link_station in json_object['linkStations']:
+    # Get the link stations as a list (since the problem statement showed the link stations as lists),
+    # validating every link station while it is read
+    for link_station in json_link_stations:
+        validate_body_link_station(link_station)
+
         link_stations.append([
             link_station['coordinates']['x'],
             link_station['coordinates']['y'],
             link_station['reach']
         ])
 
-    return device_coordinates, link_stations
\ No newline at end of file
+    return link_stations
+
+def parse_registry_body(json_object):
+    # Validate that the registry request is complete and specified properly
+    validate_registry_body(json_object)
+
+    # Get the coordinates of the device, or of every device in the order of the request
+    if type(json_object.get('devices')) is list:
+        devices_coordinates = [(device['coordinates']['x'], device['coordinates']['y']) for device in json_object['devices']]
+    else:
+        devices_coordinates = [(json_object['device']['coordinates']['x'], json_object['device']['coordinates']['y'])]
+
+    return devices_coordinates, json_object.get('registryVersion')
\ No newline at end of file
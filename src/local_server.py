@@ -0,0 +1,286 @@
+import argparse
+import asyncio
+import concurrent.futures
+import http
+import json
+import os
+import sys
+import time
+import urllib.parse
+import uuid
+
+from lambda_function import lambda_handler
+from validators import (
+    validate_workers,
+    validate_port)
+
+# Serves lambda_handler over HTTP on a local machine, in the same way as the API Gateway stage in iac/main.tf:
+# a POST on the root resource is turned into an API Gateway proxy event, and the response of the function is
+# returned as is. Connections are kept alive and handled by asyncio, while the requests are evaluated by a
+# pool of worker processes, so many concurrent clients can be served without AWS or network access.
+
+# The stage of the API Gateway deployment
+STAGE = "v1"
+
+# The number of seconds an idle keep-alive connection stays open
+KEEP_ALIVE_TIMEOUT = 5.0
+
+# The number of seconds a client has to send the headers and the body, once the request line is received
+REQUEST_TIMEOUT = 30.0
+
+# The largest request body that is accepted, like the payload limit of Lambda
+MAX_BODY_SIZE = 6 * 1024 * 1024
+
+# The largest number of header lines that is accepted; the length of every line is limited by the stream reader
+MAX_HEADERS = 100
+
+# The responses of API Gateway itself, when the request doesn't reach the function or the function fails
+MISSING_AUTHENTICATION_TOKEN = {"statusCode": 403, "headers": {"Content-Type": "application/json"}, "body": json.dumps({"message": "Missing Authentication Token"})}
+INTERNAL_SERVER_ERROR = {"statusCode": 502, "headers": {"Content-Type": "application/json"}, "body": json.dumps({"message": "Internal server error"})}
+
+class BadRequest(Exception):
+    # A request that is answered with an error status by the server itself, and closes the connection
+    def __init__(self, status_code=400):
+        super().__init__(status_code)
+        self.status_code = status_code
+
+def create_api_gateway_event(method, target, headers, body, source_ip):
+    path, _, query = target.partition("?")
+    query_string_parameters = dict(urllib.parse.parse_qsl(query)) or None
+
+    # The shape of a REST API proxy integration event
+    return {
+        "resource": "/",
+        "path": path,
+        "httpMethod": method,
+        "headers": headers,
+        "multiValueHeaders": {name: [value] for name, value in headers.items()},
+        "queryStringParameters": query_string_parameters,
+        "multiValueQueryStringParameters": {name: [value] for name, value in query_string_parameters.items()} if query_string_parameters else None,
+        "pathParameters": None,
+        "stageVariables": None,
+        "requestContext": {
+            "resourcePath": "/",
+            "httpMethod": method,
+            "path": "/{}{}".format(STAGE, path),
+            "stage": STAGE,
+            "requestId": str(uuid.uuid4()),
+            "requestTimeEpoch": int(time.time() * 1000),
+            "identity": {"sourceIp": source_ip}
+        },
+        "body": body,
+        "isBase64Encoded": False
+    }
+
+def invoke_lambda_handler(event):
+    # Runs in a worker process
+    return lambda_handler(event, None)
+
+async def read_request(reader):
+    # An idle keep-alive connection only waits for the request line for a short time
+    try:
+        request_line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_TIMEOUT)
+    except ValueError:
+        # The request line is longer than the limit of the stream reader
+        raise BadRequest(414)
+
+    # The client closed the connection
+    if not request_line:
+        return None
+
+    try:
+        method, target, version = request_line.decode("latin-1").split()
+    except ValueError:
+        raise BadRequest()
+
+    # The rest of the request has its own, longer timeout, so large bodies can be sent over a slow connection
+    try:
+        headers, body, keep_alive = await asyncio.wait_for(read_request_headers_and_body(reader, version), REQUEST_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise BadRequest(408)
+
+    return method, target, headers, body, keep_alive
+
+async def read_request_headers_and_body(reader, version):
+    headers = {}
+
+    while True:
+        try:
+            line = await reader.readline()
+        except ValueError:
+            # A header line is longer than the limit of the stream reader
+            raise BadRequest(431)
+
+        if line in (b"\r\n", b"\n", b""):
+            break
+
+        if len(headers) >= MAX_HEADERS:
+            raise BadRequest(431)
+
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip()] = value.strip()
+
+    lower_headers = {name.lower(): value for name, value in headers.items()}
+
+    # Only bodies with a known length are supported, which is what every HTTP client sends for a JSON body
+    if "chunked" in lower_headers.get("transfer-encoding", "").lower():
+        raise BadRequest()
+
+    try:
+        content_length = int(lower_headers.get("content-length", 0))
+    except ValueError:
+        raise BadRequest()
+
+    if content_length < 0:
+        raise BadRequest()
+
+    if content_length > MAX_BODY_SIZE:
+        raise BadRequest(413)
+
+    body = (await reader.readexactly(content_length)).decode("utf-8", "replace") if content_length else None
+
+    # HTTP/1.1 connections are kept alive, unless the client asks otherwise
+    connection = lower_headers.get("connection", "").lower()
+    keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+
+    return headers, body, keep_alive
+
+def write_response(writer, response, keep_alive):
+    body = (response.get("body") or "").encode("utf-8")
+    status_code = response.get("statusCode", 200)
+
+    try:
+        reason = http.HTTPStatus(status_code).phrase
+    except ValueError:
+        reason = ""
+
+    lines = ["HTTP/1.1 {} {}".format(status_code, reason)]
+
+    for name, value in (response.get("headers") or {}).items():
+        lines.append("{}: {}".format(name, value))
+
+    lines.append("Content-Length: {}".format(len(body)))
+    lines.append("Connection: {}".format("keep-alive" if keep_alive else "close"))
+
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+
+def get_error_response(status_code):
+    return {"statusCode": status_code, "headers": {"Content-Type": "application/json"}, "body": json.dumps({"message": http.HTTPStatus(status_code).phrase})}
+
+class LocalServer:
+    def __init__(self, host="127.0.0.1", port=8080, workers=None):
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        # Validate the port and the number of workers
+        validate_port(port)
+        validate_workers(workers)
+
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.server = None
+        self.executor = None
+        self.connections = set()
+        self.requests = 0
+        self.errors = 0
+
+    async def start(self):
+        # A single worker runs in a thread of this process, which keeps the event loop responsive without
+        # starting a separate process
+        if self.workers == 1:
+            self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        else:
+            self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers)
+
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+
+        # With port 0 the operating system picks a free port
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        self.server.close()
+
+        # Idle keep-alive connections are closed as well
+        for connection in list(self.connections):
+            connection.cancel()
+
+        await asyncio.gather(*self.connections, return_exceptions=True)
+        await self.server.wait_closed()
+        self.executor.shutdown()
+
+    async def handle_connection(self, reader, writer):
+        source_ip = (writer.get_extra_info("peername") or ("127.0.0.1",))[0]
+        connection = asyncio.current_task()
+        self.connections.add(connection)
+
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except BadRequest as bad_request:
+                    write_response(writer, get_error_response(bad_request.status_code), False)
+                    await writer.drain()
+                    break
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+                    break
+
+                if request is None:
+                    break
+
+                method, target, headers, body, keep_alive = request
+
+                write_response(writer, await self.handle_request(method, target, headers, body, source_ip), keep_alive)
+                await writer.drain()
+
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            # The client went away, or the server is closed
+            pass
+        finally:
+            self.connections.discard(connection)
+            writer.close()
+
+    async def handle_request(self, method, target, headers, body, source_ip):
+        self.requests += 1
+
+        # The API only has a POST method on its root resource
+        if method != "POST" or target.partition("?")[0] != "/":
+            return MISSING_AUTHENTICATION_TOKEN
+
+        event = create_api_gateway_event(method, target, headers, body, source_ip)
+
+        # The selection is CPU bound, so it runs in the worker pool instead of the event loop
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, invoke_lambda_handler, event)
+        except Exception:
+            # Like API Gateway, a failed invocation results in a 502 response
+            self.errors += 1
+            return INTERNAL_SERVER_ERROR
+
+async def serve(host, port, workers):
+    local_server = LocalServer(host, port, workers)
+    await local_server.start()
+
+    print("Serving lambda_handler on http://{}:{}/ with {} workers".format(local_server.host, local_server.port, local_server.workers), file=sys.stderr)
+
+    try:
+        await local_server.server.serve_forever()
+    finally:
+        await local_server.close()
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Serve lambda_handler locally, like the API Gateway endpoint")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=None, help="the number of worker processes, by default the number of cores")
+    arguments = parser.parse_args(arguments)
+
+    try:
+        asyncio.run(serve(arguments.host, arguments.port, arguments.workers))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
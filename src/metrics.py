@@ -0,0 +1,104 @@
+import json
+import os
+import random
+import sys
+import time
+
+from validators import validate_sample_rate
+
+# The share of the requests for which metrics are emitted, between 0 (disabled) and 1 (every request)
+METRICS_SAMPLE_RATE_VARIABLE = "LINK_STATION_METRICS_SAMPLE_RATE"
+
+# The CloudWatch namespace of the metrics
+METRICS_NAMESPACE_VARIABLE = "LINK_STATION_METRICS_NAMESPACE"
+
+DEFAULT_METRICS_NAMESPACE = "LinkStation"
+
+# The sample rate of this container, which is read once
+metrics_sample_rate = None
+
+class RequestMetrics:
+    # Records the wall time of every phase of a single request, together with its properties, and emits them
+    # as one structured log line in the CloudWatch embedded metric format.
+    def __init__(self, namespace=DEFAULT_METRICS_NAMESPACE, clock=time.perf_counter):
+        self.namespace = namespace
+        self.clock = clock
+        self.phases = {}
+        self.properties = {}
+        self.started_counters = {}
+        self.started = clock()
+        self.phase_started = self.started
+
+    def mark(self, phase):
+        # The phase ended now, and the next phase starts
+        now = self.clock()
+        self.phases[phase] = self.phases.get(phase, 0.0) + (now - self.phase_started) * 1000
+        self.phase_started = now
+
+    def set(self, name, value):
+        self.properties[name] = value
+
+    def start_counters(self, counters):
+        # The counters of the process (such as the cache hits) when the request started
+        self.started_counters = dict(counters)
+
+    def set_counters(self, counters):
+        # Only the counts of this request are emitted, since CloudWatch sums the Count values of every request
+        for name, value in counters.items():
+            self.properties[name] = value - self.started_counters.get(name, 0)
+
+    def to_embedded_metric(self, timestamp=None):
+        if timestamp is None:
+            timestamp = int(time.time() * 1000)
+
+        metrics = [{"Name": phase, "Unit": "Milliseconds"} for phase in self.phases]
+        metrics.append({"Name": "total", "Unit": "Milliseconds"})
+
+        # Numeric properties (such as the link station count) are metrics as well, the others are only logged
+        for name, value in self.properties.items():
+            if type(value) in (int, float):
+                metrics.append({"Name": name, "Unit": "Count"})
+
+        embedded_metric = {
+            "_aws": {
+                "Timestamp": timestamp,
+                "CloudWatchMetrics": [{
+                    "Namespace": self.namespace,
+                    "Dimensions": [["mode"]],
+                    "Metrics": metrics
+                }]
+            },
+            "mode": self.properties.get("mode", "single"),
+            "total": (self.phase_started - self.started) * 1000
+        }
+
+        embedded_metric.update(self.phases)
+        embedded_metric.update(self.properties)
+
+        return embedded_metric
+
+    def emit(self, output=None):
+        # Lambda sends every line of the standard output to CloudWatch Logs, which extracts the metrics
+        print(json.dumps(self.to_embedded_metric()), file=output or sys.stdout)
+
+def get_metrics_sample_rate():
+    global metrics_sample_rate
+
+    if metrics_sample_rate is None:
+        sample_rate = float(os.environ.get(METRICS_SAMPLE_RATE_VARIABLE, 0.0))
+
+        # Validate the sample rate
+        validate_sample_rate(sample_rate)
+
+        metrics_sample_rate = sample_rate
+
+    return metrics_sample_rate
+
+def start_request_metrics():
+    sample_rate = get_metrics_sample_rate()
+
+    # Without sampling, no metrics are recorded at all
+    if sample_rate <= 0.0 or (sample_rate < 1.0 and random.random() >= sample_rate):
+        return None
+
+    return RequestMetrics(os.environ.get(METRICS_NAMESPACE_VARIABLE, DEFAULT_METRICS_NAMESPACE))
@@ -0,0 +1,134 @@
+import collections
+import hashlib
+import os
+import sys
+import threading
+import time
+
+from validators import (
+    validate_cache_size,
+    validate_cache_ttl)
+
+# The maximum number of results kept by the cache of this container. The cache is opt-in: without a size (or
+# with 0) it is disabled.
+CACHE_SIZE_VARIABLE = "LINK_STATION_CACHE_SIZE"
+
+# The number of seconds a result stays valid
+CACHE_TTL_VARIABLE = "LINK_STATION_CACHE_TTL"
+
+DEFAULT_CACHE_SIZE = 4096
+DEFAULT_CACHE_TTL = 300.0
+
+# The cache of this container, which is kept between warm invocations
+result_cache = None
+
+# The invalid cache configuration that was reported last, so it is only logged once
+invalid_cache_configuration = None
+
+class ResultCache:
+    # A least recently used cache of the most suitable link station per device. Every result is keyed by the
+    # fingerprint of its link station set, so the results of different sets (for example of the registry and of
+    # inline link stations) are kept side by side. Within a set, the key is the device coordinates, possibly
+    # together with the way the result was calculated.
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE, ttl=DEFAULT_CACHE_TTL, clock=time.monotonic):
+        # Validate the size and time to live
+        validate_cache_size(max_size)
+        validate_cache_ttl(ttl)
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        # The cache can be shared by threads, like the clients of an in-process replay
+        self.lock = threading.Lock()
+
+    def get(self, fingerprint, device_coordinates):
+        key = (fingerprint, device_coordinates)
+
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if entry is None or entry[0] <= self.clock():
+                if entry is not None:
+                    del self.entries[key]
+                    self.evictions += 1
+
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+
+        return entry[1]
+
+    def put(self, fingerprint, device_coordinates, most_suitable_link_station):
+        key = (fingerprint, device_coordinates)
+
+        with self.lock:
+            # The results of link station sets that are no longer used are evicted in time, like any other result
+            self.entries[key] = (self.clock() + self.ttl, most_suitable_link_station)
+            self.entries.move_to_end(key)
+
+            # Evict the least recently used results
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        with self.lock:
+            self.entries.clear()
+            self.invalidations += 1
+
+    def get_statistics(self):
+        with self.lock:
+            return {
+                "size": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+def get_result_cache():
+    global result_cache, invalid_cache_configuration
+
+    if result_cache is None:
+        configuration = (os.environ.get(CACHE_SIZE_VARIABLE, "0"), os.environ.get(CACHE_TTL_VARIABLE, str(DEFAULT_CACHE_TTL)))
+
+        try:
+            max_size = int(configuration[0])
+
+            # The cache is only used in containers where it is enabled
+            if max_size == 0:
+                return None
+
+            result_cache = ResultCache(max_size, float(configuration[1]))
+        except ValueError as error:
+            # An invalid configuration disables the cache instead of failing every request
+            if configuration != invalid_cache_configuration:
+                invalid_cache_configuration = configuration
+                print("Result cache disabled: {} ({}={!r}, {}={!r})".format(error, CACHE_SIZE_VARIABLE, configuration[0], CACHE_TTL_VARIABLE, configuration[1]), file=sys.stderr)
+
+            return None
+
+    return result_cache
+
+def get_link_station_fingerprint(link_station_arrays):
+    # A content hash of the x, y and reach arrays, which are hashed without copying them
+    fingerprint = hashlib.blake2b(digest_size=16)
+
+    for values in link_station_arrays:
+        fingerprint.update(len(values).to_bytes(8, "little"))
+
+        # Link stations with values outside of the 64 bit range are stored in lists
+        if type(values) is list:
+            fingerprint.update(b"list" + repr(values).encode())
+        else:
+            fingerprint.update(memoryview(values))
+
+    return fingerprint.hexdigest()
@@ -0,0 +1,319 @@
+import itertools
+import math
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from validators import (
+    validate_device_coordinates,
+    validate_devices_coordinates,
+    validate_link_stations,
+    validate_link_station_arrays,
+    validate_max_matrix_size,
+    validate_exact)
+
+# The power of a link station for a device, scored from integer coordinates. Most link stations are out of
+# reach, which is decided with an exact integer test (dx^2 + dy^2 >= reach^2) before any square root is taken.
+# For the link stations that pass, the power is calculated with the same float math as calculate_distance and
+# calculate_link_station_power, so the scores are exactly the same as those of the regular scan.
+#
+# In exact mode, link stations are compared on their exact power (reach - sqrt(dx^2 + dy^2))^2 with integer
+# arithmetic, instead of on the rounded float power. Link stations with a different power that round to the
+# same float (or to the wrong order) are then resolved correctly; exactly equal powers still go to the first one.
+
+# The difference reach - sqrt(dx^2 + dy^2) in floats is off by less than 2.5 units in the last place of the
+# reach (the rounding of dx^2 + dy^2, of the square root and of the subtraction). Every link station of which the
+# difference is within this share of its reach from the highest difference of a device could be the most
+# suitable one, and is compared again with the scalar kernel, in float or exact mode.
+DIFFERENCE_TOLERANCE = 2.0 ** -50
+
+# The maximum number of device x link station combinations calculated at once
+MAX_MATRIX_SIZE = 1 << 18
+
+# NumPy calculates dx^2 + dy^2 and reach^2 with int64, which can't overflow while every coordinate and reach is
+# within this range. Larger values are scored by the scalar kernel, on Python integers.
+MAX_NUMPY_VALUE = 1 << 30
+
+def is_within_numpy_range(*values_arrays):
+    return all(len(values) == 0 or (values.min() > -MAX_NUMPY_VALUE and values.max() < MAX_NUMPY_VALUE) for values in values_arrays)
+
+def are_devices_within_numpy_range(devices_coordinates):
+    return all(-MAX_NUMPY_VALUE < x < MAX_NUMPY_VALUE and -MAX_NUMPY_VALUE < y < MAX_NUMPY_VALUE for x, y in devices_coordinates)
+
+def score_link_station(distance_x, distance_y, reach):
+    distance_squared = distance_x * distance_x + distance_y * distance_y
+
+    # Reject the link stations out of reach without a square root
+    if reach <= 0 or distance_squared >= reach * reach:
+        return 0.0
+
+    # Very large values can still round to the reach, like they do in calculate_link_station_power
+    difference = reach - math.sqrt(distance_squared)
+
+    if difference > 0:
+        return pow(difference, 2)
+
+    return 0.0
+
+def compare_link_station_powers(distance_squared_a, reach_a, distance_squared_b, reach_b):
+    # The sign of power a - power b for two link stations within reach, which is the sign of
+    # (reach_a - sqrt(a)) - (reach_b - sqrt(b)) = difference + sqrt(b) - sqrt(a), calculated without rounding
+    difference = reach_a - reach_b
+
+    # difference + sqrt(b) isn't positive, while sqrt(a) isn't negative
+    if difference < 0 and distance_squared_b <= difference * difference:
+        if distance_squared_b == difference * difference and distance_squared_a == 0:
+            return 0
+
+        return -1
+
+    # Both sides aren't negative, so they compare like their squares: the sign of 2 * difference * sqrt(b) - rest
+    rest = distance_squared_a - difference * difference - distance_squared_b
+    root_squared = 4 * difference * difference * distance_squared_b
+
+    if difference >= 0:
+        if rest < 0:
+            return 1
+
+        return (root_squared > rest * rest) - (root_squared < rest * rest)
+
+    if rest > 0:
+        return -1
+
+    return (rest * rest > root_squared) - (rest * rest < root_squared)
+
+def get_most_suitable_link_station_scored(device_coordinates, link_stations, exact=False):
+    # Validate device coordinates
+    validate_device_coordinates(device_coordinates)
+
+    # Validate link stations
+    validate_link_stations(link_stations)
+
+    # Validate the exact mode
+    validate_exact(exact)
+
+    return get_most_suitable_link_station_scored_from_arrays(device_coordinates, tuple(zip(*link_stations)), exact)
+
+def get_most_suitable_link_station_scored_from_arrays(device_coordinates, link_station_arrays, exact=False, indices=None):
+    # The device coordinates and link station arrays are trusted here, like in get_most_suitable_link_station_from_arrays
+    index, power = get_most_suitable_link_station_index_scored(device_coordinates, link_station_arrays, exact, indices)
+
+    if index < 0:
+        return (0, 0, 0.0)
+
+    return (link_station_arrays[0][index], link_station_arrays[1][index], power)
+
+def get_most_suitable_link_station_index_scored(device_coordinates, link_station_arrays, exact=False, indices=None):
+    link_stations_x, link_stations_y, link_stations_reach = link_station_arrays
+
+    if indices is not None:
+        link_stations = ((index, link_stations_x[index], link_stations_y[index], link_stations_reach[index]) for index in indices)
+    else:
+        link_stations = zip(itertools.count(), link_stations_x, link_stations_y, link_stations_reach)
+
+    # The index of the most suitable link station, or -1 when no link station is within reach
+    link_station, power = select_most_suitable_link_station(device_coordinates, link_stations, exact)
+
+    return (link_station[0] if link_station is not None else -1), power
+
+def select_most_suitable_link_station(device_coordinates, link_stations, exact=False):
+    # The most suitable of the (key, x, y, reach) entries, in their order, or None when no link station is
+    # within reach, together with its power
+    device_x, device_y = device_coordinates
+    best_link_station = None
+    best_power = 0.0
+    best_distance_squared = 0
+    best_reach = 0
+
+    # The kernel of score_link_station is inlined, as a function call per link station costs more than the scoring
+    for link_station in link_stations:
+        _, x, y, reach = link_station
+        distance_x = device_x - x
+        distance_y = device_y - y
+        distance_squared = distance_x * distance_x + distance_y * distance_y
+
+        # Reject the link stations out of reach without a square root
+        if reach <= 0 or distance_squared >= reach * reach:
+            continue
+
+        difference = reach - math.sqrt(distance_squared)
+
+        if difference <= 0:
+            continue
+
+        power = pow(difference, 2)
+
+        # compare link stations based on power
+        if exact:
+            if best_link_station is not None and compare_link_station_powers(distance_squared, reach, best_distance_squared, best_reach) <= 0:
+                continue
+        elif power <= best_power:
+            continue
+
+        best_link_station = link_station
+        best_power = power
+        best_distance_squared = distance_squared
+        best_reach = reach
+
+    return best_link_station, best_power
+
+def get_within_reach_differences(distances_squared, link_stations_reach):
+    # Reject the combinations out of reach with an integer test, a link station without reach rejects every device
+    reaches_squared = numpy.where(link_stations_reach > 0, link_stations_reach * link_stations_reach, 0)
+    within_reach = numpy.nonzero(distances_squared < reaches_squared)
+
+    # Only the square roots of the (few) remaining combinations are taken. The power is the square of the
+    # difference, so the differences are compared instead; they are in the order of the combinations.
+    reaches = numpy.broadcast_to(link_stations_reach, distances_squared.shape)[within_reach].astype(numpy.float64)
+    differences = reaches - numpy.sqrt(distances_squared[within_reach].astype(numpy.float64))
+    positive = differences > 0.0
+
+    return tuple(indices[positive] for indices in within_reach), differences[positive], reaches[positive]
+
+def get_near_highest(points, differences, reaches, points_count):
+    # Whether every combination could have the highest difference of its point, within the float error
+    margins = reaches * DIFFERENCE_TOLERANCE
+    thresholds = numpy.full(points_count, -numpy.inf)
+    numpy.maximum.at(thresholds, points, differences - margins)
+
+    return differences + margins >= thresholds[points]
+
+def get_sparse_link_station_differences(devices_array, link_stations_x, link_stations_y, link_stations_reach, work=None):
+    shape = (len(devices_array), len(link_stations_x))
+    size = shape[0] * shape[1]
+
+    # Allocating large arrays for every chunk costs more than the calculation, so a work array can be reused
+    if work is None:
+        work = numpy.empty(2 * size, dtype=numpy.int64)
+
+    # Calculate the squared distance for every device and link station combination
+    distances_x = numpy.subtract(devices_array[:, 0:1], link_stations_x, out=work[:size].reshape(shape))
+    distances_y = numpy.subtract(devices_array[:, 1:2], link_stations_y, out=work[size:2 * size].reshape(shape))
+    distances_x *= distances_x
+    distances_y *= distances_y
+    distances_x += distances_y
+
+    (devices, positions), differences, reaches = get_within_reach_differences(distances_x, link_stations_reach)
+
+    return devices, positions, differences, reaches
+
+def get_most_suitable_link_station_positions(points_array, link_stations_x, link_stations_y, link_stations_reach, exact=False, max_matrix_size=MAX_MATRIX_SIZE, work=None):
+    # The position of the most suitable link station (or -1) and its power for every point
+    points_count = len(points_array)
+    positions = [-1] * points_count
+    best_powers = [0.0] * points_count
+
+    if points_count == 0 or len(link_stations_x) == 0:
+        return positions, best_powers
+
+    # Values that could overflow the int64 squares are scored by the scalar kernel
+    if not is_within_numpy_range(points_array, link_stations_x, link_stations_y, link_stations_reach):
+        return get_most_suitable_link_station_positions_without_numpy(points_array, link_stations_x, link_stations_y, link_stations_reach, exact)
+
+    # Split the points x link stations matrix in chunks of link stations, so the memory usage is bounded
+    chunk_size = max(max_matrix_size // points_count, 1)
+
+    # The work array of the squared distances is shared by all chunks
+    if work is None or len(work) < 2 * points_count * min(chunk_size, len(link_stations_x)):
+        work = numpy.empty(2 * points_count * min(chunk_size, len(link_stations_x)), dtype=numpy.int64)
+
+    def iterate_chunk_scores():
+        for start in range(0, len(link_stations_x), chunk_size):
+            yield (start,) + get_sparse_link_station_differences(
+                points_array,
+                link_stations_x[start:start + chunk_size],
+                link_stations_y[start:start + chunk_size],
+                link_stations_reach[start:start + chunk_size],
+                work)
+
+    # When all link stations fit in a single chunk, its scores are only calculated once
+    chunk_scores = list(iterate_chunk_scores()) if len(link_stations_x) <= chunk_size else None
+
+    # The lowest bound of the highest difference per point
+    thresholds = numpy.full(points_count, -numpy.inf)
+
+    for _, points, _, differences, reaches in chunk_scores or iterate_chunk_scores():
+        numpy.maximum.at(thresholds, points, differences - reaches * DIFFERENCE_TOLERANCE)
+
+    # Every link station that could have the highest difference is a candidate for the point, in input order
+    candidates = {}
+
+    for start, points, chunk_positions, differences, reaches in chunk_scores or iterate_chunk_scores():
+        near_highest = differences + reaches * DIFFERENCE_TOLERANCE >= thresholds[points]
+
+        for point, position in zip(points[near_highest].tolist(), chunk_positions[near_highest].tolist()):
+            candidates.setdefault(point, []).append(start + position)
+
+    points_x = points_array[:, 0].tolist()
+    points_y = points_array[:, 1].tolist()
+
+    # The candidates are compared with the scalar kernel (on Python integers, which can't overflow), so the
+    # results are exactly those of the regular scan
+    for point, point_positions in candidates.items():
+        candidate_arrays = tuple([int(values[position]) for position in point_positions] for values in (link_stations_x, link_stations_y, link_stations_reach))
+        candidate, power = get_most_suitable_link_station_index_scored((points_x[point], points_y[point]), candidate_arrays, exact)
+
+        if candidate >= 0:
+            positions[point] = point_positions[candidate]
+            best_powers[point] = power
+
+    return positions, best_powers
+
+def get_most_suitable_link_station_positions_without_numpy(points_array, link_stations_x, link_stations_y, link_stations_reach, exact=False):
+    # The same as get_most_suitable_link_station_positions, with the scalar kernel on Python integers
+    link_station_arrays = (link_stations_x.tolist(), link_stations_y.tolist(), link_stations_reach.tolist())
+    positions = []
+    best_powers = []
+
+    for point_coordinates in points_array.tolist():
+        position, power = get_most_suitable_link_station_index_scored(point_coordinates, link_station_arrays, exact)
+        positions.append(position)
+        best_powers.append(power)
+
+    return positions, best_powers
+
+def get_most_suitable_link_stations_scored(devices_coordinates, link_station_arrays, exact=False, max_matrix_size=MAX_MATRIX_SIZE):
+    # Validate devices coordinates
+    validate_devices_coordinates(devices_coordinates)
+
+    # Validate the link station arrays
+    validate_link_station_arrays(link_station_arrays)
+
+    # Validate the maximum matrix size
+    validate_max_matrix_size(max_matrix_size)
+
+    # Validate the exact mode
+    validate_exact(exact)
+
+    return get_most_suitable_link_stations_scored_from_arrays(devices_coordinates, link_station_arrays, exact, max_matrix_size)
+
+def get_most_suitable_link_stations_scored_from_arrays(devices_coordinates, link_station_arrays, exact=False, max_matrix_size=MAX_MATRIX_SIZE):
+    # Without NumPy, or with values that don't fit in int64 at all, every device is scored by the scalar kernel
+    if numpy is None or not are_devices_within_numpy_range(devices_coordinates):
+        return [get_most_suitable_link_station_scored_from_arrays(device_coordinates, link_station_arrays, exact) for device_coordinates in devices_coordinates]
+
+    try:
+        link_stations_x, link_stations_y, link_stations_reach = [numpy.asarray(values, dtype=numpy.int64) for values in link_station_arrays]
+    except OverflowError:
+        return [get_most_suitable_link_station_scored_from_arrays(device_coordinates, link_station_arrays, exact) for device_coordinates in devices_coordinates]
+
+    most_suitable_link_stations = []
+
+    # Split the devices in chunks, so a chunk of devices x a chunk of link stations fits the maximum matrix size,
+    # and the work array of that size is shared by all chunks
+    devices_chunk_size = max(max_matrix_size // max(len(link_stations_x), 1), 1)
+    work = numpy.empty(2 * max_matrix_size, dtype=numpy.int64)
+
+    for start in range(0, len(devices_coordinates), devices_chunk_size):
+        devices_chunk = devices_coordinates[start:start + devices_chunk_size]
+        positions, powers = get_most_suitable_link_station_positions(numpy.array(devices_chunk, dtype=numpy.int64), link_stations_x, link_stations_y, link_stations_reach, exact, max_matrix_size, work)
+
+        for position, power in zip(positions, powers):
+            if position < 0:
+                most_suitable_link_stations.append((0, 0, 0.0))
+            else:
+                most_suitable_link_stations.append((link_station_arrays[0][position], link_station_arrays[1][position], power))
+
+    return most_suitable_link_stations
@@ -0,0 +1,261 @@
+import concurrent.futures
+import math
+import os
+from array import array
+from multiprocessing import shared_memory
+
+from scoring import (
+    are_devices_within_numpy_range,
+    get_most_suitable_link_station_index_scored,
+    get_most_suitable_link_station_positions,
+    numpy)
+from validators import (
+    validate_link_station_arrays,
+    validate_link_station_arrays_range,
+    validate_devices_coordinates,
+    validate_workers,
+    validate_shards,
+    validate_chunk_size)
+
+# Evaluates batches of devices against a very large link station set on multiple cores. The link stations are
+# partitioned in rectangular areas (shards), and copied once into shared memory, in the layout:
+# - the x, y and reach of the link stations as int64 arrays, shard after shard
+# - the original index of every link station as an int64 array
+# Within a shard the link stations keep their original order. Every worker calculates the most suitable link
+# station of its shard for a chunk of devices, and the partial results are merged in the parent process.
+
+# The number of shards; every worker gets a few of them, so a slow shard doesn't keep the other workers waiting.
+# The more shards, the smaller the area of every shard, and the fewer devices every link station is compared with.
+DEFAULT_SHARDS = 64
+
+# The maximum number of devices sent to a worker at once
+DEFAULT_CHUNK_SIZE = 4096
+
+# The shared link stations of this worker process
+shared_link_stations = None
+
+def split(values, parts):
+    # Split the values in parts of (nearly) equal length, like numpy.array_split
+    size, remainder = divmod(len(values), parts)
+    start = 0
+
+    for part in range(parts):
+        end = start + size + (part < remainder)
+        yield values[start:end]
+        start = end
+
+class SharedLinkStations:
+    # Views on the link stations in shared memory, which are attached once per process
+    def __init__(self, name, count):
+        self.shared_memory = shared_memory.SharedMemory(name=name)
+        self.count = count
+
+        if numpy is not None:
+            self.values = numpy.frombuffer(self.shared_memory.buf, dtype=numpy.int64, count=count * 4).reshape(4, count)
+        else:
+            values = self.shared_memory.buf[:count * 32].cast('q')
+            self.values = [values[count * row:count * (row + 1)] for row in range(4)]
+
+    def close(self):
+        self.values = None
+        self.shared_memory.close()
+
+def attach_shared_link_stations(name, count):
+    global shared_link_stations
+
+    shared_link_stations = SharedLinkStations(name, count)
+
+def evaluate_shard(start, end, devices_coordinates, link_stations=None):
+    # Runs in a worker process, and returns the index (or -1) and power of the most suitable link station of
+    # the shard for every device
+    if link_stations is None:
+        link_stations = shared_link_stations
+
+    link_stations_x, link_stations_y, link_stations_reach, link_stations_index = [values[start:end] for values in link_stations.values]
+
+    # Devices that don't fit in the range of NumPy are scored by the scalar kernel
+    if numpy is not None and are_devices_within_numpy_range(devices_coordinates):
+        positions, powers = get_most_suitable_link_station_positions(
+            numpy.array(devices_coordinates, dtype=numpy.int64),
+            link_stations_x,
+            link_stations_y,
+            link_stations_reach)
+
+        return [int(link_stations_index[position]) if position >= 0 else -1 for position in positions], powers
+
+    indices = []
+    powers = []
+
+    for device_coordinates in devices_coordinates:
+        position, power = get_most_suitable_link_station_index_scored(device_coordinates, (link_stations_x, link_stations_y, link_stations_reach))
+        indices.append(link_stations_index[position] if position >= 0 else -1)
+        powers.append(power)
+
+    return indices, powers
+
+class ShardedEngine:
+    def __init__(self, link_station_arrays, workers=None, shards=DEFAULT_SHARDS, chunk_size=DEFAULT_CHUNK_SIZE):
+        # Validate the link station arrays, which are copied to 64 bit integers in shared memory
+        validate_link_station_arrays(link_station_arrays)
+        validate_link_station_arrays_range(link_station_arrays)
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        # Validate the pool settings
+        validate_workers(workers)
+        validate_shards(shards)
+        validate_chunk_size(chunk_size)
+
+        self.link_station_arrays = link_station_arrays
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.shards = []
+
+        count = len(link_station_arrays[0])
+        shard_indices = self.partition(link_station_arrays, min(shards, count))
+
+        # Copy the link stations, shard after shard, into shared memory
+        self.shared_memory = shared_memory.SharedMemory(create=True, size=count * 32)
+        start = 0
+
+        for indices in shard_indices:
+            self.shards.append((start, start + len(indices), self.get_bounding_box(link_station_arrays, indices)))
+            start += len(indices)
+
+        order = [index for indices in shard_indices for index in indices]
+
+        if numpy is not None:
+            values = numpy.frombuffer(self.shared_memory.buf, dtype=numpy.int64, count=count * 4).reshape(4, count)
+            order = numpy.array(order, dtype=numpy.int64)
+
+            for row, link_station_values in enumerate(link_station_arrays):
+                values[row] = numpy.asarray(link_station_values, dtype=numpy.int64)[order]
+
+            values[3] = order
+            del values
+        else:
+            values = self.shared_memory.buf.cast('q')
+
+            for row, link_station_values in enumerate(link_station_arrays):
+                values[count * row:count * (row + 1)] = array('q', [link_station_values[index] for index in order])
+
+            values[count * 3:count * 4] = array('q', order)
+            values.release()
+
+        # A single worker evaluates the shards in this process
+        if workers == 1:
+            self.executor = None
+            self.shared_link_stations = SharedLinkStations(self.shared_memory.name, count)
+        else:
+            self.executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=attach_shared_link_stations,
+                initargs=(self.shared_memory.name, count))
+
+    def partition(self, link_station_arrays, shards):
+        link_stations_x, link_stations_y, _ = link_station_arrays
+
+        # Split the link stations in columns on their x coordinate, and every column in rows on the y coordinate,
+        # with the same number of link stations per shard
+        columns = max(int(math.sqrt(shards)), 1)
+        rows = shards // columns
+
+        if numpy is not None:
+            link_stations_x = numpy.asarray(link_stations_x, dtype=numpy.int64)
+            link_stations_y = numpy.asarray(link_stations_y, dtype=numpy.int64)
+            shard_indices = []
+
+            for column in numpy.array_split(numpy.argsort(link_stations_x, kind="stable"), columns):
+                column = column[numpy.argsort(link_stations_y[column], kind="stable")]
+                shard_indices.extend(numpy.sort(indices).tolist() for indices in numpy.array_split(column, rows))
+
+            return shard_indices
+
+        shard_indices = []
+
+        for column in split(sorted(range(len(link_stations_x)), key=link_stations_x.__getitem__), columns):
+            shard_indices.extend(sorted(indices) for indices in split(sorted(column, key=link_stations_y.__getitem__), rows))
+
+        return shard_indices
+
+    def get_bounding_box(self, link_station_arrays, indices):
+        link_stations_x, link_stations_y, link_stations_reach = link_station_arrays
+        bounding_box = None
+
+        # The area in which the link stations of the shard can provide power; link stations without reach never do
+        for index in indices:
+            x, y, reach = link_stations_x[index], link_stations_y[index], link_stations_reach[index]
+
+            if reach <= 0:
+                continue
+
+            if bounding_box is None:
+                bounding_box = [x - reach, y - reach, x + reach, y + reach]
+            else:
+                bounding_box = [min(bounding_box[0], x - reach), min(bounding_box[1], y - reach), max(bounding_box[2], x + reach), max(bounding_box[3], y + reach)]
+
+        return bounding_box
+
+    def iterate_tasks(self, devices_coordinates):
+        for start, end, bounding_box in self.shards:
+            if bounding_box is None:
+                continue
+
+            min_x, min_y, max_x, max_y = bounding_box
+
+            # Only the devices within the bounding box of the shard can be reached by its link stations
+            positions = [
+                position for position, (x, y) in enumerate(devices_coordinates)
+                if min_x <= x <= max_x and min_y <= y <= max_y
+            ]
+
+            for chunk_start in range(0, len(positions), self.chunk_size):
+                chunk_positions = positions[chunk_start:chunk_start + self.chunk_size]
+                yield chunk_positions, (start, end, [devices_coordinates[position] for position in chunk_positions])
+
+    def get_most_suitable_link_stations(self, devices_coordinates):
+        # Validate devices coordinates
+        validate_devices_coordinates(devices_coordinates)
+
+        best_indices = [-1] * len(devices_coordinates)
+        best_powers = [0.0] * len(devices_coordinates)
+
+        def merge(positions, result):
+            # The partial results can arrive in any order, so ties are resolved by the lowest original index,
+            # which is the link station a regular scan with a strict power comparison would have chosen
+            for position, index, power in zip(positions, *result):
+                if power > best_powers[position] or (power == best_powers[position] and 0 <= index < best_indices[position]):
+                    best_indices[position] = index
+                    best_powers[position] = power
+
+        if self.executor is None:
+            for positions, task in self.iterate_tasks(devices_coordinates):
+                merge(positions, evaluate_shard(*task, self.shared_link_stations))
+        else:
+            futures = {self.executor.submit(evaluate_shard, *task): positions for positions, task in self.iterate_tasks(devices_coordinates)}
+
+            for future in concurrent.futures.as_completed(futures):
+                merge(futures[future], future.result())
+
+        link_stations_x, link_stations_y, _ = self.link_station_arrays
+
+        return [
+            (link_stations_x[index], link_stations_y[index], power) if index >= 0 else (0, 0, 0.0)
+            for index, power in zip(best_indices, best_powers)
+        ]
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+        else:
+            self.shared_link_stations.close()
+
+        self.shared_memory.close()
+        self.shared_memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
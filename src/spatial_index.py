@@ -0,0 +1,66 @@
+from body_parser import compile_link_stations
+from validators import (
+    validate_device_coordinates,
+    validate_link_stations,
+    validate_link_station_arrays,
+    validate_cell_size)
+
+class LinkStationGrid:
+    # A uniform grid over the link stations. Every link station is registered in each cell that its
+    # reach circle touches, so a device only has to look at the link stations of the cell it is in.
+    def __init__(self, link_stations, cell_size=None):
+        # Validate link stations
+        validate_link_stations(link_stations)
+
+        self.build(compile_link_stations(link_stations), cell_size)
+
+    @classmethod
+    def from_link_station_arrays(cls, link_station_arrays, cell_size=None):
+        # Validate the link station arrays
+        validate_link_station_arrays(link_station_arrays)
+
+        link_station_grid = cls.__new__(cls)
+        link_station_grid.build(link_station_arrays, cell_size)
+
+        return link_station_grid
+
+    def build(self, link_station_arrays, cell_size):
+        # By default the cells are as large as the largest reach, so every link station touches at most 9 cells
+        if cell_size is None:
+            cell_size = max(max(link_station_arrays[2]), 1)
+
+        # Validate the cell size
+        validate_cell_size(cell_size)
+
+        self.link_station_arrays = link_station_arrays
+        self.cell_size = cell_size
+        self.cells = {}
+
+        for index, (x, y, reach) in enumerate(zip(*link_station_arrays)):
+            # A link station without reach can never provide power, so it doesn't have to be registered
+            if reach <= 0:
+                continue
+
+            self.insert(index, x, y, reach)
+
+    def insert(self, index, x, y, reach):
+        # Determine the cells covered by the bounding box of the link station's reach circle
+        min_cell_x = (x - reach) // self.cell_size
+        max_cell_x = (x + reach) // self.cell_size
+        min_cell_y = (y - reach) // self.cell_size
+        max_cell_y = (y + reach) // self.cell_size
+
+        for cell_x in range(min_cell_x, max_cell_x + 1):
+            for cell_y in range(min_cell_y, max_cell_y + 1):
+                # The link stations are inserted in order, so every cell keeps its indices sorted
+                self.cells.setdefault((cell_x, cell_y), []).append(index)
+
+    def get_cell(self, device_coordinates):
+        return (device_coordinates[0] // self.cell_size, device_coordinates[1] // self.cell_size)
+
+    def query(self, device_coordinates):
+        # Validate device coordinates
+        validate_device_coordinates(device_coordinates)
+
+        # Return the indices of the link stations that could reach the device, in their original order
+        return self.cells.get(self.get_cell(device_coordinates), [])
@@ -0,0 +1,153 @@
+import json
+import os
+import threading
+
+from body_parser import compile_body_link_stations
+from result_cache import get_link_station_fingerprint
+from spatial_index import LinkStationGrid
+from station_snapshot import load_snapshot
+from validators import (
+    validate_registry_source,
+    validate_registry_version,
+    validate_registry_document)
+
+# The location of the versioned link station documents, either a local directory or an s3://bucket/prefix
+REGISTRY_SOURCE_VARIABLE = "LINK_STATION_REGISTRY_SOURCE"
+
+# The version that is used when a request doesn't specify one
+REGISTRY_VERSION_VARIABLE = "LINK_STATION_REGISTRY_VERSION"
+
+# The registry of this container, which is kept between warm invocations
+link_station_registry = None
+
+class LinkStationRegistry:
+    # Keeps one version of the link stations, with their prebuilt search structures, in memory.
+    # The link stations are only loaded again when a different version is requested.
+    def __init__(self, source, default_version):
+        # Validate the source and the default version
+        validate_registry_source(source)
+        validate_registry_version(default_version)
+
+        self.source = source
+        self.default_version = default_version
+        self.version = None
+        self.link_station_arrays = None
+        self.link_station_grid = None
+        self.fingerprint = None
+        self.loads = 0
+        self.lock = threading.Lock()
+
+    def get(self, version=None):
+        if version is None:
+            version = self.default_version
+
+        # Validate the version
+        validate_registry_version(version)
+
+        if version != self.version:
+            self.load(version)
+
+        return self.link_station_grid
+
+    def acquire(self, version=None):
+        # Get the grid of the version together with its fingerprint, and keep it usable (a snapshot isn't unmapped)
+        # until it is released, also when another reader loads a different version in the meantime
+        with self.lock:
+            link_station_grid = self.get(version)
+            fingerprint = self.fingerprint
+
+            if hasattr(link_station_grid, "acquire"):
+                link_station_grid.acquire()
+
+        return link_station_grid, fingerprint
+
+    def release(self, link_station_grid):
+        if hasattr(link_station_grid, "release"):
+            link_station_grid.release()
+
+    def load(self, version):
+        # A snapshot built at packaging time is memory-mapped instead of parsing the document
+        snapshot_path = get_local_snapshot_path(self.source, version)
+
+        if snapshot_path is not None:
+            link_station_snapshot = load_snapshot(snapshot_path)
+
+            self.replace(link_station_snapshot, link_station_snapshot.link_station_arrays, version)
+            return
+
+        document = load_registry_document(self.source, version)
+
+        # Validate that the document is complete and specified properly
+        validate_registry_document(document)
+
+        # Parse and validate the link stations in the same way as the request body
+        link_station_arrays = compile_body_link_stations(document['linkStations'])
+
+        # Only replace the current version once the new one is completely built
+        self.replace(LinkStationGrid.from_link_station_arrays(link_station_arrays), link_station_arrays, version)
+
+    def replace(self, link_station_grid, link_station_arrays, version):
+        previous_link_station_grid = self.link_station_grid
+
+        self.link_station_grid = link_station_grid
+        self.link_station_arrays = link_station_arrays
+        self.fingerprint = get_link_station_fingerprint(link_station_arrays)
+        self.version = version
+        self.loads += 1
+
+        # A snapshot keeps its file mapped until it is closed, and until its last reader releases it
+        if hasattr(previous_link_station_grid, "close"):
+            previous_link_station_grid.close()
+
+def get_link_station_registry():
+    global link_station_registry
+
+    # The registry is only available when a source is configured for this container
+    if link_station_registry is None and os.environ.get(REGISTRY_SOURCE_VARIABLE):
+        link_station_registry = LinkStationRegistry(
+            os.environ[REGISTRY_SOURCE_VARIABLE],
+            os.environ.get(REGISTRY_VERSION_VARIABLE, "latest"))
+
+    return link_station_registry
+
+def get_local_snapshot_path(source, version):
+    if source.startswith("s3://"):
+        return None
+
+    snapshot_path = os.path.join(source, "{}.snapshot".format(version))
+
+    return snapshot_path if os.path.exists(snapshot_path) else None
+
+def load_registry_document(source, version):
+    # Every version is stored as a separate document named after the version
+    if source.startswith("s3://"):
+        return load_s3_registry_document(source, version)
+
+    return load_local_registry_document(source, version)
+
+def load_local_registry_document(source, version):
+    document_path = os.path.join(source, "{}.json".format(version))
+
+    if not os.path.exists(document_path):
+        raise ValueError("Unknown registry version specified")
+
+    with open(document_path) as document_file:
+        return json.load(document_file)
+
+def load_s3_registry_document(source, version):
+    # boto3 is available in the Lambda runtime, but not required for local use
+    import boto3
+    from botocore.exceptions import ClientError
+
+    bucket, _, prefix = source[len("s3://"):].partition("/")
+
+    try:
+        response = boto3.client("s3").get_object(Bucket=bucket, Key="{}{}.json".format(prefix, version))
+    except ClientError as error:
+        # A missing document is an unknown version, like for a local directory
+        if error.response.get('Error', {}).get('Code') in ("NoSuchKey", "404"):
+            raise ValueError("Unknown registry version specified")
+
+        raise
+
+    return json.loads(response['Body'].read())
@@ -0,0 +1,199 @@
+import argparse
+import bisect
+import json
+import mmap
+import struct
+import sys
+import threading
+from array import array
+
+from body_parser import compile_body_link_stations
+from spatial_index import LinkStationGrid
+from validators import (
+    validate_device_coordinates,
+    validate_registry_document,
+    validate_snapshot_header,
+    validate_snapshot_link_station_arrays)
+
+# A compact binary snapshot of a link station set and its grid, which is built at packaging time and
+# memory-mapped at runtime. The link stations are queried straight from the mapped file, without creating
+# any Python objects per link station. The values are stored in the byte order of the (little-endian) machine:
+# - the header: magic, link station count, cell size, cell count and index count
+# - the x, y and reach of the link stations as int32 arrays
+# - the grid: the sorted cell keys (uint64), the offset of every cell in the indices (uint32) and the
+#   indices of the link stations per cell (uint32)
+
+SNAPSHOT_MAGIC = b"LSSNAP01"
+SNAPSHOT_HEADER = struct.Struct("<8sQqQQ")
+
+# Cell coordinates are stored as one key, with both coordinates shifted to unsigned 32 bit values
+CELL_OFFSET = 1 << 31
+
+def get_cell_key(cell_x, cell_y):
+    return ((cell_x + CELL_OFFSET) << 32) | (cell_y + CELL_OFFSET)
+
+def align(offset, size):
+    return (offset + size - 1) // size * size
+
+class LinkStationSnapshot:
+    # A memory-mapped snapshot, which can be used everywhere a LinkStationGrid can be used
+    def __init__(self, buffer):
+        view = memoryview(buffer)
+
+        # Validate the header
+        magic, count, cell_size, cell_count, index_count = SNAPSHOT_HEADER.unpack_from(view)
+        validate_snapshot_header(magic, SNAPSHOT_MAGIC, len(view), get_snapshot_size(count, cell_count, index_count), cell_size)
+
+        self.buffer = buffer
+        self.view = view
+        self.cell_size = cell_size
+
+        # The number of readers that use the snapshot; a closed snapshot is only unmapped after the last one
+        self.lock = threading.Lock()
+        self.readers = 0
+        self.closing = False
+
+        offset = SNAPSHOT_HEADER.size
+        link_station_arrays = []
+
+        # The arrays are views on the mapped file, nothing is copied
+        for _ in range(3):
+            link_station_arrays.append(view[offset:offset + count * 4].cast('i'))
+            offset += count * 4
+
+        self.link_station_arrays = tuple(link_station_arrays)
+
+        offset = align(offset, 8)
+        self.cells = view[offset:offset + cell_count * 8].cast('Q')
+        offset += cell_count * 8
+
+        self.cell_offsets = view[offset:offset + (cell_count + 1) * 4].cast('I')
+        offset += (cell_count + 1) * 4
+
+        self.indices = view[offset:offset + index_count * 4].cast('I')
+
+    def get_cell(self, device_coordinates):
+        return (device_coordinates[0] // self.cell_size, device_coordinates[1] // self.cell_size)
+
+    def query(self, device_coordinates):
+        # Validate device coordinates
+        validate_device_coordinates(device_coordinates)
+
+        cell_x, cell_y = self.get_cell(device_coordinates)
+
+        # A device outside of the range of the stored cells can't be reached by any link station
+        if not -CELL_OFFSET <= cell_x < CELL_OFFSET or not -CELL_OFFSET <= cell_y < CELL_OFFSET:
+            return ()
+
+        # Find the cell with a binary search over the sorted cell keys
+        cell_key = get_cell_key(cell_x, cell_y)
+        position = bisect.bisect_left(self.cells, cell_key)
+
+        if position == len(self.cells) or self.cells[position] != cell_key:
+            return ()
+
+        # Return the indices of the link stations that could reach the device, in their original order
+        return self.indices[self.cell_offsets[position]:self.cell_offsets[position + 1]]
+
+    def acquire(self):
+        with self.lock:
+            if self.closing:
+                raise ValueError("Closed link station snapshot specified")
+
+            self.readers += 1
+
+        return self
+
+    def release(self):
+        with self.lock:
+            self.readers -= 1
+            unmap = self.closing and self.readers == 0
+
+        if unmap:
+            self.unmap()
+
+    def close(self):
+        # The snapshot is unmapped now, or when the last reader releases it. Closing it again retries to unmap it.
+        with self.lock:
+            unmap = self.readers == 0
+            self.closing = True
+
+        if unmap:
+            self.unmap()
+
+    def unmap(self):
+        try:
+            # Release the views before the mapping itself
+            for values in self.link_station_arrays + (self.cells, self.cell_offsets, self.indices, self.view):
+                values.release()
+
+            if isinstance(self.buffer, mmap.mmap):
+                self.buffer.close()
+        except BufferError:
+            # A view on the snapshot is still used outside of a reader (for example a NumPy array of it), so the
+            # mapping is left to be closed when the last view is garbage collected, or by closing it again
+            pass
+
+def get_snapshot_size(count, cell_count, index_count):
+    return align(SNAPSHOT_HEADER.size + count * 12, 8) + cell_count * 8 + (cell_count + 1) * 4 + index_count * 4
+
+def build_snapshot(link_station_arrays, cell_size=None):
+    # Validate that the link stations fit in the int32 arrays of the snapshot
+    validate_snapshot_link_station_arrays(link_station_arrays)
+
+    link_station_grid = LinkStationGrid.from_link_station_arrays(link_station_arrays, cell_size)
+    count = len(link_station_arrays[0])
+
+    cell_keys = array('Q')
+    cell_offsets = array('I', [0])
+    indices = array('I')
+
+    # Store the cells sorted by their key, so they can be found with a binary search
+    for cell_key, cell in sorted((get_cell_key(cell_x, cell_y), cell) for (cell_x, cell_y), cell in link_station_grid.cells.items()):
+        cell_keys.append(cell_key)
+        indices.extend(cell)
+        cell_offsets.append(len(indices))
+
+    parts = [SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, count, link_station_grid.cell_size, len(cell_keys), len(indices))]
+
+    for values in link_station_arrays:
+        parts.append(array('i', values))
+
+    # The cell keys are aligned to 8 bytes
+    header_and_link_stations_size = SNAPSHOT_HEADER.size + count * 12
+    parts.append(bytes(align(header_and_link_stations_size, 8) - header_and_link_stations_size))
+    parts.extend([cell_keys, cell_offsets, indices])
+
+    return b"".join(part if isinstance(part, bytes) else part.tobytes() for part in parts)
+
+def write_snapshot(document_path, snapshot_path, cell_size=None):
+    with open(document_path) as document_file:
+        document = json.load(document_file)
+
+    # Validate the document in the same way as a registry document
+    validate_registry_document(document)
+
+    snapshot = build_snapshot(compile_body_link_stations(document['linkStations']), cell_size)
+
+    with open(snapshot_path, "wb") as snapshot_file:
+        snapshot_file.write(snapshot)
+
+    return len(snapshot)
+
+def load_snapshot(snapshot_path):
+    # Map the snapshot read-only; the pages are only read from disk when they are used
+    with open(snapshot_path, "rb") as snapshot_file:
+        return LinkStationSnapshot(mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ))
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Build a binary link station snapshot from a registry document")
+    parser.add_argument("document", help="the JSON document with the link stations, in the shape {\"linkStations\": [...]}")
+    parser.add_argument("snapshot", help="the snapshot file to write")
+    parser.add_argument("--cell-size", type=int, default=None, help="the size of the grid cells, by default the largest reach")
+    arguments = parser.parse_args(arguments)
+
+    size = write_snapshot(arguments.document, arguments.snapshot, arguments.cell_size)
+    print("Wrote {} bytes to {}".format(size, arguments.snapshot), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
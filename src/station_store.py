@@ -0,0 +1,285 @@
+import bisect
+import heapq
+import threading
+import uuid
+
+from scoring import select_most_suitable_link_station
+from validators import (
+    validate_device_coordinates,
+    validate_link_stations,
+    validate_link_station_id,
+    validate_link_station_reach,
+    validate_cell_size)
+
+# The cells are grouped in pages of 16 x 16 cells, so an update only copies the pages it changes
+PAGE_BITS = 4
+
+# The pages are kept in a trie of 4 levels on the hash of their key, so an update only copies the (at most 256
+# slot) nodes on the path to the pages it changes, however many pages there are
+PAGE_TABLE_BITS = 8
+PAGE_TABLE_SHIFTS = [0, 8, 16, 24]
+
+# A link station with a reach that covers more cells than this isn't registered in the cells, but kept apart
+# and considered for every device
+MAX_LINK_STATION_CELLS = 64
+
+# The version and entries of a cell without link stations
+EMPTY_CELL = (0, ())
+
+# The key of the link stations that are kept apart, among the changed cells of an update
+WIDE_CELL = None
+
+def get_page(cell):
+    return (cell[0] >> PAGE_BITS, cell[1] >> PAGE_BITS)
+
+def get_page_table_slots(page_key):
+    page_hash = hash(page_key)
+    return [(page_hash >> shift) & ((1 << PAGE_TABLE_BITS) - 1) for shift in PAGE_TABLE_SHIFTS]
+
+def get_page_table_page(page_table, page_key):
+    node = page_table
+
+    for slot in get_page_table_slots(page_key):
+        node = node.get(slot)
+
+        if node is None:
+            return None
+
+    return node.get(page_key)
+
+def update_page_table(page_table, changed_pages):
+    page_table = dict(page_table)
+    copied_nodes = {id(page_table)}
+
+    for page_key, page in changed_pages.items():
+        node = page_table
+        path = []
+
+        # Copy every node on the path once; the other nodes are shared with the previous version
+        for slot in get_page_table_slots(page_key):
+            child = node.get(slot)
+
+            if child is None or id(child) not in copied_nodes:
+                child = dict(child) if child is not None else {}
+                copied_nodes.add(id(child))
+                node[slot] = child
+
+            path.append((node, slot))
+            node = child
+
+        if page:
+            node[page_key] = page
+        else:
+            node.pop(page_key, None)
+
+            # Remove the nodes that became empty, so the trie shrinks with the store
+            for parent, slot in reversed(path):
+                if parent[slot]:
+                    break
+
+                del parent[slot]
+
+    return page_table
+
+class LinkStationStoreSnapshot:
+    # An immutable version of the store. Every cell holds the version of the snapshot that last changed it,
+    # together with a tuple of (id, x, y, reach) entries sorted by id, so the link stations keep the order in
+    # which they were added. The link stations that cover too many cells are kept in one tuple sorted by id.
+    def __init__(self, pages, wide_link_stations, wide_version, cell_size, count, version):
+        self.pages = pages
+        self.wide_link_stations = wide_link_stations
+        self.wide_version = wide_version
+        self.cell_size = cell_size
+        self.count = count
+        self.version = version
+
+    def get_cell(self, device_coordinates):
+        return (device_coordinates[0] // self.cell_size, device_coordinates[1] // self.cell_size)
+
+    def get_cell_state(self, device_coordinates):
+        cell = self.get_cell(device_coordinates)
+        page = get_page_table_page(self.pages, get_page(cell))
+
+        return page.get(cell, EMPTY_CELL) if page is not None else EMPTY_CELL
+
+    def query(self, device_coordinates):
+        # Validate device coordinates
+        validate_device_coordinates(device_coordinates)
+
+        entries = self.get_cell_state(device_coordinates)[1]
+
+        # Return the link stations that could reach the device, in the order they were added
+        if self.wide_link_stations:
+            return tuple(heapq.merge(entries, self.wide_link_stations))
+
+        return entries
+
+    def get_version(self, device_coordinates):
+        # The versions of the changes that could affect the device; a cell that was never changed (or that was
+        # emptied) has the version of the empty store
+        return (self.get_cell_state(device_coordinates)[0], self.wide_version)
+
+class LinkStationStore:
+    # A mutable set of link stations with a grid that is updated incrementally. Every change publishes a new
+    # snapshot, which only copies the changed cells and pages, so queries always see one consistent version.
+    def __init__(self, link_stations=None, cell_size=1000, result_cache=None):
+        # Validate the cell size
+        validate_cell_size(cell_size)
+
+        self.cell_size = cell_size
+        self.result_cache = result_cache
+        self.fingerprint = "store-{}".format(uuid.uuid4().hex)
+        self.lock = threading.Lock()
+        self.link_stations = {}
+        self.next_id = 0
+        self.snapshot = LinkStationStoreSnapshot({}, (), 0, cell_size, 0, 0)
+
+        if link_stations is not None:
+            # Validate link stations
+            validate_link_stations(link_stations)
+
+            with self.lock:
+                changed_cells = {}
+
+                for link_station in link_stations:
+                    self.insert(self.next_id, link_station[0], link_station[1], link_station[2], changed_cells)
+                    self.next_id += 1
+
+                self.publish(changed_cells)
+
+    def add(self, x, y, reach):
+        # Validate the link station
+        validate_link_stations([[x, y, reach]])
+
+        with self.lock:
+            link_station_id = self.next_id
+            self.next_id += 1
+
+            changed_cells = {}
+            self.insert(link_station_id, x, y, reach, changed_cells)
+            self.publish(changed_cells)
+
+        return link_station_id
+
+    def remove(self, link_station_id):
+        with self.lock:
+            # Validate the link station id
+            validate_link_station_id(link_station_id, self.link_stations)
+
+            changed_cells = {}
+            self.delete(link_station_id, changed_cells)
+            self.publish(changed_cells)
+
+    def update_reach(self, link_station_id, reach):
+        # Validate the reach
+        validate_link_station_reach(reach)
+
+        with self.lock:
+            # Validate the link station id
+            validate_link_station_id(link_station_id, self.link_stations)
+
+            x, y, _ = self.link_stations[link_station_id]
+
+            # The link station keeps its id, and with that its position in the order of the link stations
+            changed_cells = {}
+            self.delete(link_station_id, changed_cells)
+            self.insert(link_station_id, x, y, reach, changed_cells)
+            self.publish(changed_cells)
+
+    def get_cells(self, x, y, reach):
+        # A link station without reach can never provide power, so it isn't registered in any cell
+        if reach <= 0:
+            return []
+
+        cells_x = range((x - reach) // self.cell_size, (x + reach) // self.cell_size + 1)
+        cells_y = range((y - reach) // self.cell_size, (y + reach) // self.cell_size + 1)
+
+        # A link station that covers too many cells is kept apart
+        if len(cells_x) * len(cells_y) > MAX_LINK_STATION_CELLS:
+            return [WIDE_CELL]
+
+        return [(cell_x, cell_y) for cell_x in cells_x for cell_y in cells_y]
+
+    def get_changed_cell(self, cell, changed_cells):
+        # The first change of a cell starts from the entries of the current snapshot
+        if cell not in changed_cells:
+            if cell is WIDE_CELL:
+                changed_cells[cell] = list(self.snapshot.wide_link_stations)
+            else:
+                page = get_page_table_page(self.snapshot.pages, get_page(cell))
+                changed_cells[cell] = list(page.get(cell, EMPTY_CELL)[1]) if page is not None else []
+
+        return changed_cells[cell]
+
+    def insert(self, link_station_id, x, y, reach, changed_cells):
+        self.link_stations[link_station_id] = (x, y, reach)
+
+        for cell in self.get_cells(x, y, reach):
+            entries = self.get_changed_cell(cell, changed_cells)
+
+            # Keep the entries sorted by id
+            bisect.insort(entries, (link_station_id, x, y, reach))
+
+    def delete(self, link_station_id, changed_cells):
+        x, y, reach = self.link_stations.pop(link_station_id)
+
+        for cell in self.get_cells(x, y, reach):
+            entries = self.get_changed_cell(cell, changed_cells)
+            entries.remove((link_station_id, x, y, reach))
+
+    def publish(self, changed_cells):
+        version = self.snapshot.version + 1
+        wide_link_stations = self.snapshot.wide_link_stations
+        wide_version = self.snapshot.wide_version
+        changed_pages = {}
+
+        if WIDE_CELL in changed_cells:
+            wide_link_stations = tuple(changed_cells.pop(WIDE_CELL))
+            wide_version = version
+
+        # Copy every changed page once, and replace its changed cells together with their version
+        for cell, entries in changed_cells.items():
+            page_key = get_page(cell)
+
+            if page_key not in changed_pages:
+                page = get_page_table_page(self.snapshot.pages, page_key)
+                changed_pages[page_key] = dict(page) if page is not None else {}
+
+            if entries:
+                changed_pages[page_key][cell] = (version, tuple(entries))
+            else:
+                changed_pages[page_key].pop(cell, None)
+
+        pages = update_page_table(self.snapshot.pages, changed_pages)
+
+        # Publishing the new snapshot is a single assignment, so a query sees either the old or the new version
+        self.snapshot = LinkStationStoreSnapshot(pages, wide_link_stations, wide_version, self.cell_size, len(self.link_stations), version)
+
+    def get_most_suitable_link_station(self, device_coordinates):
+        # Validate device coordinates
+        validate_device_coordinates(device_coordinates)
+
+        # Use a single snapshot for the whole query, even when the store is updated meanwhile
+        snapshot = self.snapshot
+
+        # Results are cached together with the versions of the changes that could affect the device, so a change
+        # makes its cached results unreachable, and they are evicted like any other unused result. A result of an
+        # emptied cell is the same as before the cell was used, so it can be found again.
+        cache_key = (snapshot.get_version(device_coordinates), device_coordinates)
+
+        if self.result_cache is not None:
+            with self.lock:
+                most_suitable_link_station = self.result_cache.get(self.fingerprint, cache_key)
+
+            if most_suitable_link_station is not None:
+                return most_suitable_link_station
+
+        # The entries of a cell are (id, x, y, reach), in the order the link stations were added
+        link_station, power = select_most_suitable_link_station(device_coordinates, snapshot.query(device_coordinates))
+        most_suitable_link_station = (link_station[1], link_station[2], power) if link_station is not None else (0, 0, 0.0)
+
+        if self.result_cache is not None:
+            with self.lock:
+                self.result_cache.put(self.fingerprint, cache_key, most_suitable_link_station)
+
+        return most_suitable_link_station
@@ -0,0 +1,68 @@
+import math
+import random
+
+# The data and the reference results that the tests of every way to find the most suitable link station share.
+# The reference is a frozen copy of the linear scan of the original lambda_function, so the optimized paths are
+# never compared with the scoring kernel they are built on.
+
+# Prepare all data required for the tests
+proper_link_stations = [[0, 0, 10], [20, 20, 5], [10, 0, 12]]
+proper_devices_coordinates = [(0, 0), (100, 100), (15, 10), (18, 18), (13, 13), (25, 99), (0, 1)]
+
+# Link stations with equal power at some points, to check that ties are resolved in input order, together with
+# link stations without reach
+tied_link_stations = [[0, 0, 10], [10, 0, 10], [0, 10, 10], [5, 5, 0], [10, 0, 10], [5, 5, -3]]
+tied_devices_coordinates = [(x, y) for x in range(-12, 24, 2) for y in range(-12, 24, 2)]
+
+def generate_link_stations(seed, count, spread, max_reach):
+    generator = random.Random(seed)
+    return [[generator.randint(-spread, spread), generator.randint(-spread, spread), generator.randint(-5, max_reach)] for _ in range(count)]
+
+def generate_devices_coordinates(seed, count, spread):
+    generator = random.Random(seed)
+    return [(generator.randint(-spread, spread), generator.randint(-spread, spread)) for _ in range(count)]
+
+random_link_stations = generate_link_stations(18, 200, 300, 80)
+random_devices_coordinates = generate_devices_coordinates(19, 300, 350)
+
+def get_reference_power(device_coordinates, link_station):
+    # Calculate the distance based on the Pythagoras theorem
+    distance_x = abs(device_coordinates[0] - link_station[0])
+    distance_y = abs(device_coordinates[1] - link_station[1])
+    distance = float(math.sqrt(pow(distance_x, 2) + pow(distance_y, 2)))
+    reach = float(link_station[2])
+
+    power = 0.0
+
+    # Only calculate power when the reach is greater than the distance
+    if reach > distance:
+        power = pow((reach - distance), 2)
+
+    return power
+
+def get_reference_assignment(device_coordinates, link_stations):
+    # The index of the first link station with the highest power (or -1), and its power
+    assignment = (-1, 0.0)
+
+    for index, link_station in enumerate(link_stations):
+        power = get_reference_power(device_coordinates, link_station)
+
+        if power > assignment[1]:
+            assignment = (index, power)
+
+    return assignment
+
+def get_reference_most_suitable_link_station(device_coordinates, link_stations):
+    index, power = get_reference_assignment(device_coordinates, link_stations)
+
+    if index < 0:
+        return (0, 0, 0.0)
+
+    return (link_stations[index][0], link_stations[index][1], power)
+
+def get_reference_ranked_link_stations(device_coordinates, link_stations, top=None, min_power=0.0):
+    # The link stations above the minimum power, the highest power first and equal powers in input order
+    powers = [(get_reference_power(device_coordinates, link_station), link_station) for link_station in link_stations]
+    ranked = sorted([(power, link_station) for power, link_station in powers if power > min_power], key=lambda ranked_link_station: -ranked_link_station[0])
+
+    return [(link_station[0], link_station[1], power) for power, link_station in ranked[:top]]
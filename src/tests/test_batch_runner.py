@@ -0,0 +1,77 @@
+from os.path import dirname
+import sys
+import unittest
+import io
+import json
+
+# Ensure that we can import the batch runner module
+sys.path.insert(0, dirname(dirname(__file__)))
+
+from batch_runner import (
+    run_batch,
+    read_request_lines,
+    chunk_request_lines)
+
+# Prepare all data required for the tests
+proper_request_lines = [
+    '{"device": {"coordinates": {"x": 0,"y": 0}},"linkStations": [{"coordinates": {"x": 0,"y": 0},"reach": 10}, {"coordinates": {"x": 20,"y": 20},"reach": 1}, {"coordinates": {"x": 10,"y": 0},"reach": 12}]}',
+    '',
+    '{"device": {"coordinates": {"x": 0,"y": 0}},"linkStations": [{"coordinates": {"x": 20,"y": 20},"reach": 1}]}',
+    '{"device": {"coordinates": {"x": 0.5,"y": 0}},"linkStations": [{"coordinates": {"x": 20,"y": 20},"reach": 1}]}',
+    'not json',
+    '{"devices": [{"coordinates": {"x": 0,"y": 0}}, {"coordinates": {"x": 15,"y": 10}}],"linkStations": [{"coordinates": {"x": 10,"y": 0},"reach": 12}]}'
+]
+proper_results_expectation = [
+    {"line": 1, "finding": "Best link station for point 0,0 is 0,0 with power 100.0"},
+    {"line": 3, "finding": "No link station within reach for point 0,0"},
+    {"line": 4, "error": "Invalid x device coordinate specified in the request"},
+    {"line": 5, "error": "Expecting value: line 1 column 1 (char 0)"},
+    {"line": 6, "findings": ["Best link station for point 0,0 is 10,0 with power 4.0", "Best link station for point 15,10 is 10,0 with power 0.6718427000252355"]}
+]
+
+# A line that fails with another exception than ValueError, in the middle of valid lines
+poisoned_request_lines = [proper_request_lines[0], "[" * 100000 + "]" * 100000, proper_request_lines[2]]
+
+def run_proper_batch(**settings):
+    output_file = io.StringIO()
+    summary = run_batch(io.StringIO("\n".join(proper_request_lines) + "\n"), output_file, **settings)
+    return summary, [json.loads(line) for line in output_file.getvalue().splitlines()]
+
+class BatchRunnerTests(unittest.TestCase):
+    # Tests read_request_lines
+    def test_read_request_lines_skips_empty_lines(self):
+        self.assertEqual([1, 3, 4, 5, 6], [line_number for line_number, _ in read_request_lines(io.StringIO("\n".join(proper_request_lines)))])
+
+    # Tests chunk_request_lines
+    def test_chunk_request_lines(self):
+        self.assertEqual([[1, 2], [3, 4], [5]], list(chunk_request_lines(iter([1, 2, 3, 4, 5]), 2)))
+
+    # Tests run_batch
+    def test_run_batch_in_process(self):
+        summary, results = run_proper_batch()
+        self.assertEqual(proper_results_expectation, results)
+        self.assertEqual({"requests": 5, "errors": 2}, summary)
+
+    def test_run_batch_process_pool_keeps_input_order(self):
+        summary, results = run_proper_batch(workers=2, chunk_size=1, max_in_flight=2)
+        self.assertEqual(proper_results_expectation, results)
+        self.assertEqual({"requests": 5, "errors": 2}, summary)
+
+    def test_run_batch_poisoned_line(self):
+        for settings in [{}, {"workers": 2, "chunk_size": 1}]:
+            output_file = io.StringIO()
+            summary = run_batch(io.StringIO("\n".join(poisoned_request_lines) + "\n"), output_file, **settings)
+            results = [json.loads(line) for line in output_file.getvalue().splitlines()]
+
+            self.assertEqual({"requests": 3, "errors": 1}, summary)
+            self.assertEqual([proper_results_expectation[0], proper_results_expectation[1]], [results[0], results[2]])
+            self.assertEqual(2, results[1]["line"])
+            self.assertTrue(results[1]["error"].startswith("RecursionError: "))
+
+    def test_run_batch_invalid_workers(self):
+        self.assertRaises(ValueError, run_batch, io.StringIO(), io.StringIO(), 0)
+
+    def test_run_batch_invalid_chunk_size(self):
+        self.assertRaises(ValueError, run_batch, io.StringIO(), io.StringIO(), 1, 0)
+
+unittest.main()
@@ -0,0 +1,139 @@
+from os.path import dirname, join
+import io
+import json
+import os
+import sys
+import unittest
+
+# Ensure that we can import the benchmark modules
+sys.path.insert(0, dirname(dirname(__file__)))
+sys.path.insert(0, join(dirname(dirname(__file__)), "benchmarks"))
+
+from generators import (
+    LINK_STATION_GENERATORS,
+    generate_devices_coordinates,
+    build_body)
+from benchmark import (
+    run_benchmarks,
+    compare_with_baseline)
+from sharded_scaling import run_scaling
+from replay import (
+    load_request_bodies,
+    generate_request_bodies,
+    summarize_latencies,
+    run_replay,
+    InProcessTarget)
+from validators import validate_body
+import result_cache
+from result_cache import (
+    ResultCache,
+    CACHE_SIZE_VARIABLE)
+
+class BenchmarksTests(unittest.TestCase):
+    # Tests the generators
+    def test_generators_are_seeded(self):
+        for generator in LINK_STATION_GENERATORS.values():
+            self.assertEqual(generator(50, 3), generator(50, 3))
+            self.assertNotEqual(generator(50, 3), generator(50, 4))
+
+    def test_generators_build_valid_bodies(self):
+        for generator in LINK_STATION_GENERATORS.values():
+            link_stations = generator(50, 1)
+            devices_coordinates = generate_devices_coordinates(10, link_stations, 1)
+
+            self.assertEqual(50, len(link_stations))
+            self.assertEqual(10, len(devices_coordinates))
+            validate_body(build_body(devices_coordinates[0], link_stations))
+
+    # Tests run_benchmarks
+    def test_run_benchmarks_measures_every_stage(self):
+        results = run_benchmarks(["uniform"], [10], devices=2, repeat=1)
+        self.assertIn("uniform/10/lambda_handler", results)
+        self.assertIn("uniform/10/grid_build", results)
+        self.assertTrue(all(timing > 0 for timing in results.values()))
+
+    def test_run_benchmarks_restores_cache_configuration(self):
+        cache_size = os.environ.pop(CACHE_SIZE_VARIABLE, None)
+        cache = result_cache.result_cache = ResultCache()
+
+        # The cache is only disabled while measuring, importing the benchmark doesn't change the configuration
+        try:
+            run_benchmarks(["uniform"], [10], devices=2, repeat=1)
+            self.assertNotIn(CACHE_SIZE_VARIABLE, os.environ)
+            self.assertIs(cache, result_cache.result_cache)
+            self.assertEqual(0, cache.get_statistics()["size"])
+        finally:
+            result_cache.result_cache = None
+
+            if cache_size is not None:
+                os.environ[CACHE_SIZE_VARIABLE] = cache_size
+
+    # Tests compare_with_baseline
+    def test_compare_with_baseline_regression(self):
+        self.assertEqual([("uniform/10/parse_body", 1.0, 2.0)],
+            compare_with_baseline({"uniform/10/parse_body": 2.0, "uniform/10/selection": 1.2}, {"uniform/10/parse_body": 1.0, "uniform/10/selection": 1.0}, 0.5))
+
+    def test_compare_with_baseline_ignores_unknown_stages(self):
+        self.assertEqual([], compare_with_baseline({"uniform/10/parse_body": 2.0}, {}, 0.5))
+
+    # Tests run_scaling
+    def test_run_scaling_measures_every_worker_count(self):
+        results = run_scaling(200, 20, [1, 2], repeat=1)
+        self.assertEqual([1, 2], list(results))
+        self.assertEqual(1.0, results[1]["speedup"])
+
+    # Tests the replay
+    def test_load_request_bodies_single_body(self):
+        bodies = load_request_bodies(io.StringIO('{\n  "device": {"coordinates": {"x": 0, "y": 0}},\n  "linkStations": []\n}'))
+        self.assertEqual([{"device": {"coordinates": {"x": 0, "y": 0}}, "linkStations": []}], [json.loads(body) for body in bodies])
+
+    def test_load_request_bodies_capture(self):
+        bodies = load_request_bodies(io.StringIO('{"devices": []}\n\n{"body": "{\\"device\\": {}}"}\n'))
+        self.assertEqual([{"devices": []}, {"device": {}}], [json.loads(body) for body in bodies])
+
+    def test_summarize_latencies_percentiles(self):
+        summary = summarize_latencies([index / 1000.0 for index in range(1, 101)])
+        self.assertEqual(100, summary["count"])
+        self.assertAlmostEqual(50.0, summary["p50_ms"])
+        self.assertAlmostEqual(95.0, summary["p95_ms"])
+        self.assertAlmostEqual(99.0, summary["p99_ms"])
+
+    def test_run_replay_in_process(self):
+        bodies = generate_request_bodies(20, devices=3) + ['{"device": {}}']
+        report = run_replay(bodies, InProcessTarget(), 8, concurrency=2)
+
+        # Every fourth request has an invalid body, and every client has one cold call
+        self.assertEqual(2, report["errors"])
+        self.assertEqual(2, report["cold"]["count"])
+        self.assertEqual(6, report["warm"]["count"])
+        self.assertEqual(8, report["latency"]["count"])
+
+    def test_run_replay_any_failure_is_an_error(self):
+        # A body nested too deep fails with a RecursionError instead of a ValueError
+        report = run_replay(generate_request_bodies(20, devices=1) + ["[" * 100000 + "]" * 100000], InProcessTarget(), 4)
+        self.assertEqual(2, report["errors"])
+
+    def test_run_replay_cache(self):
+        bodies = generate_request_bodies(20, devices=2)
+
+        # The cache is disabled by default, so repeated bodies are calculated every time
+        self.assertIsNone(run_replay(bodies, InProcessTarget(), 6)["cache"])
+
+        report = run_replay(bodies, InProcessTarget(16), 6)
+        self.assertEqual(4, report["cache"]["hits"])
+        self.assertEqual(2, report["cache"]["misses"])
+        self.assertAlmostEqual(4 / 6.0, report["cache"]["hit_ratio"])
+
+    def test_run_replay_cache_shared_by_clients(self):
+        # The client threads share the cache of the process, which counts every lookup exactly once
+        report = run_replay(generate_request_bodies(20, devices=40), InProcessTarget(16), 400, concurrency=8)
+        self.assertEqual(0, report["errors"])
+        self.assertEqual(400, report["cache"]["hits"] + report["cache"]["misses"])
+        self.assertLessEqual(report["cache"]["size"], 16)
+
+    def test_run_replay_at_rate(self):
+        report = run_replay(generate_request_bodies(20, devices=2), InProcessTarget(), 5, rate=100.0)
+        self.assertEqual(0, report["errors"])
+        self.assertGreaterEqual(report["duration_seconds"], 0.04)
+
+unittest.main()
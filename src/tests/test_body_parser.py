@@ -0,0 +1,105 @@
+from os.path import dirname
+import sys
+import unittest
+import json
+
+# Ensure that we can import the body parser module
+sys.path.insert(0, dirname(dirname(__file__)))
+
+from validators import validate_body
+from body_parser import (
+    compile_body,
+    compile_batch_body,
+    compile_link_stations)
+from lambda_function import parse_body
+
+# Prepare all data required for the tests
+proper_body = json.loads('{"device": {"coordinates": {"x": 0,"y": 0}},"linkStations": [{"coordinates": {"x": 0,"y": 0},"reach": 10}, {"coordinates": {"x": 20,"y": 20},"reach": 1}, {"coordinates": {"x": 10,"y": 0},"reach": 12}]}')
+proper_body_device_coordinates = (0, 0)
+proper_body_link_station_arrays = ([0, 20, 10], [0, 20, 0], [10, 1, 12])
+
+proper_batch_body = json.loads('{"devices": [{"coordinates": {"x": 0,"y": 0}}, {"coordinates": {"x": 5,"y": -3}}],"linkStations": [{"coordinates": {"x": 0,"y": 0},"reach": 10}]}')
+proper_batch_body_devices_coordinates = [(0, 0), (5, -3)]
+
+# Every invalid body must be reported with the same message as validate_body
+invalid_bodies = [
+    None,
+    14,
+    {"linkStations": [{"coordinates": {"x": 0,"y": 0},"reach": 10}]},
+    {"device": [],"linkStations": [{"coordinates": {"x": 0,"y": 0},"reach": 10}]},
+    {"device": {},"linkStations": [{"coordinates": {"x": 0,"y": 0},"reach": 10}]},
+    {"device": {"coordinates": "0,0"},"linkStations": [{"coordinates": {"x": 0,"y": 0},"reach": 10}]},
+    {"device": {"coordinates": {"y": 0}},"linkStations": [{"coordinates": {"x": 0,"y": 0},"reach": 10}]},
+    {"device": {"coordinates": {"x": 0.8, "y": 0}},"linkStations": [{"coordinates": {"x": 0,"y": 0},"reach": 10}]},
+    {"device": {"coordinates": {"x": 0, "y": 0.8}},"linkStations": [{"coordinates": {"x": 0,"y": 0},"reach": 10}]},
+    {"device": {"coordinates": {"x": 0, "y": 0}}},
+    {"device": {"coordinates": {"x": 0, "y": 0}}, "linkStations": {}},
+    {"device": {"coordinates": {"x": 0, "y": 0}},"linkStations": [[0, 0, 10]]},
+    {"device": {"coordinates": {"x": 0, "y": 0}},"linkStations": [{"reach": 10}]},
+    {"device": {"coordinates": {"x": 0, "y": 0}},"linkStations": [{"coordinates": [], "reach": 10}]},
+    {"device": {"coordinates": {"x": 0, "y": 0}},"linkStations": [{"coordinates": {"y": 0}, "reach": 10}]},
+    {"device": {"coordinates": {"x": 0, "y": 0}},"linkStations": [{"coordinates": {"x": 0.8, "y": 0}, "reach": 10}]},
+    {"device": {"coordinates": {"x": 0, "y": 0}},"linkStations": [{"coordinates": {"x": 0}, "reach": 10}]},
+    {"device": {"coordinates": {"x": 0, "y": 0}},"linkStations": [{"coordinates": {"x": 0, "y": 0.7}, "reach": 10}]},
+    {"device": {"coordinates": {"x": 0, "y": 0}},"linkStations": [{"coordinates": {"x": 0, "y": 0}}]},
+    {"device": {"coordinates": {"x": 0, "y": 0}},"linkStations": [{"coordinates": {"x": 0, "y": 0}, "reach": 10}, {"coordinates": {"x": 0, "y": 0}, "reach": 10.4}]}
+]
+
+def get_error_message(function, json_object):
+    try:
+        function(json_object)
+    except ValueError as error:
+        return str(error)
+
+    return None
+
+class BodyParserTests(unittest.TestCase):
+    # Tests compile_body
+    def test_compile_body(self):
+        device_coordinates, link_station_arrays = compile_body(proper_body)
+        self.assertEqual(proper_body_device_coordinates, device_coordinates)
+        self.assertEqual(proper_body_link_station_arrays, tuple(list(values) for values in link_station_arrays))
+
+    def test_compile_body_reports_the_same_messages_as_validate_body(self):
+        for invalid_body in invalid_bodies:
+            expected_message = get_error_message(validate_body, invalid_body)
+            self.assertIsNotNone(expected_message)
+            self.assertEqual(expected_message, get_error_message(compile_body, invalid_body))
+
+    def test_compile_body_no_link_stations(self):
+        self.assertRaises(ValueError, compile_body, {"device": {"coordinates": {"x": 0, "y": 0}}, "linkStations": []})
+
+    def test_compile_body_link_station_values_out_of_range(self):
+        # Values that don't fit in 64 bit integers are kept in lists, like validate_body accepts them
+        _, link_station_arrays = compile_body({"device": {"coordinates": {"x": 0, "y": 0}}, "linkStations": [{"coordinates": {"x": 0, "y": 0}, "reach": 10}, {"coordinates": {"x": 1 << 70, "y": 0}, "reach": 10}]})
+        self.assertEqual(([0, 1 << 70], [0, 0], [10, 10]), link_station_arrays)
+
+    # Tests compile_batch_body
+    def test_compile_batch_body(self):
+        devices_coordinates, link_station_arrays = compile_batch_body(proper_batch_body)
+        self.assertEqual(proper_batch_body_devices_coordinates, devices_coordinates)
+        self.assertEqual(([0], [0], [10]), tuple(list(values) for values in link_station_arrays))
+
+    def test_compile_batch_body_device_coordinates_out_of_range(self):
+        for x, y in [(1 << 63, 0), (0, -(1 << 63) - 1)]:
+            with self.assertRaises(ValueError) as context:
+                compile_batch_body({"devices": [{"coordinates": {"x": 0, "y": 0}}, {"coordinates": {"x": x, "y": y}}], "linkStations": [{"coordinates": {"x": 0, "y": 0}, "reach": 10}]})
+
+            self.assertEqual("Invalid device coordinates specified", str(context.exception))
+
+    def test_compile_batch_body_missing_devices(self):
+        self.assertRaises(ValueError, compile_batch_body, {"linkStations": [{"coordinates": {"x": 0,"y": 0},"reach": 10}]})
+
+    # Tests compile_link_stations
+    def test_compile_link_stations(self):
+        self.assertEqual(proper_body_link_station_arrays, tuple(list(values) for values in compile_link_stations([[0, 0, 10], [20, 20, 1], [10, 0, 12]])))
+
+    def test_compile_link_stations_values_out_of_range(self):
+        self.assertEqual(([0, -(1 << 64)], [0, 0], [10, 1 << 65]), compile_link_stations([[0, 0, 10], [-(1 << 64), 0, 1 << 65]]))
+
+    # Tests parse_body
+    def test_parse_body_reports_the_same_messages_as_validate_body(self):
+        for invalid_body in invalid_bodies:
+            self.assertEqual(get_error_message(validate_body, invalid_body), get_error_message(parse_body, invalid_body))
+
+unittest.main()
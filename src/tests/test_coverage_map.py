@@ -0,0 +1,80 @@
+from os.path import dirname
+import sys
+import unittest
+
+# Ensure that we can import the coverage map module
+sys.path.insert(0, dirname(dirname(__file__)))
+
+import coverage_map
+from coverage_map import CoverageMap
+from spatial_index import LinkStationGrid
+from station_snapshot import (
+    LinkStationSnapshot,
+    build_snapshot)
+from reference import (
+    proper_link_stations,
+    tied_link_stations,
+    generate_link_stations,
+    get_reference_most_suitable_link_station)
+
+# A dense set of link stations, so every tile has candidates
+dense_link_stations = generate_link_stations(3, 40, 60, 30)
+
+class CoverageMapTests(unittest.TestCase):
+    def assertMatchesReference(self, link_stations, link_station_coverage_map, min_coordinate, max_coordinate):
+        for x in range(min_coordinate, max_coordinate):
+            for y in range(min_coordinate, max_coordinate):
+                self.assertEqual(
+                    get_reference_most_suitable_link_station((x, y), link_stations),
+                    link_station_coverage_map.get_most_suitable_link_station((x, y)))
+
+    # Tests CoverageMap
+    def test_coverage_map_matches_reference(self):
+        for link_stations in [proper_link_stations, tied_link_stations, dense_link_stations]:
+            link_station_coverage_map = CoverageMap(LinkStationGrid(link_stations), tile_size=16)
+            self.assertMatchesReference(link_stations, link_station_coverage_map, -70, 70)
+
+    def test_coverage_map_matches_reference_without_numpy(self):
+        numpy = coverage_map.numpy
+        coverage_map.numpy = None
+
+        try:
+            for link_stations in [proper_link_stations, tied_link_stations]:
+                link_station_coverage_map = CoverageMap(LinkStationGrid(link_stations, 7), tile_size=8)
+                self.assertMatchesReference(link_stations, link_station_coverage_map, -25, 25)
+        finally:
+            coverage_map.numpy = numpy
+
+    def test_coverage_map_with_snapshot(self):
+        link_station_snapshot = LinkStationSnapshot(build_snapshot(LinkStationGrid(dense_link_stations).link_station_arrays, 9))
+        self.assertMatchesReference(dense_link_stations, CoverageMap(link_station_snapshot, tile_size=32), -70, 70)
+
+    def test_coverage_map_no_link_station_within_reach(self):
+        link_station_coverage_map = CoverageMap(LinkStationGrid(proper_link_stations))
+        self.assertEqual((0, 0, 0.0), link_station_coverage_map.get_most_suitable_link_station((100, 100)))
+        self.assertEqual((0, 0, 0.0), link_station_coverage_map.get_most_suitable_link_station((-100000, 100000)))
+
+    def test_coverage_map_tiles_are_reused(self):
+        link_station_coverage_map = CoverageMap(LinkStationGrid(proper_link_stations), tile_size=16, max_tiles=2)
+
+        for device_coordinates in [(0, 0), (1, 1), (20, 20), (0, 2), (40, 40)]:
+            link_station_coverage_map.get_most_suitable_link_station(device_coordinates)
+
+        # The tile of (20, 20) was used least recently, so it was evicted
+        self.assertEqual({"tiles": 2, "hits": 2, "misses": 3, "evictions": 1}, link_station_coverage_map.get_statistics())
+        self.assertEqual([(0, 0), (2, 2)], list(link_station_coverage_map.tiles))
+
+    def test_coverage_map_invalid_device_coordinates(self):
+        link_station_coverage_map = CoverageMap(LinkStationGrid(proper_link_stations))
+        self.assertRaises(ValueError, link_station_coverage_map.get_most_suitable_link_station, [0, 0])
+
+    def test_coverage_map_invalid_tile_size(self):
+        self.assertRaises(ValueError, CoverageMap, LinkStationGrid(proper_link_stations), 0)
+
+    def test_coverage_map_invalid_max_tiles(self):
+        self.assertRaises(ValueError, CoverageMap, LinkStationGrid(proper_link_stations), 16, 0)
+
+    def test_coverage_map_invalid_link_station_grid(self):
+        self.assertRaises(ValueError, CoverageMap, proper_link_stations)
+
+unittest.main()
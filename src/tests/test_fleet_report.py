@@ -0,0 +1,103 @@
+from os.path import dirname, join
+import json
+import sys
+import tempfile
+import unittest
+
+# Ensure that we can import the fleet report module
+sys.path.insert(0, dirname(dirname(__file__)))
+
+import fleet_report
+from fleet_report import (
+    assign_devices,
+    build_fleet_report,
+    main)
+from spatial_index import LinkStationGrid
+from station_snapshot import (
+    LinkStationSnapshot,
+    build_snapshot)
+from reference import (
+    proper_link_stations,
+    proper_devices_coordinates,
+    tied_link_stations,
+    tied_devices_coordinates,
+    random_link_stations,
+    random_devices_coordinates,
+    get_reference_assignment)
+
+def get_expected_assignments(devices_coordinates, link_stations):
+    return [get_reference_assignment(device_coordinates, link_stations) for device_coordinates in devices_coordinates]
+
+class FleetReportTests(unittest.TestCase):
+    # Tests assign_devices
+    def test_assign_devices_matches_reference(self):
+        for link_stations, devices_coordinates in [(proper_link_stations, proper_devices_coordinates), (tied_link_stations, tied_devices_coordinates), (random_link_stations, random_devices_coordinates)]:
+            self.assertEqual(get_expected_assignments(devices_coordinates, link_stations), assign_devices(devices_coordinates, LinkStationGrid(link_stations)))
+
+    def test_assign_devices_in_chunks_of_pairs(self):
+        # A chunk of pairs never splits the pairs of a device, and devices with more pairs are scored on their own
+        expected = get_expected_assignments(random_devices_coordinates, random_link_stations)
+
+        for max_matrix_size in [1, 7, 100]:
+            self.assertEqual(expected, assign_devices(random_devices_coordinates, LinkStationGrid(random_link_stations, 40), None, max_matrix_size))
+
+    def test_assign_devices_invalid_max_matrix_size(self):
+        self.assertRaises(ValueError, assign_devices, proper_devices_coordinates, LinkStationGrid(proper_link_stations), None, 0)
+
+    def test_assign_devices_without_numpy(self):
+        numpy = fleet_report.numpy
+        fleet_report.numpy = None
+
+        try:
+            self.assertEqual(get_expected_assignments(tied_devices_coordinates, tied_link_stations), assign_devices(tied_devices_coordinates, LinkStationGrid(tied_link_stations, 4)))
+        finally:
+            fleet_report.numpy = numpy
+
+    def test_assign_devices_with_snapshot(self):
+        link_station_snapshot = LinkStationSnapshot(build_snapshot(LinkStationGrid(random_link_stations).link_station_arrays, 40))
+        self.assertEqual(get_expected_assignments(random_devices_coordinates, random_link_stations), assign_devices(random_devices_coordinates, link_station_snapshot))
+
+    def test_assign_devices_invalid_devices_coordinates(self):
+        self.assertRaises(ValueError, assign_devices, [[0, 0]], LinkStationGrid(proper_link_stations))
+
+    # Tests build_fleet_report
+    def test_build_fleet_report(self):
+        unreached = []
+        report = build_fleet_report(iter(proper_devices_coordinates), LinkStationGrid(proper_link_stations), 3, unreached.append)
+
+        self.assertEqual({"devices": 7, "reached": 4, "unreached": 3, "linkStations": 3, "servingLinkStations": 3}, report.get_summary())
+        self.assertEqual([(100, 100), (13, 13), (25, 99)], unreached)
+
+        link_stations = list(report.iterate_link_stations())
+        self.assertEqual({"coordinates": {"x": 0, "y": 0}, "reach": 10, "devices": 2, "totalPower": 181.0, "meanPower": 90.5}, link_stations[0])
+        self.assertEqual([2, 1, 1], [link_station["devices"] for link_station in link_stations])
+
+    def test_build_fleet_report_totals(self):
+        report = build_fleet_report(iter(random_devices_coordinates), LinkStationGrid(random_link_stations), 64)
+        link_stations = list(report.iterate_link_stations())
+
+        self.assertEqual(report.get_summary()["reached"], sum(link_station["devices"] for link_station in link_stations))
+        self.assertAlmostEqual(sum(power for _, power in get_expected_assignments(random_devices_coordinates, random_link_stations)), sum(link_station["totalPower"] for link_station in link_stations))
+
+    def test_build_fleet_report_invalid_chunk_size(self):
+        self.assertRaises(ValueError, build_fleet_report, iter(proper_devices_coordinates), LinkStationGrid(proper_link_stations), 0)
+
+    # Tests main
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(join(directory, "devices.jsonl"), "w") as devices_file:
+                for x, y in proper_devices_coordinates:
+                    devices_file.write(json.dumps({"coordinates": {"x": x, "y": y}}) + "\n")
+
+            with open(join(directory, "stations.json"), "w") as document_file:
+                json.dump({"linkStations": [{"coordinates": {"x": x, "y": y}, "reach": reach} for x, y, reach in proper_link_stations]}, document_file)
+
+            main([join(directory, "devices.jsonl"), join(directory, "stations.json"), join(directory, "report.jsonl"), "--unreached", join(directory, "unreached.jsonl")])
+
+            with open(join(directory, "report.jsonl")) as report_file:
+                self.assertEqual([2, 1, 1], [json.loads(line)["devices"] for line in report_file])
+
+            with open(join(directory, "unreached.jsonl")) as unreached_file:
+                self.assertEqual([{"coordinates": {"x": 100, "y": 100}}, {"coordinates": {"x": 13, "y": 13}}, {"coordinates": {"x": 25, "y": 99}}], [json.loads(line) for line in unreached_file])
+
+unittest.main()
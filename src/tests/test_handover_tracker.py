@@ -0,0 +1,105 @@
+from os.path import dirname
+import random
+import sys
+import unittest
+
+# Ensure that we can import the handover tracker module
+sys.path.insert(0, dirname(dirname(__file__)))
+
+from handover_tracker import HandoverTracker
+from spatial_index import LinkStationGrid
+from station_snapshot import (
+    LinkStationSnapshot,
+    build_snapshot)
+from reference import (
+    proper_link_stations,
+    generate_link_stations,
+    get_reference_most_suitable_link_station)
+
+# Link stations spread over the area the paths run through
+wide_link_stations = generate_link_stations(13, 300, 500, 120)
+
+# Two link stations with equal reach, so the power is nearly equal around the middle between them
+flapping_link_stations = [[0, 0, 50], [40, 0, 50]]
+flapping_path = [(19, 0), (21, 0), (19, 1), (21, 1), (19, 2), (21, 2), (35, 0)]
+
+def generate_path(generator, steps, step_size):
+    x, y = generator.randint(-400, 400), generator.randint(-400, 400)
+    path = []
+
+    for _ in range(steps):
+        x += generator.randint(-step_size, step_size)
+        y += generator.randint(-step_size, step_size)
+        path.append((x, y))
+
+    return path
+
+class HandoverTrackerTests(unittest.TestCase):
+    def assertMatchesReference(self, tracker, link_stations, paths):
+        for step in range(len(paths[0])):
+            for device_id, path in enumerate(paths):
+                self.assertEqual(get_reference_most_suitable_link_station(path[step], link_stations), tracker.update(device_id, path[step]))
+
+    # Tests HandoverTracker
+    def test_tracker_matches_reference(self):
+        paths = [generate_path(random.Random(device_id), 200, 6) for device_id in range(5)]
+        tracker = HandoverTracker(LinkStationGrid(wide_link_stations), safe_radius=20)
+        self.assertMatchesReference(tracker, wide_link_stations, paths)
+
+        # Most updates are answered from the candidates of the safe region
+        statistics = tracker.get_statistics()
+        self.assertEqual(1000, statistics["updates"])
+        self.assertEqual(1000, statistics["full_searches"] + statistics["avoided_full_searches"])
+        self.assertGreater(statistics["avoided_full_searches"], statistics["full_searches"])
+
+    def test_tracker_with_snapshot(self):
+        paths = [generate_path(random.Random(device_id), 100, 30) for device_id in range(3)]
+        link_station_snapshot = LinkStationSnapshot(build_snapshot(LinkStationGrid(wide_link_stations).link_station_arrays, 64))
+        self.assertMatchesReference(HandoverTracker(link_station_snapshot, safe_radius=0), wide_link_stations, paths)
+        self.assertMatchesReference(HandoverTracker(link_station_snapshot, safe_radius=45), wide_link_stations, paths)
+
+    def test_tracker_no_link_station_within_reach(self):
+        tracker = HandoverTracker(LinkStationGrid(proper_link_stations))
+        self.assertEqual((0, 0, 0.0), tracker.update("vehicle", (100, 100)))
+        self.assertEqual((0, 0, 100.0), tracker.update("vehicle", (0, 0)))
+
+    def test_tracker_without_hysteresis_flaps(self):
+        tracker = HandoverTracker(LinkStationGrid(flapping_link_stations), safe_radius=5)
+        self.assertMatchesReference(tracker, flapping_link_stations, [flapping_path])
+        self.assertEqual(5, tracker.get_statistics()["handovers"])
+
+    def test_tracker_hysteresis_suppresses_flapping(self):
+        tracker = HandoverTracker(LinkStationGrid(flapping_link_stations), safe_radius=5, hysteresis=0.5)
+        serving_link_stations = [tracker.update("vehicle", device_coordinates)[:2] for device_coordinates in flapping_path]
+
+        # The first link station keeps serving until the other one is clearly better
+        self.assertEqual([(0, 0)] * 6 + [(40, 0)], serving_link_stations)
+        self.assertEqual(1, tracker.get_statistics()["handovers"])
+        self.assertEqual(3, tracker.get_statistics()["suppressed_handovers"])
+
+    def test_tracker_session_eviction(self):
+        tracker = HandoverTracker(LinkStationGrid(proper_link_stations), max_sessions=2)
+
+        for device_id in ["a", "b", "a", "c"]:
+            tracker.update(device_id, (0, 0))
+
+        self.assertEqual(["a", "c"], list(tracker.sessions))
+        self.assertEqual(1, tracker.get_statistics()["evictions"])
+
+        tracker.end_session("a")
+        self.assertEqual(["c"], list(tracker.sessions))
+
+    def test_tracker_invalid_device_id(self):
+        tracker = HandoverTracker(LinkStationGrid(proper_link_stations))
+        self.assertRaises(ValueError, tracker.update, None, (0, 0))
+
+    def test_tracker_invalid_device_coordinates(self):
+        tracker = HandoverTracker(LinkStationGrid(proper_link_stations))
+        self.assertRaises(ValueError, tracker.update, "vehicle", [0, 0])
+
+    def test_tracker_invalid_settings(self):
+        self.assertRaises(ValueError, HandoverTracker, LinkStationGrid(proper_link_stations), -1)
+        self.assertRaises(ValueError, HandoverTracker, LinkStationGrid(proper_link_stations), 5, -0.1)
+        self.assertRaises(ValueError, HandoverTracker, LinkStationGrid(proper_link_stations), 5, 0.0, 0)
+
+unittest.main()
@@ -12,7 +12,15 @@ from lambda_function import (
     get_distance_between_device_and_link_station,
     get_link_station_power,
     pretty_print_most_suitable_link_station,
-    parse_body)
+    parse_body,
+    get_most_suitable_link_stations,
+    parse_batch_body,
+    get_ranked_link_stations)
+from reference import (
+    generate_link_stations,
+    generate_devices_coordinates,
+    get_reference_most_suitable_link_station,
+    get_reference_ranked_link_stations)
 
 # Prepare all data required for the tests
 proper_request_found = {"body": '{"device": {"coordinates": {"x": 0,"y": 0}},"linkStations": [{"coordinates": {"x": 0,"y": 0},"reach": 10}, {"coordinates": {"x": 20,"y": 20},"reach": 1}, {"coordinates": {"x": 10,"y": 0},"reach": 12}]}'}
@@ -40,6 +48,18 @@ proper_get_link_station_power_expectation = 25.0
 proper_most_suitable_link_station = (0, 0, 100)
 proper_pretty_print_most_suitable_link_station_expectation = "Best link station for point 12,25 is 0,0 with power 100"
 
+proper_batch_request = {"body": '{"devices": [{"coordinates": {"x": 0,"y": 0}}, {"coordinates": {"x": 100,"y": 100}}, {"coordinates": {"x": 15,"y": 10}}],"linkStations": [{"coordinates": {"x": 0,"y": 0},"reach": 10}, {"coordinates": {"x": 20,"y": 20},"reach": 1}, {"coordinates": {"x": 10,"y": 0},"reach": 12}]}'}
+proper_batch_request_expectation = {"statusCode": 200, "headers": {"Content-Type": "application/json"},"body": "{\"findings\": [\"Best link station for point 0,0 is 0,0 with power 100.0\", \"No link station within reach for point 100,100\", \"Best link station for point 15,10 is 10,0 with power 0.6718427000252355\"]}"}
+proper_batch_request_devices_coordinates = [(0, 0), (100, 100), (15, 10)]
+
+proper_devices_coordinates = [(12, 25), (0, 0), (500, 500)]
+proper_most_suitable_link_stations_expectation = [(11, 14, 80.18555931250957), (10, 10, 34.314575050761974), (0, 0, 0.0)]
+
+proper_ranked_request = {"body": '{"device": {"coordinates": {"x": 0,"y": 0}},"linkStations": [{"coordinates": {"x": 0,"y": 0},"reach": 10}, {"coordinates": {"x": 20,"y": 20},"reach": 1}, {"coordinates": {"x": 10,"y": 0},"reach": 12}],"top": 2}'}
+proper_ranked_request_expectation = {"statusCode": 200, "headers": {"Content-Type": "application/json"},"body": "{\"finding\": \"Best link station for point 0,0 is 0,0 with power 100.0\", \"linkStations\": [{\"coordinates\": {\"x\": 0, \"y\": 0}, \"power\": 100.0}, {\"coordinates\": {\"x\": 10, \"y\": 0}, \"power\": 4.0}]}"}
+
+proper_ranked_link_stations_expectation = [(11, 14, 80.18555931250957), (10, 10, 23.69016198313776)]
+
 class LambdaFunctionTests(unittest.TestCase):
     # Tests lambda_handler
     def test_lambda_handler_proper_request_found(self):
@@ -75,4 +95,92 @@ class LambdaFunctionTests(unittest.TestCase):
         self.assertEqual(proper_request_found_device_coordinates, parsed_body[0])
         self.assertEqual(proper_request_found_link_stations, parsed_body[1])
 
+    # Tests lambda_handler in batch mode
+    def test_lambda_handler_proper_batch_request(self):
+        self.assertEqual(proper_batch_request_expectation, lambda_handler(proper_batch_request, None))
+
+    def test_lambda_handler_devices_not_a_list(self):
+        # Only a list of devices makes a batch request, any other devices field is ignored like before
+        body = json.loads(proper_request_found["body"])
+        body["devices"] = 5
+        self.assertEqual(proper_request_found_expectation, lambda_handler({"body": json.dumps(body)}, None))
+
+    def test_lambda_handler_batch_request_device_coordinates_out_of_range(self):
+        body = {"devices": [{"coordinates": {"x": 2 ** 63, "y": 0}}], "linkStations": [{"coordinates": {"x": 0, "y": 0}, "reach": 10}]}
+        self.assertRaises(ValueError, lambda_handler, {"body": json.dumps(body)}, None)
+
+    def test_lambda_handler_link_station_values_out_of_range(self):
+        link_stations = [{"coordinates": {"x": 0, "y": 0}, "reach": 10}, {"coordinates": {"x": 2 ** 64, "y": 0}, "reach": 10}]
+        expectation = {"statusCode": 200, "headers": {"Content-Type": "application/json"}, "body": "{\"finding\": \"Best link station for point 0,0 is 0,0 with power 100.0\"}"}
+        self.assertEqual(expectation, lambda_handler({"body": json.dumps({"device": {"coordinates": {"x": 0, "y": 0}}, "linkStations": link_stations})}, None))
+
+        batch_expectation = {"statusCode": 200, "headers": {"Content-Type": "application/json"}, "body": "{\"findings\": [\"Best link station for point 0,0 is 0,0 with power 100.0\"]}"}
+        self.assertEqual(batch_expectation, lambda_handler({"body": json.dumps({"devices": [{"coordinates": {"x": 0, "y": 0}}], "linkStations": link_stations})}, None))
+
+    # Tests get_most_suitable_link_stations
+    def test_get_most_suitable_link_stations_proper_request(self):
+        self.assertEqual(proper_most_suitable_link_stations_expectation, get_most_suitable_link_stations(proper_devices_coordinates, proper_link_stations))
+
+    def test_get_most_suitable_link_stations_invalid_devices_coordinates(self):
+        self.assertRaises(ValueError, get_most_suitable_link_stations, [], proper_link_stations)
+
+    def test_get_most_suitable_link_stations_invalid_max_matrix_size(self):
+        self.assertRaises(ValueError, get_most_suitable_link_stations, proper_devices_coordinates, proper_link_stations, 0)
+
+    def test_get_most_suitable_link_stations_matches_reference(self):
+        link_stations = generate_link_stations(3, 120, 300, 80) + [[0, 40, 40], [40, 0, 40]]
+        devices_coordinates = generate_devices_coordinates(4, 300, 350) + [(0, 0)]
+
+        # A small maximum matrix size forces chunking over both the devices and the link stations
+        for max_matrix_size in [1, 97, 1 << 18]:
+            self.assertEqual([get_reference_most_suitable_link_station(device_coordinates, link_stations) for device_coordinates in devices_coordinates],
+                get_most_suitable_link_stations(devices_coordinates, link_stations, max_matrix_size))
+
+    def test_get_most_suitable_link_stations_large_coordinates(self):
+        # The squared distances of these link stations don't fit in int64, and must not wrap around
+        link_stations = [[5, 0, 10], [2 ** 32, 0, 10], [-2 ** 40, 2 ** 40, 2 ** 33], [2 ** 61, 0, 2 ** 62]]
+        devices_coordinates = [(0, 0), (2 ** 32 + 3, 1), (-2 ** 40 + 7, 2 ** 40), (2 ** 61, 2 ** 61), (2 ** 62, -2 ** 62)]
+
+        self.assertEqual([get_reference_most_suitable_link_station(device_coordinates, link_stations) for device_coordinates in devices_coordinates],
+            get_most_suitable_link_stations(devices_coordinates, link_stations))
+        self.assertEqual([(5, 0, 25.0)], get_most_suitable_link_stations([(0, 0)], [[5, 0, 10], [2 ** 32, 0, 10]]))
+
+    # Tests lambda_handler with ranking
+    def test_lambda_handler_proper_ranked_request(self):
+        self.assertEqual(proper_ranked_request_expectation, lambda_handler(proper_ranked_request, None))
+
+    # Tests get_ranked_link_stations
+    def test_get_ranked_link_stations_proper_request(self):
+        self.assertEqual(proper_ranked_link_stations_expectation, get_ranked_link_stations(proper_device_coordinates, proper_link_stations))
+
+    def test_get_ranked_link_stations_top(self):
+        self.assertEqual(proper_ranked_link_stations_expectation[:1], get_ranked_link_stations(proper_device_coordinates, proper_link_stations, 1))
+
+    def test_get_ranked_link_stations_min_power(self):
+        self.assertEqual(proper_ranked_link_stations_expectation[:1], get_ranked_link_stations(proper_device_coordinates, proper_link_stations, None, 50))
+
+    def test_get_ranked_link_stations_invalid_top(self):
+        self.assertRaises(ValueError, get_ranked_link_stations, proper_device_coordinates, proper_link_stations, 0)
+
+    def test_get_ranked_link_stations_invalid_min_power(self):
+        self.assertRaises(ValueError, get_ranked_link_stations, proper_device_coordinates, proper_link_stations, None, -1)
+
+    def test_get_ranked_link_stations_matches_reference(self):
+        link_stations = generate_link_stations(5, 200, 100, 60) + [[0, 30, 30], [30, 0, 30], [0, -30, 30]]
+
+        for device_coordinates in [(0, 0)] + generate_devices_coordinates(6, 50, 100):
+            ranked = get_reference_ranked_link_stations(device_coordinates, link_stations)
+
+            self.assertEqual(ranked[:5], get_ranked_link_stations(device_coordinates, link_stations, 5))
+            self.assertEqual(get_reference_ranked_link_stations(device_coordinates, link_stations, None, 50.0), get_ranked_link_stations(device_coordinates, link_stations, None, 50.0))
+
+            if ranked:
+                self.assertEqual(get_reference_most_suitable_link_station(device_coordinates, link_stations), ranked[0])
+
+    # Tests parse_batch_body
+    def test_parse_batch_body(self):
+        parsed_body = parse_batch_body(json.loads(proper_batch_request['body']))
+        self.assertEqual(proper_batch_request_devices_coordinates, parsed_body[0])
+        self.assertEqual(proper_request_found_link_stations, parsed_body[1])
+
 unittest.main()
\ No newline at end of file
@@ -0,0 +1,140 @@
+from os.path import dirname
+import asyncio
+import http.client
+import json
+import socket
+import sys
+import threading
+import unittest
+
+# Ensure that we can import the local server module
+sys.path.insert(0, dirname(dirname(__file__)))
+
+import local_server
+from local_server import (
+    LocalServer,
+    MAX_BODY_SIZE,
+    create_api_gateway_event)
+from lambda_function import lambda_handler
+
+# Prepare all data required for the tests
+proper_body = '{"device": {"coordinates": {"x": 0,"y": 0}},"linkStations": [{"coordinates": {"x": 0,"y": 0},"reach": 10}, {"coordinates": {"x": 20,"y": 20},"reach": 1}, {"coordinates": {"x": 10,"y": 0},"reach": 12}]}'
+proper_finding = {"finding": "Best link station for point 0,0 is 0,0 with power 100.0"}
+improper_body = '{"device": {"coordinates": {"x": 0.5,"y": 0}},"linkStations": [{"coordinates": {"x": 0,"y": 0},"reach": 10}]}'
+
+class RunningServer:
+    # Runs a local server with its own event loop in a background thread
+    def __init__(self, workers):
+        self.local_server = LocalServer("127.0.0.1", 0, workers)
+        self.loop = asyncio.new_event_loop()
+        self.started = threading.Event()
+        self.thread = threading.Thread(target=self.run)
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self.local_server.start())
+        self.started.set()
+        self.loop.run_forever()
+
+    def __enter__(self):
+        self.thread.start()
+        self.started.wait()
+        return self.local_server
+
+    def __exit__(self, *exception):
+        asyncio.run_coroutine_threadsafe(self.local_server.close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+class LocalServerTests(unittest.TestCase):
+    def post(self, connection, body):
+        connection.request("POST", "/", body, {"Content-Type": "application/json"})
+        response = connection.getresponse()
+
+        return response.status, json.loads(response.read())
+
+    # Tests create_api_gateway_event
+    def test_create_api_gateway_event(self):
+        event = create_api_gateway_event("POST", "/?debug=1", {"Content-Type": "application/json"}, proper_body, "127.0.0.1")
+        self.assertEqual("/", event["path"])
+        self.assertEqual({"debug": "1"}, event["queryStringParameters"])
+        self.assertEqual("v1", event["requestContext"]["stage"])
+        self.assertEqual(json.loads(lambda_handler(event, None)["body"]), proper_finding)
+
+    # Tests LocalServer
+    def test_local_server_keep_alive(self):
+        with RunningServer(1) as local_server:
+            connection = http.client.HTTPConnection("127.0.0.1", local_server.port)
+
+            # Every request is answered on the same connection
+            for _ in range(3):
+                self.assertEqual((200, proper_finding), self.post(connection, proper_body))
+
+            connection.close()
+
+    def test_local_server_worker_processes(self):
+        with RunningServer(2) as local_server:
+            connections = [http.client.HTTPConnection("127.0.0.1", local_server.port) for _ in range(4)]
+
+            for connection in connections:
+                self.assertEqual((200, proper_finding), self.post(connection, proper_body))
+                connection.close()
+
+    def test_local_server_failed_invocation(self):
+        with RunningServer(1) as local_server:
+            connection = http.client.HTTPConnection("127.0.0.1", local_server.port)
+
+            # Like API Gateway, an error of the function results in a 502, and the connection stays usable
+            self.assertEqual((502, {"message": "Internal server error"}), self.post(connection, improper_body))
+            self.assertEqual((200, proper_finding), self.post(connection, proper_body))
+            self.assertEqual(1, local_server.errors)
+
+            connection.close()
+
+    def test_local_server_unknown_route(self):
+        with RunningServer(1) as local_server:
+            connection = http.client.HTTPConnection("127.0.0.1", local_server.port)
+            connection.request("GET", "/")
+            response = connection.getresponse()
+
+            self.assertEqual(403, response.status)
+            self.assertEqual({"message": "Missing Authentication Token"}, json.loads(response.read()))
+
+            connection.close()
+
+    def test_local_server_bad_request(self):
+        with RunningServer(1) as local_server:
+            with socket.create_connection(("127.0.0.1", local_server.port)) as client:
+                client.sendall(b"POST / HTTP/1.1\r\nContent-Length: abc\r\n\r\n")
+                self.assertTrue(client.recv(1024).startswith(b"HTTP/1.1 400 Bad Request"))
+
+    def test_local_server_body_too_large(self):
+        with RunningServer(1) as local_server:
+            with socket.create_connection(("127.0.0.1", local_server.port)) as client:
+                client.sendall("POST / HTTP/1.1\r\nContent-Length: {}\r\n\r\n".format(MAX_BODY_SIZE + 1).encode())
+                self.assertTrue(client.recv(1024).startswith(b"HTTP/1.1 413 Request Entity Too Large"))
+
+    def test_local_server_header_too_large(self):
+        with RunningServer(1) as local_server:
+            with socket.create_connection(("127.0.0.1", local_server.port)) as client:
+                client.sendall(b"POST / HTTP/1.1\r\nX-Padding: " + b"x" * (1 << 17) + b"\r\n\r\n")
+                self.assertTrue(client.recv(1024).startswith(b"HTTP/1.1 431 Request Header Fields Too Large"))
+
+    def test_local_server_request_timeout(self):
+        request_timeout = local_server.REQUEST_TIMEOUT
+        local_server.REQUEST_TIMEOUT = 0.2
+
+        # A body that isn't sent in time is answered with a 408, the keep-alive timeout doesn't apply to it
+        try:
+            with RunningServer(1) as running_server:
+                with socket.create_connection(("127.0.0.1", running_server.port)) as client:
+                    client.sendall(b"POST / HTTP/1.1\r\nContent-Length: 10\r\n\r\n{}")
+                    self.assertTrue(client.recv(1024).startswith(b"HTTP/1.1 408 Request Timeout"))
+        finally:
+            local_server.REQUEST_TIMEOUT = request_timeout
+
+    def test_local_server_invalid_port(self):
+        self.assertRaises(ValueError, LocalServer, "127.0.0.1", 70000)
+
+unittest.main()
@@ -0,0 +1,123 @@
+from os.path import dirname
+import sys
+import unittest
+import io
+import json
+import contextlib
+
+# Ensure that we can import the metrics module
+sys.path.insert(0, dirname(dirname(__file__)))
+
+import metrics
+import result_cache
+from metrics import (
+    RequestMetrics,
+    start_request_metrics)
+from result_cache import ResultCache
+from lambda_function import lambda_handler
+
+# Prepare all data required for the tests
+proper_request_found = {"body": '{"device": {"coordinates": {"x": 0,"y": 0}},"linkStations": [{"coordinates": {"x": 0,"y": 0},"reach": 10}, {"coordinates": {"x": 20,"y": 20},"reach": 1}, {"coordinates": {"x": 10,"y": 0},"reach": 12}]}'}
+proper_request_found_expectation = {"statusCode": 200, "headers": {"Content-Type": "application/json"},"body": "{\"finding\": \"Best link station for point 0,0 is 0,0 with power 100.0\"}"}
+
+proper_embedded_metric_expectation = {
+    "_aws": {
+        "Timestamp": 1000,
+        "CloudWatchMetrics": [{
+            "Namespace": "LinkStation",
+            "Dimensions": [["mode"]],
+            "Metrics": [
+                {"Name": "json_loads", "Unit": "Milliseconds"},
+                {"Name": "selection", "Unit": "Milliseconds"},
+                {"Name": "total", "Unit": "Milliseconds"},
+                {"Name": "link_stations", "Unit": "Count"}
+            ]
+        }]
+    },
+    "mode": "batch",
+    "total": 3000.0,
+    "json_loads": 1000.0,
+    "selection": 2000.0,
+    "link_stations": 3
+}
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        self.now += 1.0
+        return self.now - 1.0
+
+class MetricsTests(unittest.TestCase):
+    def tearDown(self):
+        metrics.metrics_sample_rate = None
+        result_cache.result_cache = None
+
+    # Tests RequestMetrics
+    def test_request_metrics_embedded_metric(self):
+        request_metrics = RequestMetrics(clock=FakeClock())
+        request_metrics.mark("json_loads")
+        request_metrics.mark("selection")
+        request_metrics.mark("selection")
+        request_metrics.set("mode", "batch")
+        request_metrics.set("link_stations", 3)
+
+        self.assertEqual(proper_embedded_metric_expectation, request_metrics.to_embedded_metric(1000))
+
+    def test_request_metrics_counters(self):
+        request_metrics = RequestMetrics(clock=FakeClock())
+        request_metrics.start_counters({"cache_hits": 10, "cache_misses": 4})
+        request_metrics.set_counters({"cache_hits": 12, "cache_misses": 4, "cache_evictions": 1})
+
+        # Only the counts of the request itself are emitted
+        embedded_metric = request_metrics.to_embedded_metric(1000)
+        self.assertEqual((2, 0, 1), (embedded_metric["cache_hits"], embedded_metric["cache_misses"], embedded_metric["cache_evictions"]))
+
+    # Tests start_request_metrics
+    def test_start_request_metrics_disabled(self):
+        metrics.metrics_sample_rate = 0.0
+        self.assertIsNone(start_request_metrics())
+
+    def test_start_request_metrics_every_request(self):
+        metrics.metrics_sample_rate = 1.0
+        self.assertIsNotNone(start_request_metrics())
+
+    # Tests lambda_handler with metrics
+    def test_lambda_handler_emits_metrics(self):
+        metrics.metrics_sample_rate = 1.0
+        output = io.StringIO()
+
+        with contextlib.redirect_stdout(output):
+            self.assertEqual(proper_request_found_expectation, lambda_handler(proper_request_found, None))
+
+        embedded_metric = json.loads(output.getvalue())
+        self.assertEqual("single", embedded_metric["mode"])
+        self.assertEqual(3, embedded_metric["link_stations"])
+
+        for phase in ["json_loads", "parse_body", "selection", "json_dumps", "total"]:
+            self.assertGreaterEqual(embedded_metric[phase], 0.0)
+
+    def test_lambda_handler_emits_cache_counters_per_request(self):
+        metrics.metrics_sample_rate = 1.0
+        result_cache.result_cache = ResultCache()
+
+        for expected_counters in [(0, 1, 1), (1, 0, 1), (1, 0, 1)]:
+            output = io.StringIO()
+
+            with contextlib.redirect_stdout(output):
+                lambda_handler(proper_request_found, None)
+
+            embedded_metric = json.loads(output.getvalue())
+            self.assertEqual(expected_counters, (embedded_metric["cache_hits"], embedded_metric["cache_misses"], embedded_metric["cache_size"]))
+
+    def test_lambda_handler_without_metrics(self):
+        metrics.metrics_sample_rate = 0.0
+        output = io.StringIO()
+
+        with contextlib.redirect_stdout(output):
+            lambda_handler(proper_request_found, None)
+
+        self.assertEqual("", output.getvalue())
+
+unittest.main()
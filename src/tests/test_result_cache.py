@@ -0,0 +1,195 @@
+from os.path import dirname
+import contextlib
+import io
+import json
+import os
+import sys
+import unittest
+from array import array
+
+# Ensure that we can import the result cache module
+sys.path.insert(0, dirname(dirname(__file__)))
+
+import result_cache
+from result_cache import (
+    ResultCache,
+    CACHE_SIZE_VARIABLE,
+    CACHE_TTL_VARIABLE,
+    get_result_cache,
+    get_link_station_fingerprint)
+import lambda_function
+from lambda_function import lambda_handler
+
+# Prepare all data required for the tests
+proper_link_station_arrays = (array('q', [0, 20, 10]), array('q', [0, 20, 0]), array('q', [10, 1, 12]))
+changed_link_station_arrays = (array('q', [0, 20, 10]), array('q', [0, 20, 0]), array('q', [10, 1, 13]))
+
+proper_device_coordinates = (0, 0)
+proper_most_suitable_link_station = (0, 0, 100.0)
+
+proper_request_found = {"body": '{"device": {"coordinates": {"x": 0,"y": 0}},"linkStations": [{"coordinates": {"x": 0,"y": 0},"reach": 10}, {"coordinates": {"x": 20,"y": 20},"reach": 1}, {"coordinates": {"x": 10,"y": 0},"reach": 12}]}'}
+proper_request_found_expectation = {"statusCode": 200, "headers": {"Content-Type": "application/json"},"body": "{\"finding\": \"Best link station for point 0,0 is 0,0 with power 100.0\"}"}
+
+proper_batch_request_found = {"body": '{"devices": [{"coordinates": {"x": 0,"y": 0}}, {"coordinates": {"x": 15,"y": 0}}],"linkStations": [{"coordinates": {"x": 0,"y": 0},"reach": 10}, {"coordinates": {"x": 20,"y": 20},"reach": 1}, {"coordinates": {"x": 10,"y": 0},"reach": 12}]}'}
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class ResultCacheTests(unittest.TestCase):
+    def tearDown(self):
+        result_cache.result_cache = None
+        result_cache.invalid_cache_configuration = None
+
+    # Tests get_link_station_fingerprint
+    def test_get_link_station_fingerprint_same_content(self):
+        copied_link_station_arrays = tuple(array('q', values) for values in proper_link_station_arrays)
+        self.assertEqual(get_link_station_fingerprint(proper_link_station_arrays), get_link_station_fingerprint(copied_link_station_arrays))
+
+    def test_get_link_station_fingerprint_changed_content(self):
+        self.assertNotEqual(get_link_station_fingerprint(proper_link_station_arrays), get_link_station_fingerprint(changed_link_station_arrays))
+
+    # Tests ResultCache
+    def test_result_cache_hit(self):
+        cache = ResultCache()
+        fingerprint = get_link_station_fingerprint(proper_link_station_arrays)
+
+        self.assertIsNone(cache.get(fingerprint, proper_device_coordinates))
+        cache.put(fingerprint, proper_device_coordinates, proper_most_suitable_link_station)
+        self.assertEqual(proper_most_suitable_link_station, cache.get(fingerprint, proper_device_coordinates))
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(1, cache.misses)
+
+    def test_result_cache_keyed_by_link_stations(self):
+        cache = ResultCache()
+        fingerprint = get_link_station_fingerprint(proper_link_station_arrays)
+        changed_fingerprint = get_link_station_fingerprint(changed_link_station_arrays)
+
+        cache.put(fingerprint, proper_device_coordinates, proper_most_suitable_link_station)
+        self.assertIsNone(cache.get(changed_fingerprint, proper_device_coordinates))
+
+        # Alternating link station sets keep the results of both
+        cache.put(changed_fingerprint, proper_device_coordinates, (0, 0, 0.0))
+        self.assertEqual(proper_most_suitable_link_station, cache.get(fingerprint, proper_device_coordinates))
+        self.assertEqual((0, 0, 0.0), cache.get(changed_fingerprint, proper_device_coordinates))
+        self.assertEqual(2, cache.get_statistics()["size"])
+        self.assertEqual(0, cache.invalidations)
+
+    def test_link_station_fingerprint_values_out_of_range(self):
+        link_station_arrays = ([0, 1 << 64], [0, 0], [10, 10])
+        self.assertEqual(get_link_station_fingerprint(link_station_arrays), get_link_station_fingerprint(([0, 1 << 64], [0, 0], [10, 10])))
+        self.assertNotEqual(get_link_station_fingerprint(link_station_arrays), get_link_station_fingerprint(([0, 1 << 65], [0, 0], [10, 10])))
+
+    def test_result_cache_size_eviction(self):
+        cache = ResultCache(max_size=2)
+        cache.get("fingerprint", (0, 0))
+
+        for device_coordinates in [(0, 0), (1, 1), (2, 2)]:
+            cache.put("fingerprint", device_coordinates, proper_most_suitable_link_station)
+
+        self.assertIsNone(cache.get("fingerprint", (0, 0)))
+        self.assertEqual(proper_most_suitable_link_station, cache.get("fingerprint", (2, 2)))
+        self.assertEqual(1, cache.evictions)
+
+    def test_result_cache_ttl_eviction(self):
+        clock = FakeClock()
+        cache = ResultCache(ttl=10, clock=clock)
+        cache.get("fingerprint", (0, 0))
+        cache.put("fingerprint", (0, 0), proper_most_suitable_link_station)
+
+        clock.now = 9.0
+        self.assertEqual(proper_most_suitable_link_station, cache.get("fingerprint", (0, 0)))
+
+        clock.now = 10.0
+        self.assertIsNone(cache.get("fingerprint", (0, 0)))
+
+    def test_result_cache_invalid_size(self):
+        self.assertRaises(ValueError, ResultCache, 0)
+
+    def test_result_cache_invalid_ttl(self):
+        self.assertRaises(ValueError, ResultCache, 10, -1)
+
+    # Tests lambda_handler with the cache
+    def test_lambda_handler_serves_repeat_query_from_cache(self):
+        result_cache.result_cache = ResultCache()
+        self.assertEqual(proper_request_found_expectation, lambda_handler(proper_request_found, None))
+
+        # The distance and power math must not be used for the repeat query
+        calculate_distance = lambda_function.calculate_distance
+        get_most_suitable_link_station_from_arrays = lambda_function.get_most_suitable_link_station_from_arrays
+        lambda_function.calculate_distance = None
+        lambda_function.get_most_suitable_link_station_from_arrays = None
+
+        try:
+            self.assertEqual(proper_request_found_expectation, lambda_handler(proper_request_found, None))
+        finally:
+            lambda_function.calculate_distance = calculate_distance
+            lambda_function.get_most_suitable_link_station_from_arrays = get_most_suitable_link_station_from_arrays
+
+        self.assertEqual(1, result_cache.result_cache.hits)
+
+    def test_lambda_handler_batch_results_not_served_to_single_requests(self):
+        result_cache.result_cache = ResultCache()
+        self.assertEqual(200, lambda_handler(proper_batch_request_found, None)["statusCode"])
+
+        # The same device and link station set, but the single request calculates its own result
+        self.assertEqual(proper_request_found_expectation, lambda_handler(proper_request_found, None))
+        self.assertEqual(0, result_cache.result_cache.hits)
+        self.assertEqual(3, result_cache.result_cache.get_statistics()["size"])
+
+        # A repeat batch request is served from the batch results
+        self.assertEqual(json.loads(lambda_handler(proper_batch_request_found, None)["body"])["findings"][0], json.loads(proper_request_found_expectation["body"])["finding"])
+        self.assertEqual(2, result_cache.result_cache.hits)
+
+    def test_lambda_handler_invalid_ranking_rejected_before_cache(self):
+        result_cache.result_cache = ResultCache()
+
+        # The ranking is validated with the rest of the body, so nothing is scored or cached for it
+        for ranking in ['"top": 0', '"minPower": NaN', '"minPower": Infinity']:
+            for request in [proper_request_found, proper_batch_request_found]:
+                body = request["body"][:-1] + ", " + ranking + "}"
+                self.assertRaises(ValueError, lambda_handler, {"body": body}, None)
+
+        self.assertEqual(0, result_cache.result_cache.misses)
+        self.assertEqual(0, result_cache.result_cache.get_statistics()["size"])
+
+    # Tests get_result_cache
+    def test_get_result_cache_disabled_by_default(self):
+        cache_size = os.environ.pop(CACHE_SIZE_VARIABLE, None)
+
+        try:
+            self.assertIsNone(get_result_cache())
+        finally:
+            if cache_size is not None:
+                os.environ[CACHE_SIZE_VARIABLE] = cache_size
+
+    def test_get_result_cache_enabled(self):
+        os.environ[CACHE_SIZE_VARIABLE] = "16"
+
+        try:
+            self.assertEqual(16, get_result_cache().max_size)
+        finally:
+            del os.environ[CACHE_SIZE_VARIABLE]
+
+    def test_get_result_cache_invalid_configuration_disables_cache(self):
+        for cache_size, cache_ttl in [("-1", "300"), ("1.5", "300"), ("many", "300"), ("16", "0"), ("16", "nan")]:
+            os.environ[CACHE_SIZE_VARIABLE] = cache_size
+            os.environ[CACHE_TTL_VARIABLE] = cache_ttl
+
+            try:
+                with contextlib.redirect_stderr(io.StringIO()) as log:
+                    self.assertIsNone(get_result_cache())
+                    self.assertIsNone(get_result_cache())
+
+                    # Requests are still answered, and the configuration is only logged once
+                    self.assertEqual(proper_request_found_expectation, lambda_handler(proper_request_found, None))
+
+                self.assertEqual(1, log.getvalue().count("Result cache disabled"))
+            finally:
+                del os.environ[CACHE_SIZE_VARIABLE]
+                del os.environ[CACHE_TTL_VARIABLE]
+
+unittest.main()
@@ -0,0 +1,162 @@
+from os.path import dirname
+from decimal import Decimal, getcontext
+import random
+import sys
+import unittest
+
+# Ensure that we can import the scoring module
+sys.path.insert(0, dirname(dirname(__file__)))
+
+import scoring
+from scoring import (
+    score_link_station,
+    compare_link_station_powers,
+    get_most_suitable_link_station_scored,
+    get_most_suitable_link_station_scored_from_arrays,
+    get_most_suitable_link_stations_scored)
+from body_parser import compile_link_stations
+from reference import (
+    proper_link_stations,
+    proper_devices_coordinates,
+    tied_link_stations,
+    tied_devices_coordinates,
+    random_link_stations,
+    random_devices_coordinates,
+    get_reference_power,
+    get_reference_most_suitable_link_station)
+
+generator = random.Random(18)
+
+# Link stations with a large reach, of which the squared values don't fit in a float exactly (but do fit in int64)
+large_link_stations = [[generator.randint(-5 * 10 ** 8, 5 * 10 ** 8), generator.randint(-5 * 10 ** 8, 5 * 10 ** 8), generator.randint(10 ** 8, 10 ** 9)] for _ in range(100)]
+large_devices_coordinates = [(generator.randint(-5 * 10 ** 8, 5 * 10 ** 8), generator.randint(-5 * 10 ** 8, 5 * 10 ** 8)) for _ in range(100)]
+
+# Two link stations with a different power for the device (0, 0), which rounds to the same float
+false_tie_link_stations = [[3673056, 2, 4700336], [3673057, 2, 4700337]]
+
+# Two link stations of which the float difference between reach and distance is far off for the device (0, 0)
+cancelling_link_stations = [[984462161, 68, 984462163], [984462162, 68, 984462164]]
+
+# Families of link stations with a large reach and nearly equal power for the device (0, 0)
+near_tie_link_stations = []
+
+for _ in range(50):
+    distance, offset, slack = generator.randint(10 ** 8, 10 ** 9), generator.randint(0, 3000), generator.randint(1, 3)
+    near_tie_link_stations.extend([[distance + step, offset, distance + step + slack] for step in range(4)])
+
+getcontext().prec = 80
+
+def get_exact_power(distance_squared, reach):
+    return (reach - Decimal(distance_squared).sqrt()) ** 2
+
+class ScoringTests(unittest.TestCase):
+    # Tests score_link_station
+    def test_score_link_station_matches_power(self):
+        for link_stations, devices_coordinates in [(random_link_stations, random_devices_coordinates), (large_link_stations, large_devices_coordinates)]:
+            for device_x, device_y in devices_coordinates[:50]:
+                for x, y, reach in link_stations:
+                    self.assertEqual(get_reference_power((device_x, device_y), [x, y, reach]), score_link_station(device_x - x, device_y - y, reach))
+
+    def test_score_link_station_on_the_edge(self):
+        self.assertEqual(0.0, score_link_station(6, 8, 10))
+        self.assertEqual(0.0, score_link_station(0, 0, 0))
+        self.assertEqual(0.0, score_link_station(0, 0, -5))
+        self.assertEqual(100.0, score_link_station(0, 0, 10))
+
+    # Tests compare_link_station_powers
+    def test_compare_link_station_powers_matches_exact_math(self):
+        for _ in range(2000):
+            reach_a, reach_b = generator.randint(1, 40), generator.randint(1, 40)
+            distance_squared_a, distance_squared_b = generator.randint(0, reach_a * reach_a - 1), generator.randint(0, reach_b * reach_b - 1)
+
+            # Exactly equal powers are common with small integers, and are compared as well
+            power_a, power_b = get_exact_power(distance_squared_a, reach_a), get_exact_power(distance_squared_b, reach_b)
+            expected = (power_a > power_b) - (power_a < power_b)
+
+            self.assertEqual(expected, compare_link_station_powers(distance_squared_a, reach_a, distance_squared_b, reach_b))
+
+    def test_compare_link_station_powers_equal(self):
+        self.assertEqual(0, compare_link_station_powers(9, 5, 0, 2))
+        self.assertEqual(0, compare_link_station_powers(0, 2, 9, 5))
+        self.assertEqual(0, compare_link_station_powers(16, 7, 16, 7))
+
+    # Tests get_most_suitable_link_station_scored
+    def test_get_most_suitable_link_station_scored_matches_linear_scan(self):
+        for link_stations, devices_coordinates in [(proper_link_stations, proper_devices_coordinates), (tied_link_stations, tied_devices_coordinates), (random_link_stations, random_devices_coordinates), (large_link_stations, large_devices_coordinates)]:
+            for device_coordinates in devices_coordinates:
+                self.assertEqual(get_reference_most_suitable_link_station(device_coordinates, link_stations), get_most_suitable_link_station_scored(device_coordinates, link_stations))
+
+    def test_get_most_suitable_link_station_scored_exact(self):
+        # The float powers are equal, so the first link station is the most suitable one, but not exactly
+        self.assertEqual(get_reference_power((0, 0), false_tie_link_stations[0]), get_reference_power((0, 0), false_tie_link_stations[1]))
+        self.assertLess(get_exact_power(3673056 ** 2 + 4, 4700336), get_exact_power(3673057 ** 2 + 4, 4700337))
+
+        self.assertEqual(3673056, get_most_suitable_link_station_scored((0, 0), false_tie_link_stations)[0])
+        self.assertEqual(3673057, get_most_suitable_link_station_scored((0, 0), false_tie_link_stations, True)[0])
+
+    def test_get_most_suitable_link_station_scored_exact_ties(self):
+        # Exactly equal powers are still resolved in input order
+        for device_coordinates in tied_devices_coordinates:
+            self.assertEqual(get_reference_most_suitable_link_station(device_coordinates, tied_link_stations), get_most_suitable_link_station_scored(device_coordinates, tied_link_stations, True))
+
+    def test_get_most_suitable_link_station_scored_invalid_exact(self):
+        self.assertRaises(ValueError, get_most_suitable_link_station_scored, (0, 0), proper_link_stations, 1)
+
+    def test_get_most_suitable_link_station_scored_invalid_link_stations(self):
+        self.assertRaises(ValueError, get_most_suitable_link_station_scored, (0, 0), [[0, 0, 1.5]])
+
+    # Tests get_most_suitable_link_station_scored_from_arrays
+    def test_get_most_suitable_link_station_scored_from_arrays_indices(self):
+        link_station_arrays = compile_link_stations(random_link_stations)
+
+        for device_coordinates in random_devices_coordinates:
+            self.assertEqual(get_reference_most_suitable_link_station(device_coordinates, random_link_stations[100:]), get_most_suitable_link_station_scored_from_arrays(device_coordinates, link_station_arrays, False, range(100, 200)))
+
+    # Tests get_most_suitable_link_stations_scored
+    def test_get_most_suitable_link_stations_scored_matches_linear_scan(self):
+        for link_stations, devices_coordinates in [(tied_link_stations, tied_devices_coordinates), (random_link_stations, random_devices_coordinates), (large_link_stations, large_devices_coordinates)]:
+            expected = [get_reference_most_suitable_link_station(device_coordinates, link_stations) for device_coordinates in devices_coordinates]
+
+            # A small matrix splits both the devices and the link stations in chunks
+            for max_matrix_size in [1, 97, 1 << 18]:
+                self.assertEqual(expected, get_most_suitable_link_stations_scored(devices_coordinates, compile_link_stations(link_stations), False, max_matrix_size))
+
+    def test_get_most_suitable_link_stations_scored_large_coordinates(self):
+        # Coordinates and reaches outside of the int64 range of NumPy are scored by the scalar kernel
+        link_stations = [[5, 0, 10], [2 ** 32, 0, 10], [2 ** 31, -2 ** 31, 2 ** 31]]
+        devices_coordinates = [(0, 0), (2 ** 32, 5), (2 ** 31 + 100, -2 ** 31 + 100), (2 ** 70, 0)]
+        expected = [get_reference_most_suitable_link_station(device_coordinates, link_stations) for device_coordinates in devices_coordinates]
+
+        self.assertEqual(expected, get_most_suitable_link_stations_scored(devices_coordinates, compile_link_stations(link_stations)))
+        self.assertEqual(expected[:3], get_most_suitable_link_stations_scored(devices_coordinates[:3], compile_link_stations(link_stations)))
+
+    def test_get_most_suitable_link_stations_scored_exact(self):
+        self.assertEqual([(3673057, 2, get_reference_power((0, 0), false_tie_link_stations[0]))], get_most_suitable_link_stations_scored([(0, 0)], compile_link_stations(false_tie_link_stations), True))
+
+    def test_get_most_suitable_link_stations_scored_exact_large_reach(self):
+        self.assertEqual([get_most_suitable_link_station_scored((0, 0), cancelling_link_stations, True)], get_most_suitable_link_stations_scored([(0, 0)], compile_link_stations(cancelling_link_stations), True))
+        self.assertEqual(984462162, get_most_suitable_link_stations_scored([(0, 0)], compile_link_stations(cancelling_link_stations), True)[0][0])
+
+        # Every family on its own, and all families at once
+        for start in range(0, len(near_tie_link_stations), 4):
+            link_stations = near_tie_link_stations[start:start + 4]
+            self.assertEqual([get_most_suitable_link_station_scored((0, 0), link_stations, True)], get_most_suitable_link_stations_scored([(0, 0)], compile_link_stations(link_stations), True))
+
+        devices_coordinates = [(0, 0), (1, 0), (0, -1)]
+        self.assertEqual([get_most_suitable_link_station_scored(device_coordinates, near_tie_link_stations, True) for device_coordinates in devices_coordinates],
+            get_most_suitable_link_stations_scored(devices_coordinates, compile_link_stations(near_tie_link_stations), True, 7))
+
+    def test_get_most_suitable_link_stations_scored_without_numpy(self):
+        numpy = scoring.numpy
+        scoring.numpy = None
+
+        try:
+            expected = [get_reference_most_suitable_link_station(device_coordinates, random_link_stations) for device_coordinates in random_devices_coordinates]
+            self.assertEqual(expected, get_most_suitable_link_stations_scored(random_devices_coordinates, compile_link_stations(random_link_stations)))
+        finally:
+            scoring.numpy = numpy
+
+    def test_get_most_suitable_link_stations_scored_invalid_max_matrix_size(self):
+        self.assertRaises(ValueError, get_most_suitable_link_stations_scored, proper_devices_coordinates, compile_link_stations(proper_link_stations), False, 0)
+
+unittest.main()
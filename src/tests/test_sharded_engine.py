@@ -0,0 +1,63 @@
+from os.path import dirname
+import sys
+import unittest
+
+# Ensure that we can import the sharded engine module
+sys.path.insert(0, dirname(dirname(__file__)))
+
+import sharded_engine
+from sharded_engine import ShardedEngine
+from body_parser import compile_link_stations
+from reference import (
+    proper_link_stations,
+    proper_devices_coordinates,
+    tied_link_stations,
+    tied_devices_coordinates,
+    random_link_stations,
+    random_devices_coordinates,
+    get_reference_most_suitable_link_station)
+
+class ShardedEngineTests(unittest.TestCase):
+    def assertMatchesReference(self, link_stations, devices_coordinates, workers, shards, chunk_size=4096):
+        with ShardedEngine(compile_link_stations(link_stations), workers, shards, chunk_size) as engine:
+            self.assertEqual(
+                [get_reference_most_suitable_link_station(device_coordinates, link_stations) for device_coordinates in devices_coordinates],
+                engine.get_most_suitable_link_stations(devices_coordinates))
+
+    # Tests ShardedEngine
+    def test_sharded_engine_single_worker(self):
+        self.assertMatchesReference(proper_link_stations, proper_devices_coordinates, 1, 2)
+        self.assertMatchesReference(tied_link_stations, tied_devices_coordinates, 1, 6)
+        self.assertMatchesReference(random_link_stations, random_devices_coordinates, 1, 7, 16)
+
+    def test_sharded_engine_process_pool(self):
+        self.assertMatchesReference(tied_link_stations, tied_devices_coordinates, 2, 4)
+        self.assertMatchesReference(random_link_stations, random_devices_coordinates, 3, 8, 50)
+
+    def test_sharded_engine_without_numpy(self):
+        numpy = sharded_engine.numpy
+        sharded_engine.numpy = None
+
+        try:
+            self.assertMatchesReference(tied_link_stations, tied_devices_coordinates, 1, 3)
+            self.assertMatchesReference(random_link_stations, random_devices_coordinates, 1, 5, 30)
+        finally:
+            sharded_engine.numpy = numpy
+
+    def test_sharded_engine_more_shards_than_link_stations(self):
+        self.assertMatchesReference(proper_link_stations, proper_devices_coordinates, 1, 10)
+
+    def test_sharded_engine_invalid_devices_coordinates(self):
+        with ShardedEngine(compile_link_stations(proper_link_stations), 1) as engine:
+            self.assertRaises(ValueError, engine.get_most_suitable_link_stations, [[0, 0]])
+
+    def test_sharded_engine_link_station_values_out_of_range(self):
+        self.assertRaises(ValueError, ShardedEngine, compile_link_stations(proper_link_stations + [[1 << 63, 0, 10]]), 1)
+
+    def test_sharded_engine_invalid_shards(self):
+        self.assertRaises(ValueError, ShardedEngine, compile_link_stations(proper_link_stations), 1, 0)
+
+    def test_sharded_engine_invalid_workers(self):
+        self.assertRaises(ValueError, ShardedEngine, compile_link_stations(proper_link_stations), 0)
+
+unittest.main()
@@ -0,0 +1,83 @@
+from os.path import dirname
+import sys
+import unittest
+import random
+
+# Ensure that we can import the spatial index module
+sys.path.insert(0, dirname(dirname(__file__)))
+
+from spatial_index import LinkStationGrid
+from lambda_function import (
+    get_most_suitable_link_station_indexed,
+    get_ranked_link_stations_indexed)
+from reference import (
+    generate_link_stations,
+    get_reference_most_suitable_link_station,
+    get_reference_ranked_link_stations)
+
+# Prepare all data required for the tests
+proper_device_coordinates = (12, 25)
+proper_link_stations = [[10, 10, 20], [3, 3, 2], [11, 14, 20]]
+proper_most_suitable_link_station_expectation = (11, 14, 80.18555931250957)
+
+unreachable_device_coordinates = (-500, 400)
+
+equal_power_link_stations = [[10, 0, 10], [0, 10, 10], [-10, 0, 10]]
+equal_power_device_coordinates = (0, 0)
+
+class SpatialIndexTests(unittest.TestCase):
+    # Tests LinkStationGrid
+    def test_link_station_grid_default_cell_size(self):
+        self.assertEqual(20, LinkStationGrid(proper_link_stations).cell_size)
+
+    def test_link_station_grid_invalid_cell_size(self):
+        self.assertRaises(ValueError, LinkStationGrid, proper_link_stations, 0)
+
+    def test_link_station_grid_invalid_link_stations(self):
+        self.assertRaises(ValueError, LinkStationGrid, [])
+
+    def test_link_station_grid_query_invalid_device_coordinates(self):
+        self.assertRaises(ValueError, LinkStationGrid(proper_link_stations).query, [12, 25])
+
+    def test_link_station_grid_query_empty_cell(self):
+        self.assertEqual([], LinkStationGrid(proper_link_stations).query(unreachable_device_coordinates))
+
+    # Tests get_most_suitable_link_station_indexed
+    def test_get_most_suitable_link_station_indexed_proper_request(self):
+        self.assertEqual(proper_most_suitable_link_station_expectation,
+            get_most_suitable_link_station_indexed(proper_device_coordinates, LinkStationGrid(proper_link_stations)))
+
+    def test_get_most_suitable_link_station_indexed_not_found(self):
+        self.assertEqual((0, 0, 0.0),
+            get_most_suitable_link_station_indexed(unreachable_device_coordinates, LinkStationGrid(proper_link_stations)))
+
+    def test_get_most_suitable_link_station_indexed_keeps_first_on_equal_power(self):
+        self.assertEqual(get_reference_most_suitable_link_station(equal_power_device_coordinates, equal_power_link_stations),
+            get_most_suitable_link_station_indexed(equal_power_device_coordinates, LinkStationGrid(equal_power_link_stations)))
+
+    def test_get_most_suitable_link_station_indexed_matches_reference(self):
+        link_stations = generate_link_stations(7, 500, 1000, 150)
+        generator = random.Random(11)
+
+        for cell_size in [None, 25, 5000]:
+            link_station_grid = LinkStationGrid(link_stations, cell_size)
+
+            for _ in range(200):
+                device_coordinates = (generator.randint(-1200, 1200), generator.randint(-1200, 1200))
+                self.assertEqual(get_reference_most_suitable_link_station(device_coordinates, link_stations),
+                    get_most_suitable_link_station_indexed(device_coordinates, link_station_grid))
+
+    # Tests get_ranked_link_stations_indexed
+    def test_get_ranked_link_stations_indexed_matches_reference(self):
+        link_stations = generate_link_stations(13, 300, 500, 120)
+        link_station_grid = LinkStationGrid(link_stations)
+        generator = random.Random(17)
+
+        for _ in range(100):
+            device_coordinates = (generator.randint(-600, 600), generator.randint(-600, 600))
+            self.assertEqual(get_reference_ranked_link_stations(device_coordinates, link_stations, 3),
+                get_ranked_link_stations_indexed(device_coordinates, link_station_grid, 3))
+            self.assertEqual(get_reference_ranked_link_stations(device_coordinates, link_stations, None, 10.0),
+                get_ranked_link_stations_indexed(device_coordinates, link_station_grid, None, 10.0))
+
+unittest.main()
@@ -0,0 +1,149 @@
+from os.path import dirname
+import os
+import sys
+import unittest
+import json
+import tempfile
+import types
+
+# Ensure that we can import the station registry module
+sys.path.insert(0, dirname(dirname(__file__)))
+
+import station_registry
+from station_registry import (
+    LinkStationRegistry,
+    REGISTRY_SOURCE_VARIABLE,
+    REGISTRY_VERSION_VARIABLE,
+    load_s3_registry_document)
+from lambda_function import lambda_handler
+
+# Prepare all data required for the tests
+proper_registry_documents = {
+    "v1": {"linkStations": [{"coordinates": {"x": 0,"y": 0},"reach": 10}, {"coordinates": {"x": 20,"y": 20},"reach": 1}, {"coordinates": {"x": 10,"y": 0},"reach": 12}]},
+    "v2": {"linkStations": [{"coordinates": {"x": 20,"y": 20},"reach": 1}, {"coordinates": {"x": 10,"y": 0},"reach": 12}]},
+    "broken": {"linkStations": [{"coordinates": {"x": 20,"y": 20}}]}
+}
+proper_registry_link_station_arrays_v1 = ([0, 20, 10], [0, 20, 0], [10, 1, 12])
+
+proper_registry_request = {"body": '{"device": {"coordinates": {"x": 0,"y": 0}}}'}
+proper_registry_request_expectation = {"statusCode": 200, "headers": {"Content-Type": "application/json"},"body": "{\"finding\": \"Best link station for point 0,0 is 0,0 with power 100.0\"}"}
+
+proper_registry_versioned_request = {"body": '{"device": {"coordinates": {"x": 0,"y": 0}}, "registryVersion": "v2"}'}
+proper_registry_versioned_request_expectation = {"statusCode": 200, "headers": {"Content-Type": "application/json"},"body": "{\"finding\": \"Best link station for point 0,0 is 10,0 with power 4.0\"}"}
+
+proper_registry_batch_request = {"body": '{"devices": [{"coordinates": {"x": 0,"y": 0}}, {"coordinates": {"x": 100,"y": 100}}]}'}
+proper_registry_batch_request_expectation = {"statusCode": 200, "headers": {"Content-Type": "application/json"},"body": "{\"findings\": [\"Best link station for point 0,0 is 0,0 with power 100.0\", \"No link station within reach for point 100,100\"]}"}
+
+proper_inline_request = {"body": '{"device": {"coordinates": {"x": 0,"y": 0}},"linkStations": [{"coordinates": {"x": 10,"y": 0},"reach": 12}]}'}
+proper_inline_request_expectation = {"statusCode": 200, "headers": {"Content-Type": "application/json"},"body": "{\"finding\": \"Best link station for point 0,0 is 10,0 with power 4.0\"}"}
+
+invalid_registry_version_request = {"body": '{"device": {"coordinates": {"x": 0,"y": 0}}, "registryVersion": "../v1"}'}
+
+class StationRegistryTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+        for version, document in proper_registry_documents.items():
+            with open(os.path.join(self.directory.name, "{}.json".format(version)), "w") as document_file:
+                json.dump(document, document_file)
+
+    def tearDown(self):
+        station_registry.link_station_registry = None
+        self.directory.cleanup()
+
+    # Tests LinkStationRegistry
+    def test_link_station_registry_loads_default_version(self):
+        link_station_registry = LinkStationRegistry(self.directory.name, "v1")
+        link_station_arrays = link_station_registry.get().link_station_arrays
+        self.assertEqual(proper_registry_link_station_arrays_v1, tuple(list(values) for values in link_station_arrays))
+
+    def test_link_station_registry_loads_once_per_version(self):
+        link_station_registry = LinkStationRegistry(self.directory.name, "v1")
+        link_station_registry.get()
+        link_station_registry.get("v1")
+        self.assertEqual(1, link_station_registry.loads)
+
+        link_station_registry.get("v2")
+        self.assertEqual(2, link_station_registry.loads)
+        self.assertEqual("v2", link_station_registry.version)
+
+    def test_link_station_registry_invalid_source(self):
+        self.assertRaises(ValueError, LinkStationRegistry, "", "v1")
+
+    def test_link_station_registry_invalid_version(self):
+        self.assertRaises(ValueError, LinkStationRegistry(self.directory.name, "v1").get, "../v1")
+
+    def test_link_station_registry_invalid_document_keeps_current_version(self):
+        link_station_registry = LinkStationRegistry(self.directory.name, "v1")
+        link_station_grid = link_station_registry.get()
+
+        self.assertRaises(ValueError, link_station_registry.get, "broken")
+        self.assertEqual("v1", link_station_registry.version)
+        self.assertIs(link_station_grid, link_station_registry.link_station_grid)
+
+    # Tests lambda_handler with the registry
+    def test_lambda_handler_registry_request(self):
+        station_registry.link_station_registry = LinkStationRegistry(self.directory.name, "v1")
+        self.assertEqual(proper_registry_request_expectation, lambda_handler(proper_registry_request, None))
+
+    def test_lambda_handler_registry_versioned_request(self):
+        station_registry.link_station_registry = LinkStationRegistry(self.directory.name, "v1")
+        self.assertEqual(proper_registry_versioned_request_expectation, lambda_handler(proper_registry_versioned_request, None))
+
+    def test_lambda_handler_registry_batch_request(self):
+        station_registry.link_station_registry = LinkStationRegistry(self.directory.name, "v1")
+        self.assertEqual(proper_registry_batch_request_expectation, lambda_handler(proper_registry_batch_request, None))
+
+    def test_lambda_handler_registry_invalid_version(self):
+        station_registry.link_station_registry = LinkStationRegistry(self.directory.name, "v1")
+        self.assertRaises(ValueError, lambda_handler, invalid_registry_version_request, None)
+
+    def test_lambda_handler_without_registry(self):
+        self.assertRaises(ValueError, lambda_handler, proper_registry_request, None)
+
+    def test_lambda_handler_invalid_registry_configuration_only_affects_registry_requests(self):
+        os.environ[REGISTRY_SOURCE_VARIABLE] = self.directory.name
+        os.environ[REGISTRY_VERSION_VARIABLE] = "../v1"
+
+        try:
+            self.assertEqual(proper_inline_request_expectation, lambda_handler(proper_inline_request, None))
+            self.assertRaises(ValueError, lambda_handler, proper_registry_request, None)
+        finally:
+            del os.environ[REGISTRY_SOURCE_VARIABLE]
+            del os.environ[REGISTRY_VERSION_VARIABLE]
+
+    # Tests load_s3_registry_document
+    def test_load_s3_registry_document_unknown_version(self):
+        class ClientError(Exception):
+            def __init__(self, code):
+                self.response = {"Error": {"Code": code}}
+
+        class FakeS3Client:
+            def __init__(self, code):
+                self.code = code
+
+            def get_object(self, Bucket, Key):
+                raise ClientError(self.code)
+
+        # A fake of the S3 client, which answers every object with the given error
+        modules = {name: sys.modules.get(name) for name in ["boto3", "botocore", "botocore.exceptions"]}
+        sys.modules["boto3"] = types.ModuleType("boto3")
+        sys.modules["botocore"] = types.ModuleType("botocore")
+        sys.modules["botocore.exceptions"] = types.ModuleType("botocore.exceptions")
+        sys.modules["botocore.exceptions"].ClientError = ClientError
+
+        try:
+            sys.modules["boto3"].client = lambda service: FakeS3Client("NoSuchKey")
+            self.assertRaises(ValueError, load_s3_registry_document, "s3://bucket/registry/", "v3")
+
+            # Other errors, like missing permissions, are not hidden
+            sys.modules["boto3"].client = lambda service: FakeS3Client("AccessDenied")
+            self.assertRaises(ClientError, load_s3_registry_document, "s3://bucket/registry/", "v3")
+        finally:
+            for name, module in modules.items():
+                if module is None:
+                    del sys.modules[name]
+                else:
+                    sys.modules[name] = module
+
+unittest.main()
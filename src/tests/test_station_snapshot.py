@@ -0,0 +1,151 @@
+from os.path import dirname
+import os
+import sys
+import unittest
+import json
+import random
+import tempfile
+
+# Ensure that we can import the station snapshot module
+sys.path.insert(0, dirname(dirname(__file__)))
+
+from body_parser import compile_link_stations
+from station_snapshot import (
+    SNAPSHOT_HEADER,
+    LinkStationSnapshot,
+    build_snapshot,
+    write_snapshot,
+    load_snapshot)
+from station_registry import LinkStationRegistry
+from lambda_function import (
+    get_most_suitable_link_station_indexed,
+    get_ranked_link_stations_indexed)
+from reference import (
+    generate_link_stations,
+    get_reference_most_suitable_link_station,
+    get_reference_ranked_link_stations)
+
+# Prepare all data required for the tests
+proper_link_stations = [[0, 0, 10], [20, 20, 1], [10, 0, 12]]
+proper_document = {"linkStations": [{"coordinates": {"x": 0,"y": 0},"reach": 10}, {"coordinates": {"x": 20,"y": 20},"reach": 1}, {"coordinates": {"x": 10,"y": 0},"reach": 12}]}
+
+class StationSnapshotTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    # Tests build_snapshot and load_snapshot
+    def test_snapshot_keeps_link_stations(self):
+        link_station_snapshot = LinkStationSnapshot(build_snapshot(compile_link_stations(proper_link_stations)))
+        self.assertEqual(([0, 20, 10], [0, 20, 0], [10, 1, 12]), tuple(list(values) for values in link_station_snapshot.link_station_arrays))
+        self.assertEqual(12, link_station_snapshot.cell_size)
+
+    def test_snapshot_matches_reference(self):
+        link_stations = generate_link_stations(19, 1000, 800, 100)
+        snapshot_path = os.path.join(self.directory.name, "test.snapshot")
+
+        with open(snapshot_path, "wb") as snapshot_file:
+            snapshot_file.write(build_snapshot(compile_link_stations(link_stations)))
+
+        link_station_snapshot = load_snapshot(snapshot_path)
+        generator = random.Random(23)
+
+        for _ in range(300):
+            device_coordinates = (generator.randint(-900, 900), generator.randint(-900, 900))
+            self.assertEqual(get_reference_most_suitable_link_station(device_coordinates, link_stations),
+                get_most_suitable_link_station_indexed(device_coordinates, link_station_snapshot))
+            self.assertEqual(get_reference_ranked_link_stations(device_coordinates, link_stations, 3),
+                get_ranked_link_stations_indexed(device_coordinates, link_station_snapshot, 3))
+
+        link_station_snapshot.close()
+
+    def test_snapshot_query_outside_of_the_cells(self):
+        link_station_snapshot = LinkStationSnapshot(build_snapshot(compile_link_stations(proper_link_stations)))
+        self.assertEqual(0, len(link_station_snapshot.query((1 << 40, -(1 << 40)))))
+        self.assertEqual(0, len(link_station_snapshot.query((500, 500))))
+
+    def test_snapshot_invalid_values(self):
+        self.assertRaises(ValueError, build_snapshot, compile_link_stations([[1 << 31, 0, 10]]))
+
+    def test_snapshot_invalid_buffer(self):
+        snapshot = build_snapshot(compile_link_stations(proper_link_stations))
+        self.assertRaises(ValueError, LinkStationSnapshot, b"XXXXXXXX" + snapshot[8:])
+        self.assertRaises(ValueError, LinkStationSnapshot, snapshot[:-4])
+
+    def test_snapshot_invalid_cell_size(self):
+        snapshot = build_snapshot(compile_link_stations(proper_link_stations))
+        magic, count, _, cell_count, index_count = SNAPSHOT_HEADER.unpack_from(snapshot)
+
+        for cell_size in [0, -12]:
+            self.assertRaises(ValueError, LinkStationSnapshot, SNAPSHOT_HEADER.pack(magic, count, cell_size, cell_count, index_count) + snapshot[SNAPSHOT_HEADER.size:])
+
+    # Tests write_snapshot
+    def test_write_snapshot(self):
+        document_path = os.path.join(self.directory.name, "v1.json")
+
+        with open(document_path, "w") as document_file:
+            json.dump(proper_document, document_file)
+
+        snapshot_path = os.path.join(self.directory.name, "v1.snapshot")
+        size = write_snapshot(document_path, snapshot_path)
+
+        self.assertEqual(os.path.getsize(snapshot_path), size)
+        self.assertEqual((0, 0, 100.0), get_most_suitable_link_station_indexed((0, 0), load_snapshot(snapshot_path)))
+
+    # Tests LinkStationRegistry with a snapshot
+    def test_link_station_registry_prefers_snapshot(self):
+        snapshot_path = os.path.join(self.directory.name, "v1.snapshot")
+
+        with open(snapshot_path, "wb") as snapshot_file:
+            snapshot_file.write(build_snapshot(compile_link_stations(proper_link_stations)))
+
+        link_station_registry = LinkStationRegistry(self.directory.name, "v1")
+        link_station_grid = link_station_registry.get()
+
+        self.assertIsInstance(link_station_grid, LinkStationSnapshot)
+        self.assertEqual((0, 0, 100.0), get_most_suitable_link_station_indexed((0, 0), link_station_grid))
+
+    def test_link_station_registry_closes_previous_snapshot(self):
+        for version, link_stations in [("v1", proper_link_stations), ("v2", proper_link_stations[1:])]:
+            with open(os.path.join(self.directory.name, "{}.snapshot".format(version)), "wb") as snapshot_file:
+                snapshot_file.write(build_snapshot(compile_link_stations(link_stations)))
+
+        link_station_registry = LinkStationRegistry(self.directory.name, "v1")
+        link_station_grid = link_station_registry.get()
+        link_station_registry.get("v2")
+
+        self.assertTrue(link_station_grid.buffer.closed)
+        self.assertFalse(link_station_registry.link_station_grid.buffer.closed)
+        self.assertEqual((10, 0, 4.0), get_most_suitable_link_station_indexed((0, 0), link_station_registry.link_station_grid))
+
+    def test_link_station_registry_keeps_acquired_snapshot(self):
+        for version, link_stations in [("v1", proper_link_stations), ("v2", proper_link_stations[1:])]:
+            with open(os.path.join(self.directory.name, "{}.snapshot".format(version)), "wb") as snapshot_file:
+                snapshot_file.write(build_snapshot(compile_link_stations(link_stations)))
+
+        link_station_registry = LinkStationRegistry(self.directory.name, "v1")
+        link_station_grid, fingerprint = link_station_registry.acquire()
+        indices = link_station_grid.query((0, 0))
+
+        # A newer version doesn't unmap the snapshot while a reader still uses it
+        link_station_registry.get("v2")
+        self.assertNotEqual(fingerprint, link_station_registry.fingerprint)
+        self.assertFalse(link_station_grid.buffer.closed)
+        self.assertEqual((0, 0, 100.0), get_most_suitable_link_station_indexed((0, 0), link_station_grid))
+        self.assertEqual([0, 2], list(indices))
+
+        # The last reader unmaps it, also while a view of it is still referenced
+        link_station_registry.release(link_station_grid)
+        self.assertEqual([0, 2], list(indices))
+
+        del indices
+        link_station_grid.close()
+        self.assertTrue(link_station_grid.buffer.closed)
+        self.assertRaises(ValueError, link_station_grid.acquire)
+
+    def test_link_station_registry_unknown_version(self):
+        self.assertRaises(ValueError, LinkStationRegistry(self.directory.name, "v1").get)
+
+unittest.main()
@@ -0,0 +1,178 @@
+from os.path import dirname
+import random
+import sys
+import unittest
+
+# Ensure that we can import the station store module
+sys.path.insert(0, dirname(dirname(__file__)))
+
+from station_store import LinkStationStore
+from result_cache import ResultCache
+from reference import (
+    proper_link_stations,
+    proper_devices_coordinates,
+    get_reference_most_suitable_link_station)
+
+class LinkStationStoreTests(unittest.TestCase):
+    def assertMatchesReference(self, store, link_stations, devices_coordinates):
+        # The remaining link stations, in the order they were added
+        for device_coordinates in devices_coordinates:
+            self.assertEqual(
+                get_reference_most_suitable_link_station(device_coordinates, link_stations),
+                store.get_most_suitable_link_station(device_coordinates))
+
+    # Tests LinkStationStore
+    def test_store_initial_link_stations(self):
+        store = LinkStationStore(proper_link_stations, cell_size=10)
+        self.assertMatchesReference(store, proper_link_stations, proper_devices_coordinates)
+        self.assertEqual(3, store.snapshot.count)
+
+    def test_store_empty(self):
+        store = LinkStationStore()
+        self.assertEqual((0, 0, 0.0), store.get_most_suitable_link_station((0, 0)))
+
+    def test_store_add(self):
+        store = LinkStationStore(proper_link_stations, cell_size=10)
+        self.assertEqual(3, store.add(100, 100, 5))
+        self.assertEqual((100, 100, 25.0), store.get_most_suitable_link_station((100, 100)))
+
+    def test_store_remove(self):
+        store = LinkStationStore(proper_link_stations, cell_size=10)
+        store.remove(0)
+        self.assertMatchesReference(store, proper_link_stations[1:], proper_devices_coordinates)
+
+    def test_store_update_reach_keeps_order(self):
+        # Both link stations provide the same power, so the first added one has to stay the most suitable
+        store = LinkStationStore([[0, 0, 10], [0, 0, 5]], cell_size=4)
+        store.update_reach(1, 10)
+        store.update_reach(0, 10)
+        self.assertEqual((0, 0, 100.0), store.get_most_suitable_link_station((0, 0)))
+
+        store.update_reach(0, 0)
+        self.assertEqual((0, 0, 100.0), store.get_most_suitable_link_station((0, 0)))
+        self.assertEqual(1, len(store.snapshot.query((0, 0))))
+
+    def test_store_random_updates_match_reference(self):
+        # With small cells, many link stations cover too many cells and are kept apart
+        for cell_size in [16, 4]:
+            self.assertRandomUpdatesMatchReference(LinkStationStore(cell_size=cell_size))
+
+    def assertRandomUpdatesMatchReference(self, store):
+        generator = random.Random(7)
+        link_stations = {}
+        devices_coordinates = [(generator.randint(-100, 100), generator.randint(-100, 100)) for _ in range(40)]
+
+        for _ in range(300):
+            operation = generator.random()
+
+            if operation < 0.5 or not link_stations:
+                link_station = (generator.randint(-100, 100), generator.randint(-100, 100), generator.randint(0, 40))
+                link_stations[store.add(*link_station)] = link_station
+            elif operation < 0.75:
+                link_station_id = generator.choice(sorted(link_stations))
+                store.remove(link_station_id)
+                del link_stations[link_station_id]
+            else:
+                link_station_id = generator.choice(sorted(link_stations))
+                reach = generator.randint(0, 40)
+                store.update_reach(link_station_id, reach)
+                link_stations[link_station_id] = link_stations[link_station_id][:2] + (reach,)
+
+        remaining_link_stations = [link_stations[link_station_id] for link_station_id in sorted(link_stations)]
+        self.assertMatchesReference(store, remaining_link_stations, devices_coordinates)
+
+    def test_store_wide_link_stations(self):
+        store = LinkStationStore([[0, 0, 10], [0, 0, 100000], [0, 0, 10]], cell_size=10)
+
+        # The wide link station isn't registered in the cells, but still keeps its place in the order
+        self.assertEqual((1, ()), (len(store.snapshot.wide_link_stations), store.snapshot.get_cell_state((5000, 5000))[1]))
+        self.assertEqual([0, 1, 2], [entry[0] for entry in store.snapshot.query((0, 0))])
+        self.assertMatchesReference(store, [[0, 0, 10], [0, 0, 100000], [0, 0, 10]], [(0, 0), (5, 5), (5000, 5000)])
+
+        store.update_reach(1, 5)
+        self.assertEqual((), store.snapshot.wide_link_stations)
+        self.assertMatchesReference(store, [[0, 0, 10], [0, 0, 5], [0, 0, 10]], [(0, 0), (5, 5), (5000, 5000)])
+
+    def test_store_update_only_copies_changed_pages(self):
+        store = LinkStationStore([[x * 1000, y * 1000, 5] for x in range(20) for y in range(20)], cell_size=10)
+        snapshot = store.snapshot
+
+        # The new link station covers 4 cells in 4 pages; every other page, and every node of the page table that
+        # doesn't lead to one of those pages, is shared with the previous snapshot
+        store.add(0, 0, 3)
+        self.assertIsNot(snapshot.get_cell_state((0, 0)), store.snapshot.get_cell_state((0, 0)))
+        self.assertIs(snapshot.get_cell_state((5000, 5000)), store.snapshot.get_cell_state((5000, 5000)))
+        self.assertLessEqual(sum(1 for slot, node in snapshot.pages.items() if store.snapshot.pages[slot] is not node), 4)
+
+    def test_store_emptied_store_releases_pages(self):
+        store = LinkStationStore(proper_link_stations, cell_size=10)
+
+        for link_station_id in range(3):
+            store.remove(link_station_id)
+
+        self.assertEqual({}, store.snapshot.pages)
+
+    def test_store_snapshot_isolation(self):
+        store = LinkStationStore(proper_link_stations, cell_size=10)
+        snapshot = store.snapshot
+
+        store.remove(0)
+        store.add(1, 1, 50)
+
+        # The earlier snapshot still holds the link stations of its version
+        self.assertEqual([0, 2], [entry[0] for entry in snapshot.query((5, 5))])
+        self.assertEqual([2, 3], [entry[0] for entry in store.snapshot.query((5, 5))])
+        self.assertEqual(snapshot.version + 2, store.snapshot.version)
+
+    def test_store_invalidates_affected_cache_entries(self):
+        cache = ResultCache()
+        store = LinkStationStore(proper_link_stations, cell_size=10, result_cache=cache)
+
+        store.get_most_suitable_link_station((0, 0))
+        store.get_most_suitable_link_station((100, 100))
+
+        # Only the result of the device in a changed cell is no longer found, without touching the cache
+        store.add(2, 2, 20)
+        self.assertEqual(2, cache.get_statistics()["size"])
+        self.assertEqual((2, 2, 294.86291501015234), store.get_most_suitable_link_station((0, 0)))
+        self.assertEqual((0, 0, 0.0), store.get_most_suitable_link_station((100, 100)))
+        self.assertEqual(1, cache.hits)
+
+    def test_store_cache_follows_updates(self):
+        cache = ResultCache()
+        store = LinkStationStore(proper_link_stations, cell_size=10, result_cache=cache)
+        link_stations = [list(link_station) for link_station in proper_link_stations]
+
+        # Every device is queried twice per version, the second time from the cache unless its cell changed
+        for link_station_id, reach in [(0, 3), (2, 30), (0, 10)]:
+            self.assertMatchesReference(store, link_stations, proper_devices_coordinates * 2)
+            store.update_reach(link_station_id, reach)
+            link_stations[link_station_id][2] = reach
+
+        self.assertMatchesReference(store, link_stations, proper_devices_coordinates)
+        self.assertGreater(cache.hits, 0)
+
+    def test_store_cache_emptied_cell(self):
+        cache = ResultCache()
+        store = LinkStationStore([[0, 0, 10]], cell_size=10, result_cache=cache)
+
+        self.assertEqual((0, 0, 100.0), store.get_most_suitable_link_station((0, 0)))
+        store.remove(0)
+        self.assertEqual((0, 0, 0.0), store.get_most_suitable_link_station((0, 0)))
+        self.assertEqual(0, cache.hits)
+
+    def test_store_unknown_link_station(self):
+        store = LinkStationStore(proper_link_stations)
+        self.assertRaises(ValueError, store.remove, 3)
+        self.assertRaises(ValueError, store.update_reach, 3, 10)
+
+    def test_store_invalid_link_station(self):
+        store = LinkStationStore(proper_link_stations)
+        self.assertRaises(ValueError, store.add, 1.5, 0, 10)
+        self.assertRaises(ValueError, store.update_reach, 0, 10.5)
+
+    def test_store_invalid_device_coordinates(self):
+        store = LinkStationStore(proper_link_stations)
+        self.assertRaises(ValueError, store.get_most_suitable_link_station, [0, 0])
+
+unittest.main()
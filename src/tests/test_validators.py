@@ -6,6 +6,18 @@ import unittest
 sys.path.insert(0, dirname(dirname(__file__)))
 
 from validators import (
+    validate_device_coordinates_range,
+    validate_link_station_arrays_range,
+    validate_exact,
+    validate_device_id,
+    validate_safe_radius,
+    validate_hysteresis,
+    validate_port,
+    validate_shards,
+    validate_tile_size,
+    validate_max_tiles,
+    validate_link_station_id,
+    validate_link_station_reach,
     validate_most_suitable_link_station,
     validate_distance,
     validate_reach,
@@ -13,7 +25,12 @@ from validators import (
     validate_link_station_coordinates,
     validate_event,
     validate_body,
-    validate_link_stations)
+    validate_link_stations,
+    validate_batch_body,
+    validate_devices_coordinates,
+    validate_top,
+    validate_min_power,
+    validate_body_ranking)
 
 class ValidatorsTest(unittest.TestCase):
     # Tests validate_most_suitable_link_station
@@ -168,4 +185,122 @@ class ValidatorsTest(unittest.TestCase):
     def test_validate_body_link_station_reach_not_an_int(self):
         self.assertRaises(ValueError, validate_body, {"device": {"coordinates": {"x": 0, "y": 0}},"linkStations": [{"coordinates": {"x": 0, "y": 0}, "reach": 10.4}]})
 
-unittest.main()
\ No newline at end of file
+    # Tests validate_batch_body
+    def test_validate_batch_body_none(self):
+        self.assertRaises(ValueError, validate_batch_body, None)
+
+    def test_validate_batch_body_missing_devices(self):
+        self.assertRaises(ValueError, validate_batch_body, {"linkStations": [{"coordinates": {"x": 0,"y": 0},"reach": 10}]})
+
+    def test_validate_batch_body_devices_not_a_list(self):
+        self.assertRaises(ValueError, validate_batch_body, {"devices": {},"linkStations": [{"coordinates": {"x": 0,"y": 0},"reach": 10}]})
+
+    def test_validate_batch_body_empty_devices(self):
+        self.assertRaises(ValueError, validate_batch_body, {"devices": [],"linkStations": [{"coordinates": {"x": 0,"y": 0},"reach": 10}]})
+
+    def test_validate_batch_body_x_device_coordinate_not_an_int(self):
+        self.assertRaises(ValueError, validate_batch_body, {"devices": [{"coordinates": {"x": 0, "y": 0}}, {"coordinates": {"x": 0.8, "y": 0}}],"linkStations": [{"coordinates": {"x": 0,"y": 0},"reach": 10}]})
+
+    def test_validate_batch_body_missing_link_stations(self):
+        self.assertRaises(ValueError, validate_batch_body, {"devices": [{"coordinates": {"x": 0, "y": 0}}]})
+
+    # Tests validate_devices_coordinates
+    def test_validate_devices_coordinates_none(self):
+        self.assertRaises(ValueError, validate_devices_coordinates, None)
+
+    def test_validate_devices_coordinates_empty(self):
+        self.assertRaises(ValueError, validate_devices_coordinates, [])
+
+    def test_validate_devices_coordinates_invalid_device_coordinates(self):
+        self.assertRaises(ValueError, validate_devices_coordinates, [(1, 2), [1, 2]])
+
+    # Tests validate_top
+    def test_validate_top_not_an_int(self):
+        self.assertRaises(ValueError, validate_top, 2.0)
+
+    def test_validate_top_less_than_one(self):
+        self.assertRaises(ValueError, validate_top, 0)
+
+    # Tests validate_min_power
+    def test_validate_min_power_none(self):
+        self.assertRaises(ValueError, validate_min_power, None)
+
+    def test_validate_min_power_negative(self):
+        self.assertRaises(ValueError, validate_min_power, -0.5)
+
+    def test_validate_min_power_not_finite(self):
+        for min_power in [float("nan"), float("inf"), 1 << 1100]:
+            self.assertRaises(ValueError, validate_min_power, min_power)
+
+    # Tests validate_body_ranking
+    def test_validate_body_ranking_top_not_an_int(self):
+        self.assertRaises(ValueError, validate_body_ranking, {"top": "3"})
+
+    def test_validate_body_ranking_top_a_bool(self):
+        self.assertRaises(ValueError, validate_body_ranking, {"top": True})
+
+    def test_validate_body_ranking_min_power_not_a_number(self):
+        self.assertRaises(ValueError, validate_body_ranking, {"minPower": "high"})
+
+    def test_validate_body_ranking_min_power_not_finite(self):
+        for min_power in [float("nan"), float("inf")]:
+            self.assertRaises(ValueError, validate_body_ranking, {"minPower": min_power})
+
+    # Tests validate_link_station_id
+    def test_validate_link_station_id_unknown(self):
+        self.assertRaises(ValueError, validate_link_station_id, 3, {0: (0, 0, 10)})
+
+    def test_validate_link_station_id_not_an_int(self):
+        self.assertRaises(ValueError, validate_link_station_id, "0", {0: (0, 0, 10)})
+
+    # Tests validate_link_station_reach
+    def test_validate_link_station_reach_not_an_int(self):
+        self.assertRaises(ValueError, validate_link_station_reach, 10.0)
+
+    # Tests validate_tile_size
+    def test_validate_tile_size_less_than_one(self):
+        self.assertRaises(ValueError, validate_tile_size, 0)
+
+    # Tests validate_max_tiles
+    def test_validate_max_tiles_not_an_int(self):
+        self.assertRaises(ValueError, validate_max_tiles, 2.0)
+
+    # Tests validate_shards
+    def test_validate_shards_less_than_one(self):
+        self.assertRaises(ValueError, validate_shards, 0)
+
+    # Tests validate_port
+    def test_validate_port_out_of_range(self):
+        self.assertRaises(ValueError, validate_port, 65536)
+
+    # Tests validate_device_id
+    def test_validate_device_id_not_a_string_or_int(self):
+        self.assertRaises(ValueError, validate_device_id, 1.5)
+
+    # Tests validate_safe_radius
+    def test_validate_safe_radius_negative(self):
+        self.assertRaises(ValueError, validate_safe_radius, -1)
+
+    # Tests validate_hysteresis
+    def test_validate_hysteresis_not_a_number(self):
+        self.assertRaises(ValueError, validate_hysteresis, "0.1")
+
+    # Tests validate_device_coordinates_range
+    def test_validate_device_coordinates_range_too_large(self):
+        self.assertRaises(ValueError, validate_device_coordinates_range, (1 << 63, 0))
+
+    def test_validate_device_coordinates_range_lowest(self):
+        validate_device_coordinates_range((-(1 << 63), (1 << 63) - 1))
+
+    # Tests validate_link_station_arrays_range
+    def test_validate_link_station_arrays_range_too_large(self):
+        self.assertRaises(ValueError, validate_link_station_arrays_range, ([0, 1 << 63], [0, 0], [1, 1]))
+
+    def test_validate_link_station_arrays_range_lowest(self):
+        validate_link_station_arrays_range(([-(1 << 63)], [(1 << 63) - 1], [1]))
+
+    # Tests validate_exact
+    def test_validate_exact_not_a_bool(self):
+        self.assertRaises(ValueError, validate_exact, 1)
+
+unittest.main()
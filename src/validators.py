@@ -1,3 +1,5 @@
+import sys
+
 def validate_most_suitable_link_station(most_suitable_link_station):
     if most_suitable_link_station is None or type(most_suitable_link_station) is not tuple or len(most_suitable_link_station) != 3:
         raise ValueError("Invalid most suitable link station specified")
@@ -28,6 +30,11 @@ def validate_device_coordinates(device_coordinates):
     if type(device_coordinates[0]) is not int or type(device_coordinates[1]) is not int:
         raise ValueError("Invalid device coordinate specified")
 
+def validate_device_coordinates_range(device_coordinates):
+    # The devices of a batch are calculated with 64 bit integers
+    if not -(1 << 63) <= device_coordinates[0] < (1 << 63) or not -(1 << 63) <= device_coordinates[1] < (1 << 63):
+        raise ValueError("Invalid device coordinates specified")
+
 def validate_link_station_coordinates(link_station_coordinates):
     if link_station_coordinates is None or type(link_station_coordinates) is not tuple or len(link_station_coordinates) != 2:
        raise ValueError("Invalid link station coordinates specified")
@@ -35,6 +42,14 @@ def validate_link_station_coordinates(link_station_coordinates):
     if type(link_station_coordinates[0]) is not int or type(link_station_coordinates[1]) is not int:
        raise ValueError("Invalid link station coordinate specified")
 
+def validate_cell_size(cell_size):
+    if cell_size is None or type(cell_size) is not int or cell_size < 1:
+        raise ValueError("Invalid cell size specified")
+
+def validate_link_station_grid(link_station_grid):
+    if link_station_grid is None or not hasattr(link_station_grid, 'query') or not hasattr(link_station_grid, 'link_station_arrays'):
+        raise ValueError("Invalid link station grid specified")
+
 def validate_event(json_object):
     if json_object is None or type(json_object) is not dict:
         raise ValueError("Invalid request")
@@ -47,34 +62,232 @@ def validate_body(json_object):
         raise ValueError("Invalid body specified")
 
     # Validate device
-    if 'device' not in json_object or type(json_object['device']) is not dict:
+    if 'device' not in json_object:
         raise ValueError("Invalid device specified in the request")
 
-    if 'coordinates' not in json_object['device'] or type(json_object['device']['coordinates']) is not dict:
+    validate_body_device(json_object['device'])
+
+    # Validate link stations
+    if 'linkStations' not in json_object:
+        raise ValueError("No valid link stations list specified in the request")
+
+    validate_body_link_stations(json_object['linkStations'])
+
+def validate_batch_body(json_object):
+    if json_object is None or type(json_object) is not dict:
+        raise ValueError("Invalid body specified")
+
+    # Validate devices
+    if 'devices' not in json_object or type(json_object['devices']) is not list or len(json_object['devices']) < 1:
+        raise ValueError("No valid devices list specified in the request")
+
+    for device in json_object['devices']:
+        validate_body_device(device)
+
+    # Validate link stations
+    if 'linkStations' not in json_object:
+        raise ValueError("No valid link stations list specified in the request")
+
+    validate_body_link_stations(json_object['linkStations'])
+
+def validate_body_device(device):
+    if type(device) is not dict:
+        raise ValueError("Invalid device specified in the request")
+
+    if 'coordinates' not in device or type(device['coordinates']) is not dict:
         raise ValueError("Invalid device coordinates specified in the request")
 
-    if 'x' not in json_object['device']['coordinates'] or type(json_object['device']['coordinates']['x']) is not int:
+    if 'x' not in device['coordinates'] or type(device['coordinates']['x']) is not int:
         raise ValueError("Invalid x device coordinate specified in the request")
 
-    if 'y' not in json_object['device']['coordinates'] or type(json_object['device']['coordinates']['y']) is not int:
+    if 'y' not in device['coordinates'] or type(device['coordinates']['y']) is not int:
         raise ValueError("Invalid y device coordinate specified in the request")
 
-    # Validate link stations
-    if 'linkStations' not in json_object or type(json_object['linkStations']) is not list:
+def validate_body_link_stations(link_stations):
+    if type(link_stations) is not list:
         raise ValueError("No valid link stations list specified in the request")
 
-    for link_station in json_object['linkStations']:
-        if type(link_station) is not dict:
-            raise ValueError("Invalid link station specified in the request")
+    for link_station in link_stations:
+        validate_body_link_station(link_station)
+
+def validate_body_link_station(link_station):
+    if type(link_station) is not dict:
+        raise ValueError("Invalid link station specified in the request")
+
+    if 'coordinates' not in link_station or type(link_station['coordinates']) is not dict:
+        raise ValueError("Invalid link station coordinates specified in the request")
+
+    if 'x' not in link_station['coordinates'] or type(link_station['coordinates']['x']) is not int:
+        raise ValueError("Invalid x link station coordinate specified in the request")
+
+    if 'y' not in link_station['coordinates'] or type(link_station['coordinates']['y']) is not int:
+        raise ValueError("Invalid y link station coordinate specified in the request")
+
+    if 'reach' not in link_station or type(link_station['reach']) is not int:
+        raise ValueError("Invalid link station reach specified in the request")
+
+def validate_link_station_arrays(link_station_arrays):
+    if link_station_arrays is None or type(link_station_arrays) is not tuple or len(link_station_arrays) != 3:
+        raise ValueError("Invalid link station arrays specified")
+
+    if len(link_station_arrays[0]) < 1 or not len(link_station_arrays[0]) == len(link_station_arrays[1]) == len(link_station_arrays[2]):
+        raise ValueError("Invalid link station arrays specified")
+
+def validate_link_station_arrays_range(link_station_arrays):
+    # Link stations that are stored as 64 bit integers (such as in shared memory) have to fit in them
+    for values in link_station_arrays:
+        if min(values) < -(1 << 63) or max(values) >= (1 << 63):
+            raise ValueError("Invalid link station values specified")
+
+def validate_devices_coordinates(devices_coordinates):
+    if devices_coordinates is None or type(devices_coordinates) is not list or len(devices_coordinates) < 1:
+        raise ValueError("Invalid devices coordinates specified")
+
+    for device_coordinates in devices_coordinates:
+        validate_device_coordinates(device_coordinates)
+
+def validate_max_matrix_size(max_matrix_size):
+    if max_matrix_size is None or type(max_matrix_size) is not int or max_matrix_size < 1:
+        raise ValueError("Invalid maximum matrix size specified")
+
+def validate_registry_source(source):
+    if source is None or type(source) is not str or len(source) < 1:
+        raise ValueError("Invalid registry source specified")
+
+def validate_registry_version(version):
+    # The version is used in a file name or object key, so only plain names are allowed
+    if version is None or type(version) is not str or len(version) < 1 or version.startswith('.'):
+        raise ValueError("Invalid registry version specified")
+
+    if not all(character.isalnum() or character in '._-' for character in version):
+        raise ValueError("Invalid registry version specified")
+
+def validate_registry_document(document):
+    if document is None or type(document) is not dict or 'linkStations' not in document:
+        raise ValueError("Invalid registry document specified")
+
+def validate_registry_body(json_object):
+    if json_object is None or type(json_object) is not dict:
+        raise ValueError("Invalid body specified")
+
+    # Validate the device or devices, only a list of devices makes a batch request
+    if type(json_object.get('devices')) is list:
+        if len(json_object['devices']) < 1:
+            raise ValueError("No valid devices list specified in the request")
+
+        for device in json_object['devices']:
+            validate_body_device(device)
+    else:
+        if 'device' not in json_object:
+            raise ValueError("Invalid device specified in the request")
+
+        validate_body_device(json_object['device'])
+
+    # Validate the optional registry version
+    if 'registryVersion' in json_object:
+        try:
+            validate_registry_version(json_object['registryVersion'])
+        except ValueError:
+            raise ValueError("Invalid registry version specified in the request")
+
+def validate_workers(workers):
+    if workers is None or type(workers) is not int or workers < 1:
+        raise ValueError("Invalid number of workers specified")
+
+def validate_chunk_size(chunk_size):
+    if chunk_size is None or type(chunk_size) is not int or chunk_size < 1:
+        raise ValueError("Invalid chunk size specified")
+
+def validate_max_in_flight(max_in_flight):
+    if max_in_flight is None or type(max_in_flight) is not int or max_in_flight < 1:
+        raise ValueError("Invalid maximum number of chunks in flight specified")
+
+def validate_cache_size(max_size):
+    if max_size is None or type(max_size) is not int or max_size < 1:
+        raise ValueError("Invalid cache size specified")
+
+def validate_cache_ttl(ttl):
+    if ttl is None or type(ttl) not in (int, float) or not ttl > 0:
+        raise ValueError("Invalid cache time to live specified")
+
+def validate_top(top):
+    if top is not None and (type(top) is not int or top < 1):
+        raise ValueError("Invalid top specified")
+
+def validate_min_power(min_power):
+    if not is_valid_min_power(min_power):
+        raise ValueError("Invalid minimum power specified")
+
+def validate_body_ranking(json_object):
+    if 'top' in json_object and (type(json_object['top']) is not int or json_object['top'] < 1):
+        raise ValueError("Invalid top specified in the request")
+
+    if 'minPower' in json_object and not is_valid_min_power(json_object['minPower']):
+        raise ValueError("Invalid minimum power specified in the request")
+
+def is_valid_min_power(min_power):
+    # NaN and infinity (which JSON parsing accepts) fail both bounds, like integers too large for a float
+    return min_power is not None and type(min_power) in (int, float) and 0 <= min_power <= sys.float_info.max
+
+def validate_sample_rate(sample_rate):
+    if sample_rate is None or type(sample_rate) not in (int, float) or sample_rate < 0 or sample_rate > 1:
+        raise ValueError("Invalid metrics sample rate specified")
+
+def validate_snapshot_header(magic, expected_magic, size, expected_size, cell_size):
+    # The cell size divides the device coordinates, so it has to be positive
+    if magic != expected_magic or size != expected_size or cell_size <= 0:
+        raise ValueError("Invalid link station snapshot specified")
+
+def validate_snapshot_link_station_arrays(link_station_arrays):
+    validate_link_station_arrays(link_station_arrays)
+
+    # The values, and the bounding box of every reach circle, have to fit in 32 bit integers
+    for x, y, reach in zip(*link_station_arrays):
+        radius = max(reach, 0)
+
+        if reach < -(1 << 31) or x - radius < -(1 << 31) or x + radius >= (1 << 31) or y - radius < -(1 << 31) or y + radius >= (1 << 31):
+            raise ValueError("Invalid link station values specified for a snapshot")
+
+def validate_link_station_id(link_station_id, link_stations):
+    if type(link_station_id) is not int or link_station_id not in link_stations:
+        raise ValueError("Unknown link station specified")
+
+def validate_link_station_reach(reach):
+    if reach is None or type(reach) is not int:
+        raise ValueError("Invalid reach specified")
+
+def validate_tile_size(tile_size):
+    if tile_size is None or type(tile_size) is not int or tile_size < 1:
+        raise ValueError("Invalid tile size specified")
+
+def validate_max_tiles(max_tiles):
+    if max_tiles is None or type(max_tiles) is not int or max_tiles < 1:
+        raise ValueError("Invalid maximum number of tiles specified")
+
+def validate_shards(shards):
+    if shards is None or type(shards) is not int or shards < 1:
+        raise ValueError("Invalid number of shards specified")
+
+def validate_port(port):
+    if port is None or type(port) is not int or port < 0 or port > 65535:
+        raise ValueError("Invalid port specified")
+
+def validate_device_id(device_id):
+    if device_id is None or type(device_id) not in (int, str):
+        raise ValueError("Invalid device id specified")
 
-        if 'coordinates' not in link_station or type(link_station['coordinates']) is not dict:
-            raise ValueError("Invalid link station coordinates specified in the request")
+def validate_safe_radius(safe_radius):
+    if safe_radius is None or type(safe_radius) is not int or safe_radius < 0:
+        raise ValueError("Invalid safe radius specified")
 
-        if 'x' not in link_station['coordinates'] or type(link_station['coordinates']['x']) is not int:
-            raise ValueError("Invalid x link station coordinate specified in the request")
+def validate_hysteresis(hysteresis):
+    if hysteresis is None or type(hysteresis) not in (int, float) or hysteresis < 0:
+        raise ValueError("Invalid hysteresis specified")
 
-        if 'y' not in link_station['coordinates'] or type(link_station['coordinates']['y']) is not int:
-            raise ValueError("Invalid y link station coordinate specified in the request")
+def validate_max_sessions(max_sessions):
+    if max_sessions is None or type(max_sessions) is not int or max_sessions < 1:
+        raise ValueError("Invalid maximum number of sessions specified")
 
-        if 'reach' not in link_station or type(link_station['reach']) is not int:
-            raise ValueError("Invalid link station reach specified in the request")
\ No newline at end of file
+def validate_exact(exact):
+    if exact is None or type(exact) is not bool:
+        raise ValueError("Invalid exact mode specified")